@@ -0,0 +1,279 @@
+"""Content-addressed cache for LLM check-in analyses.
+
+Entries are keyed by a SHA-256 digest of everything that determines the model
+output (rendered prompts, prompt version, model and sampling parameters), so an
+unchanged set of journal entries and goals is served without another completion.
+
+The SQLite backend blocks on disk and on other workers' write locks, so
+AnalysisCache runs its calls in a worker thread, and a lock held for longer than
+SQLITE_BUSY_TIMEOUT counts as a miss (or a skipped write) rather than stalling
+the request.
+"""
+
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import closing
+from typing import Any, Callable
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Seconds a SQLite call waits for another connection's write lock before giving up
+SQLITE_BUSY_TIMEOUT = 0.25
+
+
+class CacheBackend(ABC):
+    """Storage interface for cached analyses."""
+
+    # Whether calls do blocking I/O and must be kept off the event loop
+    blocking = False
+
+    @abstractmethod
+    def get(self, key: str) -> dict[str, Any] | None:
+        """Return the cached value for key, or None if missing or expired."""
+
+    @abstractmethod
+    def set(self, key: str, value: dict[str, Any]) -> None:
+        """Store value under key, evicting old entries if needed."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove key if present."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Remove every entry."""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Number of entries currently stored (expired ones may be included)."""
+
+
+class MemoryCacheBackend(CacheBackend):
+    """In-process LRU cache with a per-entry TTL."""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._data: OrderedDict[str, tuple[float, dict[str, Any]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at <= time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: dict[str, Any]) -> None:
+        with self._lock:
+            self._data[key] = (time.time() + self.ttl_seconds, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """LRU/TTL cache stored in a SQLite file so several uvicorn workers can share it."""
+
+    blocking = True
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: int = 10000,
+        ttl_seconds: float = 3600.0,
+        busy_timeout: float = SQLITE_BUSY_TIMEOUT,
+    ):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._local = threading.local()
+        # Created once at startup, where waiting out another worker doing the same is fine
+        with closing(sqlite3.connect(self.path, timeout=5.0, isolation_level=None)) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS analysis_cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS analysis_cache_last_access ON analysis_cache (last_access)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        """One connection per thread; WAL lets readers and a writer proceed together."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        conn = self._connect()
+        now = time.time()
+        row = conn.execute(
+            "SELECT value, expires_at FROM analysis_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at <= now:
+            conn.execute("DELETE FROM analysis_cache WHERE key = ?", (key,))
+            return None
+        conn.execute("UPDATE analysis_cache SET last_access = ? WHERE key = ?", (now, key))
+        return json.loads(value)
+
+    def set(self, key: str, value: dict[str, Any]) -> None:
+        conn = self._connect()
+        now = time.time()
+        conn.execute(
+            """
+            INSERT INTO analysis_cache (key, value, expires_at, last_access)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(key) DO UPDATE SET
+                value = excluded.value,
+                expires_at = excluded.expires_at,
+                last_access = excluded.last_access
+            """,
+            (key, json.dumps(value), now + self.ttl_seconds, now),
+        )
+        conn.execute("DELETE FROM analysis_cache WHERE expires_at <= ?", (now,))
+        conn.execute(
+            """
+            DELETE FROM analysis_cache WHERE key IN (
+                SELECT key FROM analysis_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?
+            )
+            """,
+            (self.max_entries,),
+        )
+
+    def delete(self, key: str) -> None:
+        self._connect().execute("DELETE FROM analysis_cache WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        self._connect().execute("DELETE FROM analysis_cache")
+
+    def __len__(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM analysis_cache").fetchone()[0]
+
+
+class AnalysisCache:
+    """Content-addressed analysis cache with hit/miss counters."""
+
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(
+        system_prompt: str,
+        user_prompt: str,
+        *,
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        prompt_version: str = "",
+    ) -> str:
+        """Digest of every input that determines the completion."""
+        material = json.dumps(
+            {
+                "system_prompt": system_prompt,
+                "user_prompt": user_prompt,
+                "prompt_version": prompt_version,
+                "model": model,
+                "temperature": temperature,
+                "max_tokens": max_tokens,
+            },
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    async def _call(self, method: Callable[..., Any], *args: Any) -> Any:
+        if not self.backend.blocking:
+            return method(*args)
+        return await asyncio.to_thread(method, *args)
+
+    async def get(self, key: str) -> dict[str, Any] | None:
+        try:
+            value = await self._call(self.backend.get, key)
+        except sqlite3.OperationalError as e:
+            # Locked by another worker (or unreadable): answer as a miss instead of waiting
+            logger.warning(f"Analysis cache read skipped: {str(e)}")
+            value = None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: dict[str, Any]) -> None:
+        try:
+            await self._call(self.backend.set, key, value)
+        except sqlite3.OperationalError as e:
+            logger.warning(f"Analysis cache write skipped: {str(e)}")
+
+    async def stats(self) -> dict[str, Any]:
+        """Hit/miss counters for this process plus the backend size."""
+        lookups = self.hits + self.misses
+        try:
+            entries = await self._call(len, self.backend)
+        except sqlite3.OperationalError:
+            entries = None
+        return {
+            "backend": type(self.backend).__name__,
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def create_analysis_cache() -> AnalysisCache:
+    """Build the analysis cache from ANALYSIS_CACHE_* environment variables."""
+    backend_name = os.getenv("ANALYSIS_CACHE_BACKEND", "memory").lower()
+    ttl_seconds = float(os.getenv("ANALYSIS_CACHE_TTL_SECONDS", "86400"))
+    max_entries = int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "1024"))
+
+    if backend_name == "sqlite":
+        path = os.getenv("ANALYSIS_CACHE_PATH", "analysis_cache.sqlite3")
+        backend: CacheBackend = SQLiteCacheBackend(path, max_entries=max_entries, ttl_seconds=ttl_seconds)
+    elif backend_name == "memory":
+        backend = MemoryCacheBackend(max_entries=max_entries, ttl_seconds=ttl_seconds)
+    else:
+        raise ValueError(f"Unknown ANALYSIS_CACHE_BACKEND: {backend_name}")
+
+    return AnalysisCache(backend)
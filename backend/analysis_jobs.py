@@ -0,0 +1,148 @@
+"""Bounded in-process worker pool for background analysis jobs.
+
+Jobs are queued per user and handed to a fixed number of workers. A user never
+has more than ``per_user_limit`` jobs running at once, so one heavy user cannot
+occupy every worker (or every upstream LLM slot) while others wait.
+
+Jobs live only in memory. On stop, jobs that never started are handed to
+``on_dropped`` so their owner can record them as abandoned; running jobs are
+cancelled and see ``asyncio.CancelledError``.
+"""
+
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueueFull(Exception):
+    """Raised when a job cannot be accepted because a queue limit was reached."""
+
+
+@dataclass
+class AnalysisJob:
+    """A queued analysis request."""
+
+    id: str
+    user_id: str
+    payload: dict[str, Any] = field(default_factory=dict)
+
+
+class AnalysisJobQueue:
+    """Runs submitted jobs on a bounded worker pool with a per-user concurrency cap."""
+
+    def __init__(
+        self,
+        run_job: Callable[[AnalysisJob], Awaitable[None]],
+        workers: int = 4,
+        per_user_limit: int = 1,
+        max_pending: int = 100,
+        max_pending_per_user: int = 5,
+        on_dropped: Callable[[AnalysisJob], Awaitable[None]] | None = None,
+    ):
+        self.run_job = run_job
+        self.on_dropped = on_dropped
+        self.workers = workers
+        self.per_user_limit = per_user_limit
+        self.max_pending = max_pending
+        self.max_pending_per_user = max_pending_per_user
+
+        self._ready: asyncio.Queue[AnalysisJob] = asyncio.Queue()
+        self._waiting: dict[str, deque[AnalysisJob]] = {}
+        # Jobs per user that are in the ready queue or running (bounded by per_user_limit)
+        self._admitted: dict[str, int] = {}
+        self._running = 0
+        self._tasks: list[asyncio.Task[None]] = []
+        self.completed = 0
+        self.failed = 0
+
+    def start(self) -> None:
+        """Start the worker tasks (call from within the running event loop)."""
+        if self._tasks:
+            return
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        """Cancel the workers (and the jobs they are running); jobs that have not started are dropped."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        dropped: list[AnalysisJob] = []
+        while not self._ready.empty():
+            dropped.append(self._ready.get_nowait())
+        for jobs in self._waiting.values():
+            dropped.extend(jobs)
+        self._waiting.clear()
+        self._admitted.clear()
+        if dropped:
+            logger.warning(f"Dropping {len(dropped)} queued jobs on shutdown")
+        if dropped and self.on_dropped is not None:
+            results = await asyncio.gather(*(self.on_dropped(job) for job in dropped), return_exceptions=True)
+            for job, result in zip(dropped, results):
+                if isinstance(result, Exception):
+                    logger.error(f"Failed to record dropped job {job.id}: {str(result)}")
+
+    def pending(self, user_id: str | None = None) -> int:
+        """Jobs accepted but not finished, optionally for one user."""
+        if user_id is not None:
+            return len(self._waiting.get(user_id, ())) + self._admitted.get(user_id, 0)
+        return sum(len(jobs) for jobs in self._waiting.values()) + sum(self._admitted.values())
+
+    def submit(self, job: AnalysisJob) -> None:
+        """Accept a job or raise JobQueueFull. Never blocks on the job itself."""
+        if self.pending() >= self.max_pending:
+            raise JobQueueFull("Analysis queue is full, please try again shortly")
+        if self.pending(job.user_id) >= self.max_pending_per_user:
+            raise JobQueueFull("Too many analyses in progress for this user")
+
+        if self._admitted.get(job.user_id, 0) < self.per_user_limit:
+            self._admit(job)
+        else:
+            self._waiting.setdefault(job.user_id, deque()).append(job)
+
+    def _admit(self, job: AnalysisJob) -> None:
+        self._admitted[job.user_id] = self._admitted.get(job.user_id, 0) + 1
+        self._ready.put_nowait(job)
+
+    def _release(self, user_id: str) -> None:
+        """Free a user's slot and promote their next waiting job, if any."""
+        self._admitted[user_id] -= 1
+        if not self._admitted[user_id]:
+            del self._admitted[user_id]
+        waiting = self._waiting.get(user_id)
+        if waiting:
+            self._admit(waiting.popleft())
+            if not waiting:
+                del self._waiting[user_id]
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._ready.get()
+            self._running += 1
+            try:
+                await self.run_job(job)
+                self.completed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Analysis job {job.id} failed: {type(e).__name__}: {str(e)}", exc_info=True)
+            finally:
+                self._running -= 1
+                self._release(job.user_id)
+                self._ready.task_done()
+
+    def stats(self) -> dict[str, Any]:
+        """Queue depth and outcome counters."""
+        return {
+            "workers": len(self._tasks),
+            "queued": self.pending() - self._running,
+            "running": self._running,
+            "completed": self.completed,
+            "failed": self.failed,
+        }
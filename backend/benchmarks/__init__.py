@@ -0,0 +1 @@
+"""Micro-benchmarks for TherapyAI backend hot paths."""
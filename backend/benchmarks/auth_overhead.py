@@ -0,0 +1,78 @@
+"""Micro-benchmark: per-request cost of the auth dependency.
+
+Compares the previous path (os.getenv + jwt.decode + User on every call) with
+get_current_user backed by the verified-token cache. Run from the repo root:
+
+    python -m backend.benchmarks.auth_overhead [iterations]
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+# dependencies.py builds its clients at import time; give it harmless settings
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:54321")
+os.environ.setdefault("SUPABASE_ANON_KEY", "benchmark")
+os.environ.setdefault("SUPABASE_JWT_SECRET", "benchmark-secret")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from jose import jwt
+
+try:
+    from backend import dependencies
+    from backend.schemas import User
+except ModuleNotFoundError:
+    import dependencies
+    from schemas import User
+
+
+def make_token() -> str:
+    claims = {
+        "sub": "11111111-1111-1111-1111-111111111111",
+        "email": "bench@example.com",
+        "aud": "authenticated",
+        "exp": int(time.time()) + 3600,
+    }
+    return jwt.encode(claims, os.environ["SUPABASE_JWT_SECRET"], algorithm="HS256")
+
+
+def uncached(authorization: str) -> User:
+    """The auth path before the cache: full verification on every request."""
+    token = authorization.replace("Bearer ", "")
+    payload = jwt.decode(
+        token,
+        os.getenv("SUPABASE_JWT_SECRET"),
+        algorithms=["HS256"],
+        audience="authenticated",
+    )
+    return User(id=payload["sub"], email=payload.get("email"), token=token)
+
+
+async def cached_loop(authorization: str, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await dependencies.get_current_user(authorization)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    authorization = f"Bearer {make_token()}"
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        uncached(authorization)
+    before = time.perf_counter() - start
+
+    dependencies.token_cache.clear()
+    after = asyncio.run(cached_loop(authorization, iterations))
+
+    print(f"iterations: {iterations}")
+    print(f"before (jwt.decode per request): {before / iterations * 1e6:8.2f} us/request")
+    print(f"after  (verified-token cache):   {after / iterations * 1e6:8.2f} us/request")
+    print(f"speedup: {before / after:.1f}x  cache: {dependencies.token_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""A local stand-in for the OpenAI API with injectable latency and failures.
+
+Serves /v1/chat/completions (plain, JSON mode and streamed) and /v1/embeddings
+with canned responses, so the gateway's limits, retries, hedging and deadlines
+can be exercised without a key or network. Point the backend at it with
+OPENAI_BASE_URL:
+
+    python -m backend.benchmarks.fake_openai --port 9100 --delay 0.5 --error-rate 0.1
+    OPENAI_BASE_URL=http://127.0.0.1:9100/v1 OPENAI_API_KEY=fake uvicorn backend.main:app
+
+Behaviour can be changed while it runs with ``POST /_config`` (same fields as
+the flags, as JSON) and counters are at ``GET /_stats``.
+"""
+
+from dataclasses import asdict, dataclass
+from typing import Any
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+@dataclass
+class FakeConfig:
+    """How the fake responds: latency in seconds and failure injection."""
+
+    delay: float = 0.2  # before the first byte
+    jitter: float = 0.0  # uniform extra latency in [0, jitter)
+    tail_rate: float = 0.0  # fraction of requests that take tail_delay instead
+    tail_delay: float = 5.0
+    error_rate: float = 0.0  # fraction of requests answered with error_status
+    error_status: int = 503
+    retry_after: float | None = None  # sent as Retry-After on injected errors
+    stream_chunks: int = 20
+    chunk_delay: float = 0.01
+
+
+config = FakeConfig()
+counters = {"requests": 0, "errors": 0, "in_flight": 0, "max_in_flight": 0}
+
+app = FastAPI(title="Fake OpenAI")
+
+
+async def simulate() -> JSONResponse | None:
+    """Wait out the configured latency; return an error response if one is injected."""
+    counters["requests"] += 1
+    delay = config.tail_delay if random.random() < config.tail_rate else config.delay
+    await asyncio.sleep(delay + random.uniform(0, config.jitter))
+    if random.random() < config.error_rate:
+        counters["errors"] += 1
+        headers = {"retry-after": str(config.retry_after)} if config.retry_after is not None else None
+        return JSONResponse(
+            {"error": {"message": "Injected failure", "type": "server_error", "code": None}},
+            status_code=config.error_status,
+            headers=headers,
+        )
+    return None
+
+
+def fake_content(body: dict[str, Any]) -> str:
+    """Deterministic reply text for a request (a JSON object in JSON mode)."""
+    prompt = json.dumps(body.get("messages", []), sort_keys=True)
+    digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8]
+    if (body.get("response_format") or {}).get("type") == "json_object":
+        return json.dumps({"summary": f"Fake summary {digest}.", "sentiment": 0.0, "themes": ["fake"]})
+    return f"Fake analysis {digest}. " + "You seem to be doing fine. " * 5
+
+
+@app.middleware("http")
+async def track_in_flight(request: Request, call_next):
+    counters["in_flight"] += 1
+    counters["max_in_flight"] = max(counters["max_in_flight"], counters["in_flight"])
+    try:
+        return await call_next(request)
+    finally:
+        counters["in_flight"] -= 1
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    error = await simulate()
+    if error is not None:
+        return error
+    content = fake_content(body)
+    base = {"id": "chatcmpl-fake", "created": int(time.time()), "model": body.get("model", "fake")}
+
+    if not body.get("stream"):
+        words = len(content.split())
+        return {
+            **base,
+            "object": "chat.completion",
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": len(json.dumps(body)) // 4, "completion_tokens": words, "total_tokens": words},
+        }
+
+    async def events():
+        pieces = content.split(" ")
+        size = max(1, len(pieces) // max(1, config.stream_chunks))
+        for i in range(0, len(pieces), size):
+            delta = " ".join(pieces[i : i + size]) + (" " if i + size < len(pieces) else "")
+            chunk = {
+                **base,
+                "object": "chat.completion.chunk",
+                "choices": [{"index": 0, "delta": {"content": delta}, "finish_reason": None}],
+            }
+            yield f"data: {json.dumps(chunk)}\n\n"
+            await asyncio.sleep(config.chunk_delay)
+        done = {**base, "object": "chat.completion.chunk", "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+        yield f"data: {json.dumps(done)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.post("/v1/embeddings")
+async def embeddings(request: Request):
+    body = await request.json()
+    error = await simulate()
+    if error is not None:
+        return error
+    texts = body["input"] if isinstance(body["input"], list) else [body["input"]]
+    dim = int(body.get("dimensions") or 1536)
+    data = []
+    for index, text in enumerate(texts):
+        rng = random.Random(hashlib.sha256(str(text).encode("utf-8")).digest())
+        data.append({"object": "embedding", "index": index, "embedding": [rng.gauss(0, 1) for _ in range(dim)]})
+    return {
+        "object": "list",
+        "data": data,
+        "model": body.get("model", "fake"),
+        "usage": {"prompt_tokens": 0, "total_tokens": 0},
+    }
+
+
+@app.post("/_config")
+async def update_config(changes: dict[str, Any]) -> dict[str, Any]:
+    for name, value in changes.items():
+        if not hasattr(config, name):
+            return JSONResponse({"detail": f"Unknown setting: {name}"}, status_code=400)
+        setattr(config, name, value)
+    return asdict(config)
+
+
+@app.get("/_stats")
+async def stats() -> dict[str, Any]:
+    return {**counters, "config": asdict(config)}
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    for name, default in asdict(FakeConfig()).items():
+        kind = int if isinstance(default, int) else float
+        parser.add_argument(f"--{name.replace('_', '-')}", type=kind, default=default)
+    args = parser.parse_args()
+    for name in asdict(config):
+        setattr(config, name, getattr(args, name))
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,518 @@
+"""A local, in-memory stand-in for Supabase's PostgREST API, with injectable latency and failures.
+
+Serves ``/rest/v1/{table}`` (select with filters, ordering, limit/offset and
+exact counts; insert, upsert, update and delete) for the tables the backend
+uses, with the column defaults, primary keys and ``updated_at`` triggers of
+``backend/migrations``. RPCs answer null. It can be seeded with synthetic users
+who each have a year of journal entries and a handful of goals, so the backend
+can be driven without a Supabase project:
+
+    python -m backend.benchmarks.fake_postgrest --port 9200 --delay 0.005 --users 20 --entries 365
+    SUPABASE_URL=http://127.0.0.1:9200 SUPABASE_ANON_KEY=fake uvicorn backend.main:app
+
+Seeded data is deterministic for a given ``--seed``. ``GET /_users`` lists the
+seeded users with their entry and goal ids. Behaviour can be changed while it
+runs with ``POST /_config`` (same fields as the latency flags, as JSON) and
+counters are at ``GET /_stats``. Only the PostgREST features the backend uses
+are implemented; anything else is answered with 400 so gaps are noticed.
+"""
+
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import re
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+
+@dataclass
+class FakeConfig:
+    """How the fake responds: latency in seconds and failure injection."""
+
+    delay: float = 0.005  # per request, before answering
+    jitter: float = 0.0  # uniform extra latency in [0, jitter)
+    tail_rate: float = 0.0  # fraction of requests that take tail_delay instead
+    tail_delay: float = 1.0
+    error_rate: float = 0.0  # fraction of requests answered with error_status
+    error_status: int = 503
+
+
+config = FakeConfig()
+counters = {"requests": 0, "errors": 0, "in_flight": 0, "max_in_flight": 0, "by_table": {}}
+
+# Primary key of each table (default "id", a generated uuid)
+PRIMARY_KEYS = {"journal_entry_summaries": "entry_id", "user_stats": "user_id"}
+# Columns filled with now() on insert, per table
+NOW_DEFAULTS = {
+    "journal_entries": ("created_at", "updated_at"),
+    "goals": ("created_at", "updated_at"),
+    "analyses": ("created_at",),
+    "journal_entry_summaries": ("updated_at",),
+    "sync_tombstones": ("deleted_at",),
+}
+# Tables whose updated_at a trigger sets on every update
+UPDATED_AT_TRIGGERS = {"journal_entries", "goals"}
+# Tables whose deletes a trigger records in sync_tombstones
+TOMBSTONE_TRIGGERS = {"journal_entries", "goals"}
+
+NAMESPACE = uuid.UUID("5f1b0c4e-2d7a-4c3b-9a55-0b7e6f1d2c88")
+
+
+class Table:
+    """Rows of one table, grouped by user_id so per-user queries skip other users' rows."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.primary_key = PRIMARY_KEYS.get(name, "id")
+        self.by_user: dict[Any, list[dict[str, Any]]] = {}
+        self.identity = itertools.count(1)
+
+    def candidates(self, user_id: str | None) -> list[dict[str, Any]]:
+        if user_id is not None:
+            return list(self.by_user.get(user_id, ()))
+        return [row for rows in self.by_user.values() for row in rows]
+
+    def find(self, row: dict[str, Any], columns: list[str]) -> dict[str, Any] | None:
+        for existing in self.by_user.get(row.get("user_id"), ()):
+            if all(str(existing.get(c)) == str(row.get(c)) for c in columns):
+                return existing
+        return None
+
+    def insert(self, row: dict[str, Any]) -> dict[str, Any]:
+        now = datetime.now(timezone.utc).isoformat()
+        if self.primary_key not in row:
+            row[self.primary_key] = next(self.identity) if self.name == "sync_tombstones" else str(uuid.uuid4())
+        for column in NOW_DEFAULTS.get(self.name, ()):
+            row.setdefault(column, now)
+        if self.name == "analyses":
+            row.setdefault("status", "queued")
+        self.by_user.setdefault(row.get("user_id"), []).append(row)
+        return row
+
+    def remove(self, row: dict[str, Any]) -> None:
+        self.by_user[row.get("user_id")].remove(row)
+
+
+tables: dict[str, Table] = {}
+
+
+def table(name: str) -> Table:
+    if name not in tables:
+        tables[name] = Table(name)
+    return tables[name]
+
+
+class Unsupported(Exception):
+    """A PostgREST feature this fake does not implement."""
+
+
+# --- Synthetic data -----------------------------------------------------------
+
+SENTENCES = [
+    "Slept badly and woke up before the alarm.",
+    "Work was busy, back-to-back meetings until late afternoon.",
+    "Went for a long walk in the park after dinner.",
+    "Felt anxious about the deadline on Friday.",
+    "Had a good conversation with my sister on the phone.",
+    "I keep putting off the things I said I would do.",
+    "The weather was grey and I stayed inside most of the day.",
+    "Cooked a proper meal for once instead of ordering in.",
+    "Noticed I was snapping at people when I was tired.",
+    "Meditated for ten minutes in the morning and it helped.",
+    "Spent too long scrolling on my phone before bed.",
+    "Finished the chapter I had been stuck on for a week.",
+    "My manager gave positive feedback on the project.",
+    "Felt lonely in the evening and did not reach out to anyone.",
+    "Went to the gym and felt much calmer afterwards.",
+    "Argued with my partner about chores, we made up later.",
+    "Headache most of the afternoon, probably not enough water.",
+    "Grateful for a quiet Sunday with nothing planned.",
+    "Thinking a lot about whether this job is right for me.",
+    "Tried the breathing exercise when I felt overwhelmed.",
+    "Saw friends for coffee and laughed more than I have in weeks.",
+    "Could not focus, kept jumping between tasks.",
+    "Went to bed early and felt rested in the morning.",
+    "Worried about money after looking at the bills.",
+]
+
+GOALS = [
+    ("Sleep eight hours", "In bed by 11pm on weeknights, no phone in the bedroom."),
+    ("Exercise three times a week", "Gym or a run on Monday, Wednesday and Saturday."),
+    ("Journal every day", "Even a few lines counts."),
+    ("Call family weekly", "Sunday evening call with my parents."),
+    ("Read more", "One book a month, twenty minutes before bed."),
+    ("Cut down on caffeine", "No coffee after 2pm."),
+    ("Meditate", "Ten minutes every morning with the app."),
+    ("Save for a holiday", "Put aside a fixed amount on payday."),
+]
+
+GOAL_STATUSES = ["active", "active", "active", "paused", "completed"]
+
+
+def seeded_user_id(n: int) -> str:
+    return str(uuid.uuid5(NAMESPACE, f"user-{n}"))
+
+
+def seed(users: int, entries: int, goals: int, seed: int = 0) -> None:
+    """Replace all data with users synthetic users, each with entries daily entries and goals goals.
+
+    Entries are one per day going back from 2025-06-30 at a random time of day,
+    4 to 30 sentences long; about one in ten was edited later.
+    """
+    tables.clear()
+    rng = random.Random(seed)
+    end = datetime(2025, 6, 30, tzinfo=timezone.utc)
+    for n in range(users):
+        user_id = seeded_user_id(n)
+        for day in range(entries):
+            created = end - timedelta(
+                days=entries - 1 - day,
+                seconds=rng.randrange(6 * 3600, 24 * 3600),
+                microseconds=rng.randrange(1, 1_000_000),
+            )
+            updated = created + timedelta(hours=rng.randrange(1, 48)) if rng.random() < 0.1 else created
+            table("journal_entries").insert({
+                "id": str(uuid.uuid5(NAMESPACE, f"entry-{n}-{day}")),
+                "user_id": user_id,
+                "content": " ".join(rng.choices(SENTENCES, k=rng.randint(4, 30))),
+                "created_at": created.isoformat(),
+                "updated_at": updated.isoformat(),
+            })
+        for index, (title, body) in enumerate(rng.sample(GOALS, min(goals, len(GOALS)))):
+            created = end - timedelta(days=rng.randrange(max(entries, 1)), microseconds=rng.randrange(1, 1_000_000))
+            table("goals").insert({
+                "id": str(uuid.uuid5(NAMESPACE, f"goal-{n}-{index}")),
+                "user_id": user_id,
+                "title": title,
+                "status": rng.choice(GOAL_STATUSES),
+                "body_text": body,
+                "created_at": created.isoformat(),
+                "updated_at": created.isoformat(),
+            })
+
+
+# --- Query parsing --------------------------------------------------------------
+
+RESERVED_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+
+
+def split_top_level(text: str) -> list[str]:
+    """Split on commas outside parentheses and double quotes."""
+    parts, depth, quoted, current = [], 0, False, ""
+    for char in text:
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        if char == "," and depth == 0 and not quoted:
+            parts.append(current)
+            current = ""
+        else:
+            current += char
+    parts.append(current)
+    return parts
+
+
+def unquote(value: str) -> str:
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return value[1:-1].replace('\\"', '"').replace("\\\\", "\\")
+    return value
+
+
+def like_pattern(pattern: str) -> re.Pattern:
+    """Regex for a LIKE pattern (% or * for any run, _ for one character, backslash escapes)."""
+    out, chars = [], iter(pattern)
+    for char in chars:
+        if char == "\\":
+            out.append(re.escape(next(chars, "\\")))
+        elif char in "%*":
+            out.append(".*")
+        elif char == "_":
+            out.append(".")
+        else:
+            out.append(re.escape(char))
+    return re.compile("".join(out), re.IGNORECASE | re.DOTALL)
+
+
+def condition(column: str, expression: str):
+    """Predicate for ``column=op.value`` (op may be prefixed with ``not.``)."""
+    negate = expression.startswith("not.")
+    if negate:
+        expression = expression[4:]
+    op, _, raw = expression.partition(".")
+
+    if op == "in":
+        values = {unquote(v) for v in split_top_level(raw.strip("()"))}
+        test = lambda v: v is not None and str(v) in values
+    elif op == "is":
+        target = {"null": None, "true": True, "false": False}[raw.lower()]
+        test = lambda v: v is target
+    elif op in ("like", "ilike"):
+        pattern = like_pattern(unquote(raw))
+        if op == "like":
+            pattern = re.compile(pattern.pattern, re.DOTALL)
+        test = lambda v: v is not None and pattern.fullmatch(str(v)) is not None
+    elif op in ("eq", "neq", "gt", "gte", "lt", "lte"):
+        value = unquote(raw)
+        compare = {
+            "eq": lambda a: a == value,
+            "neq": lambda a: a != value,
+            "gt": lambda a: a > value,
+            "gte": lambda a: a >= value,
+            "lt": lambda a: a < value,
+            "lte": lambda a: a <= value,
+        }[op]
+        # NULL compares as unknown: never matches, negated or not
+        return lambda row: row.get(column) is not None and compare(scalar(row.get(column))) != negate
+    else:
+        raise Unsupported(f"Unsupported operator: {op}")
+
+    return lambda row: test(row.get(column)) != negate
+
+
+def scalar(value: Any) -> str:
+    if isinstance(value, bool):
+        return str(value).lower()
+    return str(value)
+
+
+def logical(expression: str, any_of: bool):
+    """Predicate for an ``or=(...)`` / ``and=(...)`` group."""
+    predicates = []
+    for part in split_top_level(expression.strip()[1:-1]):
+        if part.startswith(("and(", "or(")):
+            name, _, inner = part.partition("(")
+            predicates.append(logical("(" + inner, name == "or"))
+        else:
+            column, _, rest = part.partition(".")
+            predicates.append(condition(column, rest))
+    if any_of:
+        return lambda row: any(p(row) for p in predicates)
+    return lambda row: all(p(row) for p in predicates)
+
+
+def parse_filters(request: Request) -> tuple[list, str | None]:
+    """Row predicates from the query string, and the user_id it filters on (if any)."""
+    predicates, user_id = [], None
+    for key, value in request.query_params.multi_items():
+        if key in RESERVED_PARAMS:
+            continue
+        if key in ("or", "and"):
+            predicates.append(logical(value, key == "or"))
+            continue
+        if key == "user_id" and value.startswith("eq."):
+            user_id = unquote(value[3:])
+        predicates.append(condition(key, value))
+    return predicates, user_id
+
+
+def project(row: dict[str, Any], select: str | None) -> dict[str, Any]:
+    if not select or select.strip() == "*":
+        return dict(row)
+    columns = [c.strip() for c in select.split(",") if c.strip()]
+    if any("(" in c or ":" in c for c in columns):
+        raise Unsupported(f"Unsupported select: {select}")
+    return {c: row.get(c) for c in columns}
+
+
+def sort_rows(rows: list[dict[str, Any]], order: str | None) -> None:
+    if not order:
+        return
+    # Stable sorts applied last key first give the combined ordering
+    for term in reversed(order.split(",")):
+        column, *modifiers = term.strip().split(".")
+        descending = "desc" in modifiers
+        nulls_first = "nullsfirst" in modifiers if ("nullsfirst" in modifiers or "nullslast" in modifiers) else descending
+        present = [r for r in rows if r.get(column) is not None]
+        missing = [r for r in rows if r.get(column) is None]
+        present.sort(key=lambda r: sort_key(r[column]), reverse=descending)
+        rows[:] = missing + present if nulls_first else present + missing
+
+
+def sort_key(value: Any) -> Any:
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else str(value)
+
+
+# --- Server ---------------------------------------------------------------------
+
+app = FastAPI(title="Fake PostgREST")
+
+
+def error_response(status: int, message: str, code: str = "FAKE") -> JSONResponse:
+    return JSONResponse({"code": code, "message": message, "details": None, "hint": None}, status_code=status)
+
+
+async def simulate(name: str) -> JSONResponse | None:
+    """Wait out the configured latency; return an error response if one is injected."""
+    counters["requests"] += 1
+    counters["by_table"][name] = counters["by_table"].get(name, 0) + 1
+    delay = config.tail_delay if random.random() < config.tail_rate else config.delay
+    await asyncio.sleep(delay + random.uniform(0, config.jitter))
+    if random.random() < config.error_rate:
+        counters["errors"] += 1
+        return error_response(config.error_status, "Injected failure")
+    return None
+
+
+@app.middleware("http")
+async def track_in_flight(request: Request, call_next):
+    counters["in_flight"] += 1
+    counters["max_in_flight"] = max(counters["max_in_flight"], counters["in_flight"])
+    try:
+        return await call_next(request)
+    finally:
+        counters["in_flight"] -= 1
+
+
+def prefers(request: Request, token: str) -> bool:
+    return token in request.headers.get("prefer", "")
+
+
+def rows_response(request: Request, rows: list[dict[str, Any]], status: int = 200, total: int | None = None) -> Response:
+    """Rows as PostgREST returns them: an array, one object (406 unless exactly one), or nothing."""
+    headers = {}
+    if total is not None:
+        headers["content-range"] = f"0-{len(rows) - 1}/{total}" if rows else f"*/{total}"
+    if request.method == "HEAD":
+        return Response(status_code=status, headers=headers)
+    if request.method != "GET" and not prefers(request, "return=representation"):
+        return Response(status_code=204 if status == 200 else status, headers=headers)
+    if "vnd.pgrst.object" in request.headers.get("accept", ""):
+        if len(rows) != 1:
+            return error_response(406, f"JSON object requested, multiple (or no) rows returned ({len(rows)})", "PGRST116")
+        return JSONResponse(rows[0], status_code=status, headers=headers)
+    return JSONResponse(rows, status_code=status, headers=headers)
+
+
+@app.api_route("/rest/v1/{name}", methods=["GET", "HEAD", "POST", "PATCH", "DELETE"])
+async def rest(name: str, request: Request) -> Response:
+    error = await simulate(name)
+    if error is not None:
+        return error
+    try:
+        if request.method in ("GET", "HEAD"):
+            return select_rows(name, request)
+        if request.method == "POST":
+            return await insert_rows(name, request)
+        return await modify_rows(name, request)
+    except Unsupported as e:
+        return error_response(400, str(e), "PGRST100")
+
+
+def select_rows(name: str, request: Request) -> Response:
+    params = request.query_params
+    predicates, user_id = parse_filters(request)
+    rows = [row for row in table(name).candidates(user_id) if all(p(row) for p in predicates)]
+    sort_rows(rows, params.get("order"))
+    total = len(rows) if prefers(request, "count=") else None
+    offset = int(params.get("offset", 0))
+    rows = rows[offset : offset + int(params["limit"])] if "limit" in params else rows[offset:]
+    return rows_response(request, [project(row, params.get("select")) for row in rows], total=total)
+
+
+async def insert_rows(name: str, request: Request) -> Response:
+    body = await request.json()
+    target = table(name)
+    payloads = body if isinstance(body, list) else [body]
+    upsert = prefers(request, "resolution=merge-duplicates")
+    conflict_columns = (request.query_params.get("on_conflict") or target.primary_key).split(",")
+    written = []
+    for payload in payloads:
+        existing = target.find(payload, conflict_columns) if upsert else None
+        if existing is not None:
+            existing.update(payload)
+            written.append(existing)
+        elif target.primary_key in payload and target.find(payload, [target.primary_key]) is not None:
+            return error_response(409, "duplicate key value violates unique constraint", "23505")
+        else:
+            written.append(target.insert(dict(payload)))
+    select = request.query_params.get("select")
+    return rows_response(request, [project(row, select) for row in written], status=201)
+
+
+async def modify_rows(name: str, request: Request) -> Response:
+    predicates, user_id = parse_filters(request)
+    target = table(name)
+    rows = [row for row in target.candidates(user_id) if all(p(row) for p in predicates)]
+    if request.method == "PATCH":
+        changes = await request.json()
+        now = datetime.now(timezone.utc).isoformat()
+        for row in rows:
+            row.update(changes)
+            if name in UPDATED_AT_TRIGGERS:
+                row["updated_at"] = now
+    else:
+        for row in rows:
+            target.remove(row)
+            if name in TOMBSTONE_TRIGGERS:
+                table("sync_tombstones").insert({"user_id": row.get("user_id"), "table_name": name, "record_id": row["id"]})
+    select = request.query_params.get("select")
+    return rows_response(request, [project(row, select) for row in rows])
+
+
+@app.post("/rest/v1/rpc/{function}")
+async def rpc(function: str) -> Response:
+    error = await simulate(f"rpc/{function}")
+    if error is not None:
+        return error
+    return JSONResponse(None)
+
+
+@app.get("/_users")
+async def users() -> dict[str, dict[str, list[str]]]:
+    """Each user's entry and goal ids, oldest first."""
+    result: dict[str, dict[str, list[str]]] = {}
+    for name, key in (("journal_entries", "entries"), ("goals", "goals")):
+        for user_id, rows in table(name).by_user.items():
+            ordered = sorted(rows, key=lambda r: str(r.get("created_at")))
+            result.setdefault(user_id, {"entries": [], "goals": []})[key] = [row["id"] for row in ordered]
+    return result
+
+
+@app.post("/_config")
+async def update_config(changes: dict[str, Any]) -> dict[str, Any]:
+    for name, value in changes.items():
+        if not hasattr(config, name):
+            return JSONResponse({"detail": f"Unknown setting: {name}"}, status_code=400)
+        setattr(config, name, value)
+    return asdict(config)
+
+
+@app.get("/_stats")
+async def stats() -> dict[str, Any]:
+    rows = {name: sum(len(r) for r in t.by_user.values()) for name, t in tables.items()}
+    return {**counters, "rows": rows, "config": asdict(config)}
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9200)
+    parser.add_argument("--users", type=int, default=0, help="synthetic users to seed")
+    parser.add_argument("--entries", type=int, default=365, help="journal entries per seeded user")
+    parser.add_argument("--goals", type=int, default=5, help="goals per seeded user")
+    parser.add_argument("--seed", type=int, default=0)
+    for name, default in asdict(FakeConfig()).items():
+        kind = int if isinstance(default, int) else float
+        parser.add_argument(f"--{name.replace('_', '-')}", type=kind, default=default)
+    args = parser.parse_args()
+    for name in asdict(config):
+        setattr(config, name, getattr(args, name))
+    seed(args.users, args.entries, args.goals, args.seed)
+    print(json.dumps({"seeded_users": args.users, "entries_per_user": args.entries}), flush=True)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Micro-benchmark: keyword search latency against a per-user inverted index.
+
+Indexes synthetic entries and times BM25 queries (ranking, snippets and
+highlights included) for single words, multi-word queries, rare words and
+quoted phrases. Run from the repo root:
+
+    python -m backend.benchmarks.keyword_search [entries] [queries]
+"""
+
+import os
+import random
+import sys
+import time
+
+# dependencies.py builds its clients at import time; give it harmless settings
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:54321")
+os.environ.setdefault("SUPABASE_ANON_KEY", "benchmark")
+os.environ.setdefault("SUPABASE_JWT_SECRET", "benchmark-secret")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+try:
+    from backend.fulltext_index import ParsedQuery, UserTextIndex
+except ModuleNotFoundError:
+    from fulltext_index import ParsedQuery, UserTextIndex
+
+COMMON = (
+    "i the and to a was my of it in that today felt so but with for me about "
+    "work sleep tired anxious calm meeting friend family walk rain happy sad"
+).split()
+RARE = [f"word{n}" for n in range(5000)]
+
+QUERIES = {
+    "common word": "felt",
+    "two words": "tired work",
+    "rare word": "word123",
+    "phrase": '"felt so tired"',
+}
+
+
+def make_entry(rng: random.Random) -> str:
+    words = [rng.choice(COMMON) if rng.random() < 0.9 else rng.choice(RARE) for _ in range(rng.randint(60, 250))]
+    return " ".join(words).capitalize() + "."
+
+
+def main() -> None:
+    entries = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    queries = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    rng = random.Random(0)
+
+    index = UserTextIndex()
+    start = time.perf_counter()
+    for n in range(entries):
+        index.add(f"00000000-0000-0000-0000-{n:012d}", "2025-01-01T00:00:00+00:00", make_entry(rng))
+    build = time.perf_counter() - start
+    print(f"entries: {entries}  terms: {len(index.postings)}  build: {build:.2f} s")
+
+    for label, text in QUERIES.items():
+        query = ParsedQuery.parse(text)
+        timings = []
+        for _ in range(queries):
+            start = time.perf_counter()
+            hits, total, _ = index.search(query, 20)
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        print(
+            f"{label:12} matches: {total:6}  p50: {timings[len(timings) // 2] * 1e3:6.2f} ms"
+            f"  p95: {timings[int(len(timings) * 0.95)] * 1e3:6.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
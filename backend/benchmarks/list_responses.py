@@ -0,0 +1,96 @@
+"""Micro-benchmark: cost and size of a journal entry list response.
+
+Times one page of entries through the previous path (per-row timestamp
+rewriting, pydantic validation and serialization, json.dumps), through
+RenderedJSON (column-level normalization, direct orjson/json rendering plus the
+ETag), and a revalidation that ends in a 304. Also prints the body size raw,
+gzipped and brotli-compressed. Run from the repo root:
+
+    python -m backend.benchmarks.list_responses [entries] [iterations]
+"""
+
+import gzip
+import json
+import sys
+import time
+import uuid
+
+from pydantic import TypeAdapter
+from starlette.requests import Request
+
+try:
+    from backend import responses
+    from backend.responses import RenderedJSON, conditional_response, normalize_timestamps
+    from backend.schemas import JournalEntryPage
+except ModuleNotFoundError:
+    import responses
+    from responses import RenderedJSON, conditional_response, normalize_timestamps
+    from schemas import JournalEntryPage
+
+
+def make_rows(count: int) -> list[dict]:
+    user_id = str(uuid.uuid4())
+    return [
+        {
+            "id": str(uuid.UUID(int=n)),
+            "user_id": user_id,
+            "content": f"Entry {n}: slept badly, long day at work, walked for an hour in the evening. " * 4,
+            "created_at": f"2025-{1 + n % 12:02d}-{1 + n % 28:02d}T08:{n % 60:02d}:00.{n:06d}+00:00",
+            "updated_at": f"2025-{1 + n % 12:02d}-{1 + n % 28:02d}T09:{n % 60:02d}:00.{n:06d}+00:00",
+        }
+        for n in range(count)
+    ]
+
+
+def old_format(entry: dict) -> dict:
+    for field in ["created_at", "updated_at"]:
+        if field in entry and entry[field]:
+            ts = str(entry[field])
+            if " " in ts and "T" not in ts:
+                ts = ts.replace(" ", "T")
+            if ts.endswith("+00"):
+                ts = ts + ":00"
+            entry[field] = ts
+    return entry
+
+
+def timed(label: str, iterations: int, fn) -> None:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    print(f"{label:<34}{(time.perf_counter() - start) / iterations * 1e6:10.1f} us")
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    rows = make_rows(count)
+    adapter = TypeAdapter(JournalEntryPage)
+
+    def previous() -> bytes:
+        page = [old_format(dict(row)) for row in rows]
+        model = adapter.validate_python({"entries": page, "next_cursor": None})
+        content = adapter.dump_python(model, mode="json", exclude_unset=True)
+        return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+    def rendered() -> RenderedJSON:
+        page = normalize_timestamps([dict(row) for row in rows])
+        return RenderedJSON.of_rows({"entries": page, "next_cursor": None}, page)
+
+    cached = rendered()
+    request = Request({"type": "http", "method": "GET", "headers": [(b"if-none-match", cached.etag.encode())]})
+
+    print(f"{count} entries, orjson {'on' if responses.orjson else 'off'}, brotli {'on' if responses.brotli else 'off'}")
+    timed("pydantic + json.dumps (previous)", iterations, previous)
+    timed("RenderedJSON (cache miss)", iterations, rendered)
+    timed("304 from cached ETag (cache hit)", iterations, lambda: conditional_response(request, cached))
+
+    body = previous()
+    print(f"body: {len(body)} B raw, {len(gzip.compress(body, 6))} B gzip", end="")
+    if responses.brotli is not None:
+        print(f", {len(responses.brotli.compress(body, quality=4))} B brotli", end="")
+    print(", 0 B on 304")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,455 @@
+"""Load test: drive backend.main:app against local PostgREST and OpenAI stand-ins.
+
+Starts fake_postgrest (seeded with synthetic users, each with a year of entries
+and a few goals), fake_openai and the app itself as subprocesses on free local
+ports, then runs each scenario at rising concurrency (closed loop: every
+simulated client sends its next request as soon as the previous one returns).
+Per scenario and concurrency level it reports p50/p95/p99 latency, throughput,
+errors, database and LLM calls per request, and the app's resident memory. Runs
+are reproducible: the seeded data and every request's user and target depend
+only on --seed. Run from the repo root:
+
+    python -m backend.benchmarks.load_test --save baseline.json
+    python -m backend.benchmarks.load_test --compare baseline.json
+
+--compare exits with status 1 when a p95/p99 latency or the throughput of any
+scenario got worse than the baseline by more than --tolerance. Baselines are
+only comparable on the same machine with the same options (they are recorded
+in the file and a mismatch is reported). Use --app-env NAME=VALUE to run the app
+with other settings, e.g. ANALYSIS_CACHE_TTL_SECONDS=0 to send every check-in
+to the model instead of mostly hitting the analysis cache.
+"""
+
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+import numpy as np
+from jose import jwt
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+JWT_SECRET = "load-test-secret"
+
+
+@dataclass
+class SeededUser:
+    id: str
+    token: str
+    entries: list[str]
+    goals: list[str]
+
+
+@dataclass
+class Scenario:
+    """One kind of request; path and body pick a user's data with the run's seeded random."""
+
+    method: str
+    path: Callable[[SeededUser, random.Random], str]
+    body: Callable[[SeededUser, random.Random], dict[str, Any]] | None = None
+    stream: bool = False
+
+
+def entry_text(rng: random.Random) -> str:
+    return " ".join(rng.choices(["Busy day at work.", "Slept well.", "Felt anxious.", "Long walk.", "Saw friends."], k=12))
+
+
+SCENARIOS: dict[str, Scenario] = {
+    "journal_list": Scenario("GET", lambda u, r: "/api/get_journal_entries?limit=50"),
+    "journal_get": Scenario("GET", lambda u, r: f"/api/get_journal_entry/{r.choice(u.entries)}"),
+    "journal_create": Scenario(
+        "POST", lambda u, r: "/api/post_journal_entry", lambda u, r: {"content": entry_text(r)}
+    ),
+    "journal_update": Scenario(
+        "PUT",
+        lambda u, r: "/api/update_journal_entry",
+        lambda u, r: {"journal_entry_id": r.choice(u.entries), "content": entry_text(r)},
+    ),
+    "goals_list": Scenario("GET", lambda u, r: "/api/get_goals"),
+    "goal_get": Scenario("GET", lambda u, r: f"/api/get_goal/{r.choice(u.goals)}"),
+    "goal_create": Scenario(
+        "POST",
+        lambda u, r: "/api/post_goal",
+        lambda u, r: {"title": f"Goal {r.randrange(1000)}", "status": "active", "body_text": entry_text(r)},
+    ),
+    "checkin_7days": Scenario("GET", lambda u, r: "/api/inference/mental-health-checkin/7days"),
+    "checkin_14days_stream": Scenario(
+        "GET", lambda u, r: "/api/inference/mental-health-checkin/14days/stream", stream=True
+    ),
+}
+
+
+@dataclass
+class LevelResult:
+    """Outcome of one scenario at one concurrency level (latencies in milliseconds)."""
+
+    scenario: str
+    concurrency: int
+    requests: int
+    errors: int
+    rps: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+    ttfb_p50_ms: float | None
+    db_per_request: float
+    llm_per_request: float
+    rss_mb: float | None
+    rss_delta_mb: float | None
+    statuses: dict[str, int] = field(default_factory=dict)
+
+
+# --- Processes ------------------------------------------------------------------
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def rss_mb(pid: int) -> float | None:
+    """Resident memory of a process in MiB (Linux; None elsewhere)."""
+    try:
+        for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+class Services:
+    """The two stand-ins and the app, started in a scratch directory and stopped on exit."""
+
+    def __init__(self, args: argparse.Namespace, workdir: Path):
+        self.args = args
+        self.workdir = workdir
+        self.processes: list[subprocess.Popen] = []
+        self.db_url = f"http://127.0.0.1:{free_port()}"
+        self.llm_url = f"http://127.0.0.1:{free_port()}"
+        self.app_url = f"http://127.0.0.1:{free_port()}"
+        self.app: subprocess.Popen | None = None
+
+    def _start(self, name: str, command: list[str], env: dict[str, str]) -> subprocess.Popen:
+        log = open(self.workdir / f"{name}.log", "w")
+        process = subprocess.Popen(command, cwd=self.workdir, env=env, stdout=log, stderr=subprocess.STDOUT)
+        self.processes.append(process)
+        return process
+
+    def start(self) -> None:
+        args = self.args
+        env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [str(REPO_ROOT), os.getenv("PYTHONPATH")]))}
+        python = [sys.executable, "-m"]
+        self._start("fake_postgrest", python + [
+            "backend.benchmarks.fake_postgrest", "--port", self.db_url.rsplit(":", 1)[1],
+            "--users", str(args.users), "--entries", str(args.entries), "--goals", str(args.goals),
+            "--seed", str(args.seed), "--delay", str(args.db_delay), "--jitter", str(args.db_jitter),
+            "--error-rate", str(args.db_error_rate),
+        ], env)
+        self._start("fake_openai", python + [
+            "backend.benchmarks.fake_openai", "--port", self.llm_url.rsplit(":", 1)[1],
+            "--delay", str(args.llm_delay), "--jitter", str(args.llm_jitter), "--error-rate", str(args.llm_error_rate),
+            "--stream-chunks", str(args.stream_chunks), "--chunk-delay", str(args.chunk_delay),
+        ], env)
+        app_env = {
+            **env,
+            "SUPABASE_URL": self.db_url,
+            "SUPABASE_ANON_KEY": "load-test",
+            "SUPABASE_JWT_SECRET": JWT_SECRET,
+            "OPENAI_API_KEY": "load-test",
+            "OPENAI_BASE_URL": f"{self.llm_url}/v1",
+            "VECTOR_INDEX_DIR": str(self.workdir / "vector_index"),
+            "READ_CACHE_VERSIONS_PATH": str(self.workdir / "read_cache_versions.sqlite3"),
+            "ANALYSIS_CACHE_PATH": str(self.workdir / "analysis_cache.sqlite3"),
+        }
+        for setting in args.app_env:
+            name, _, value = setting.partition("=")
+            app_env[name] = value
+        self.app = self._start("app", python + [
+            "uvicorn", "backend.main:app", "--host", "127.0.0.1", "--port", self.app_url.rsplit(":", 1)[1],
+            "--log-level", "warning", "--no-access-log",
+        ], app_env)
+
+    async def wait_ready(self, timeout: float = 60.0) -> None:
+        deadline = time.monotonic() + timeout
+        async with httpx.AsyncClient() as client:
+            for url in (f"{self.db_url}/_stats", f"{self.llm_url}/_stats", f"{self.app_url}/"):
+                while True:
+                    for process in self.processes:
+                        if process.poll() is not None:
+                            raise RuntimeError(f"{process.args[2]} exited; see the logs in {self.workdir}")
+                    try:
+                        if (await client.get(url)).status_code == 200:
+                            break
+                    except httpx.TransportError:
+                        pass
+                    if time.monotonic() > deadline:
+                        raise RuntimeError(f"{url} did not come up within {timeout}s")
+                    await asyncio.sleep(0.2)
+
+    def stop(self) -> None:
+        for process in self.processes:
+            process.terminate()
+        for process in self.processes:
+            try:
+                process.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+# --- Running scenarios ----------------------------------------------------------
+
+
+async def load_users(services: Services) -> list[SeededUser]:
+    async with httpx.AsyncClient() as client:
+        seeded = (await client.get(f"{services.db_url}/_users")).json()
+    expires = int(time.time()) + 24 * 3600
+    users = []
+    for n, (user_id, ids) in enumerate(sorted(seeded.items())):
+        claims = {"sub": user_id, "email": f"user{n}@example.com", "aud": "authenticated", "exp": expires}
+        users.append(SeededUser(user_id, jwt.encode(claims, JWT_SECRET, algorithm="HS256"), ids["entries"], ids["goals"]))
+    return users
+
+
+async def upstream_calls(client: httpx.AsyncClient, services: Services) -> tuple[int, int]:
+    """Requests the app has sent to the database and LLM stand-ins so far."""
+    db = (await client.get(f"{services.db_url}/_stats")).json()["requests"]
+    llm = (await client.get(f"{services.llm_url}/_stats")).json()["requests"]
+    return db, llm
+
+
+async def wait_for_background_jobs(client: httpx.AsyncClient, services: Services, timeout: float = 60.0) -> None:
+    """Let summaries and embeddings queued by the previous scenario finish before measuring the next."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        metrics = (await client.get(f"{services.app_url}/metrics")).text
+        busy = sum(float(line.rsplit(" ", 1)[1]) for line in metrics.splitlines() if line.startswith("job_queue_jobs{"))
+        if busy == 0:
+            return
+        await asyncio.sleep(0.1)
+
+
+async def send(client: httpx.AsyncClient, scenario: Scenario, user: SeededUser, rng: random.Random) -> tuple[int, float, float]:
+    """(status, seconds to the first body byte, seconds to the end of the body) of one request."""
+    headers = {"Authorization": f"Bearer {user.token}", "Accept-Encoding": "gzip, br"}
+    body = scenario.body(user, rng) if scenario.body else None
+    start = time.perf_counter()
+    async with client.stream(scenario.method, scenario.path(user, rng), json=body, headers=headers) as response:
+        first = None
+        async for _ in response.aiter_raw():
+            if first is None:
+                first = time.perf_counter() - start
+        end = time.perf_counter() - start
+    return response.status_code, first if first is not None else end, end
+
+
+async def run_level(
+    client: httpx.AsyncClient,
+    services: Services,
+    users: list[SeededUser],
+    name: str,
+    concurrency: int,
+    requests: int,
+    seed: int,
+) -> LevelResult:
+    """Send requests of one scenario from concurrency clients and summarize them."""
+    scenario = SCENARIOS[name]
+    rng = random.Random(f"{seed}:{name}:{concurrency}")
+    # Fix every request's user up front so the sequence does not depend on timing
+    plan = [(rng.choice(users), random.Random(rng.random())) for _ in range(requests)]
+    latencies: list[float] = []
+    first_bytes: list[float] = []
+    statuses: dict[str, int] = {}
+
+    async def client_loop() -> None:
+        while plan:
+            user, request_rng = plan.pop()
+            try:
+                status, first, total = await send(client, scenario, user, request_rng)
+                latencies.append(total)
+                first_bytes.append(first)
+                key = str(status)
+            except httpx.HTTPError as e:
+                key = type(e).__name__
+            statuses[key] = statuses.get(key, 0) + 1
+
+    db_before, llm_before = await upstream_calls(client, services)
+    rss_before = rss_mb(services.app.pid)
+    start = time.perf_counter()
+    await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    db_after, llm_after = await upstream_calls(client, services)
+    rss_after = rss_mb(services.app.pid)
+
+    ms = np.array(latencies) * 1000 if latencies else np.array([np.nan])
+    errors = sum(count for key, count in statuses.items() if not (key.isdigit() and int(key) < 400))
+    return LevelResult(
+        scenario=name,
+        concurrency=concurrency,
+        requests=requests,
+        errors=errors,
+        rps=round(requests / elapsed, 1),
+        p50_ms=round(float(np.percentile(ms, 50)), 2),
+        p95_ms=round(float(np.percentile(ms, 95)), 2),
+        p99_ms=round(float(np.percentile(ms, 99)), 2),
+        max_ms=round(float(ms.max()), 2),
+        ttfb_p50_ms=round(float(np.percentile(first_bytes, 50)) * 1000, 2) if scenario.stream and first_bytes else None,
+        db_per_request=round((db_after - db_before) / requests, 2),
+        llm_per_request=round((llm_after - llm_before) / requests, 2),
+        rss_mb=round(rss_after, 1) if rss_after is not None else None,
+        rss_delta_mb=round(rss_after - rss_before, 1) if rss_after is not None and rss_before is not None else None,
+        statuses=statuses,
+    )
+
+
+HEADER = (
+    f"{'scenario':<24}{'conc':>5}{'reqs':>6}{'err':>5}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}"
+    f"{'p99 ms':>9}{'max ms':>9}{'db/req':>8}{'llm/req':>8}{'rss MB':>8}{'+MB':>7}"
+)
+
+
+def format_result(r: LevelResult) -> str:
+    rss = f"{r.rss_mb:8.1f}{r.rss_delta_mb:+7.1f}" if r.rss_mb is not None else f"{'-':>8}{'-':>7}"
+    line = (
+        f"{r.scenario:<24}{r.concurrency:>5}{r.requests:>6}{r.errors:>5}{r.rps:>9.1f}{r.p50_ms:>9.1f}"
+        f"{r.p95_ms:>9.1f}{r.p99_ms:>9.1f}{r.max_ms:>9.1f}{r.db_per_request:>8.2f}{r.llm_per_request:>8.2f}{rss}"
+    )
+    if r.ttfb_p50_ms is not None:
+        line += f"  first byte p50 {r.ttfb_p50_ms:.1f} ms"
+    return line
+
+
+async def run(args: argparse.Namespace) -> list[LevelResult]:
+    results = []
+    with tempfile.TemporaryDirectory(prefix="load-test-") as workdir:
+        services = Services(args, Path(workdir))
+        services.start()
+        try:
+            await services.wait_ready()
+            users = await load_users(services)
+            limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+            timeout = httpx.Timeout(args.timeout)
+            async with httpx.AsyncClient(base_url=services.app_url, limits=limits, timeout=timeout) as client:
+                print(f"{len(users)} users x {args.entries} entries, {args.goals} goals; app pid {services.app.pid}")
+                print(HEADER)
+                for name in args.scenarios:
+                    if args.warmup:
+                        # Another seed, so warm-up does not pre-load exactly what the first level requests
+                        await run_level(client, services, users, name, 1, args.warmup, args.seed - 1)
+                    for concurrency in args.concurrency:
+                        await wait_for_background_jobs(client, services)
+                        result = await run_level(client, services, users, name, concurrency, args.requests, args.seed)
+                        results.append(result)
+                        print(format_result(result), flush=True)
+        finally:
+            services.stop()
+    return results
+
+
+# --- Baselines ------------------------------------------------------------------
+
+# Options that change the workload; baselines recorded with other values are not comparable
+WORKLOAD_OPTIONS = (
+    "users", "entries", "goals", "seed", "requests", "warmup", "db_delay", "db_jitter", "db_error_rate",
+    "llm_delay", "llm_jitter", "llm_error_rate", "stream_chunks", "chunk_delay", "app_env",
+)
+
+
+def save_baseline(path: Path, args: argparse.Namespace, results: list[LevelResult]) -> None:
+    baseline = {
+        "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "machine": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "options": {name: getattr(args, name) for name in WORKLOAD_OPTIONS},
+        "results": [asdict(r) for r in results],
+    }
+    path.write_text(json.dumps(baseline, indent=2) + "\n")
+    print(f"Baseline saved to {path}")
+
+
+def compare_baseline(path: Path, args: argparse.Namespace, results: list[LevelResult]) -> bool:
+    """Print each result against the baseline; True if anything regressed beyond the tolerance."""
+    baseline = json.loads(path.read_text())
+    for name in WORKLOAD_OPTIONS:
+        if baseline["options"].get(name) != getattr(args, name):
+            print(f"warning: baseline has {name}={baseline['options'].get(name)!r}, this run {getattr(args, name)!r}")
+    previous = {(r["scenario"], r["concurrency"]): r for r in baseline["results"]}
+
+    regressed = False
+    print(f"\nAgainst {path} ({baseline['recorded_at']}), tolerance {args.tolerance:.0%}:")
+    print(f"{'scenario':<24}{'conc':>5}{'p95 ms':>18}{'p99 ms':>18}{'req/s':>18}")
+    for r in results:
+        base = previous.get((r.scenario, r.concurrency))
+        if base is None:
+            continue
+        flags = []
+        cells = []
+        for metric, higher_is_worse in (("p95_ms", True), ("p99_ms", True), ("rps", False)):
+            old, new = base[metric], getattr(r, metric)
+            change = (new - old) / old if old else 0.0
+            worse = change > args.tolerance if higher_is_worse else change < -args.tolerance
+            # Sub-millisecond latencies are too noisy to judge by ratio alone
+            if worse and higher_is_worse and new - old < args.min_delta_ms:
+                worse = False
+            if worse:
+                flags.append(metric)
+            cells.append(f"{old:>8.1f}->{new:<8.1f}")
+        if r.errors > base["errors"]:
+            flags.append("errors")
+        regressed = regressed or bool(flags)
+        print(f"{r.scenario:<24}{r.concurrency:>5}{''.join(cells)}  {'REGRESSED: ' + ', '.join(flags) if flags else 'ok'}")
+    return regressed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"comma-separated, from: {', '.join(SCENARIOS)}")
+    parser.add_argument("--concurrency", default="1,4,16,64", help="comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario and level")
+    parser.add_argument("--warmup", type=int, default=5, help="unmeasured requests per scenario")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--entries", type=int, default=365, help="journal entries per user")
+    parser.add_argument("--goals", type=int, default=5, help="goals per user")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--db-delay", type=float, default=0.005, help="seconds per PostgREST request")
+    parser.add_argument("--db-jitter", type=float, default=0.002)
+    parser.add_argument("--db-error-rate", type=float, default=0.0)
+    parser.add_argument("--llm-delay", type=float, default=0.3, help="seconds before an OpenAI response starts")
+    parser.add_argument("--llm-jitter", type=float, default=0.1)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--stream-chunks", type=int, default=20)
+    parser.add_argument("--chunk-delay", type=float, default=0.01)
+    parser.add_argument("--app-env", action="append", default=[], metavar="NAME=VALUE", help="extra app setting (repeatable)")
+    parser.add_argument("--timeout", type=float, default=120.0, help="client timeout per request")
+    parser.add_argument("--save", type=Path, help="write the results as a baseline JSON file")
+    parser.add_argument("--compare", type=Path, help="compare against a baseline JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative worsening")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0, help="ignore latency increases smaller than this")
+    args = parser.parse_args()
+    args.scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+    args.concurrency = [int(level) for level in args.concurrency.split(",")]
+
+    results = asyncio.run(run(args))
+    if args.save:
+        save_baseline(args.save, args, results)
+    if args.compare and compare_baseline(args.compare, args, results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
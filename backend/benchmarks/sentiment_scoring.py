@@ -0,0 +1,53 @@
+"""Micro-benchmark: local sentiment scoring of a year of journal entries.
+
+Scores synthetic entries in one batch (cold: tokenize and score; warm: served
+from the per-text cache) and builds the daily trend. Run from the repo root:
+
+    python -m backend.benchmarks.sentiment_scoring [entries] [words_per_entry]
+"""
+
+import random
+import sys
+import time
+
+try:
+    from backend.sentiment import SentimentScorer, daily_trend
+except ModuleNotFoundError:
+    from sentiment import SentimentScorer, daily_trend
+
+WORDS = (
+    "today i felt really happy but also tired and a bit anxious about work the meeting "
+    "went fine and i was not stressed later walked with a friend grateful calm sad "
+    "frustrated dinner slept overwhelmed proud lonely peaceful deadline"
+).split()
+
+
+def main() -> None:
+    entries = int(sys.argv[1]) if len(sys.argv) > 1 else 730
+    words = int(sys.argv[2]) if len(sys.argv) > 2 else 250
+    rng = random.Random(0)
+    texts = [" ".join(rng.choice(WORDS) for _ in range(words)) for _ in range(entries)]
+    day_index = sorted(rng.randrange(365) for _ in range(entries))
+    days = [str(d) for d in range(365)]
+
+    scorer = SentimentScorer()
+    start = time.perf_counter()
+    scores = scorer.score(texts)
+    cold = time.perf_counter() - start
+
+    start = time.perf_counter()
+    scores = scorer.score(texts)
+    warm = time.perf_counter() - start
+
+    start = time.perf_counter()
+    daily_trend(days, day_index, scores, 7)
+    trend = time.perf_counter() - start
+
+    print(f"entries: {entries}  words/entry: {words}")
+    print(f"score (cold): {cold * 1e3:8.2f} ms")
+    print(f"score (warm): {warm * 1e3:8.2f} ms")
+    print(f"daily trend:  {trend * 1e3:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
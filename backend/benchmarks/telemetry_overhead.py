@@ -0,0 +1,77 @@
+"""Micro-benchmark: per-request cost of TimingMiddleware and spans.
+
+Serves a trivial FastAPI route in process, without and with the middleware (the
+route records three spans), and compares mean request time. Also times a bare
+span() and a histogram observe(). Run from the repo root:
+
+    python -m backend.benchmarks.telemetry_overhead [requests]
+"""
+
+import asyncio
+import sys
+import time
+
+import httpx
+from fastapi import FastAPI
+
+try:
+    from backend.telemetry import TimingMiddleware, metrics, span, stage_seconds
+except ModuleNotFoundError:
+    from telemetry import TimingMiddleware, metrics, span, stage_seconds
+
+
+def make_app(instrumented: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: int) -> dict[str, int]:
+        if instrumented:
+            with span("auth"):
+                pass
+            with span("fetch"):
+                pass
+            with span("format"):
+                pass
+        return {"id": item_id}
+
+    if instrumented:
+        app.add_middleware(TimingMiddleware)
+    return app
+
+
+async def time_requests(app: FastAPI, requests: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for n in range(200):
+            await client.get(f"/items/{n}")
+        start = time.perf_counter()
+        for n in range(requests):
+            await client.get(f"/items/{n}")
+        return (time.perf_counter() - start) / requests
+
+
+def main() -> None:
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+
+    plain = asyncio.run(time_requests(make_app(False), requests))
+    timed = asyncio.run(time_requests(make_app(True), requests))
+    print(f"request without middleware: {plain * 1e6:8.1f} us")
+    print(f"request with middleware:    {timed * 1e6:8.1f} us  (+{(timed - plain) * 1e6:.1f} us)")
+
+    iterations = 200_000
+    start = time.perf_counter()
+    for _ in range(iterations):
+        with span("bench"):
+            pass
+    print(f"span():                     {(time.perf_counter() - start) / iterations * 1e6:8.2f} us")
+    start = time.perf_counter()
+    for _ in range(iterations):
+        stage_seconds.observe(0.0123, "/items/{item_id}", "fetch")
+    print(f"histogram observe():        {(time.perf_counter() - start) / iterations * 1e6:8.2f} us")
+    start = time.perf_counter()
+    text = metrics.render()
+    print(f"render /metrics:            {(time.perf_counter() - start) * 1e3:8.2f} ms  ({len(text)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Micro-benchmark: semantic search latency against a per-user vector index.
+
+Fills a temporary index with synthetic entries (hashing embedder) and times
+queries. Run from the repo root:
+
+    python -m backend.benchmarks.vector_search [entries] [queries]
+"""
+
+from pathlib import Path
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+# dependencies.py builds its clients at import time; give it harmless settings
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:54321")
+os.environ.setdefault("SUPABASE_ANON_KEY", "benchmark")
+os.environ.setdefault("SUPABASE_JWT_SECRET", "benchmark-secret")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+try:
+    from backend.embeddings import HashingEmbedder
+    from backend.vector_index import UserVectorIndex
+except ModuleNotFoundError:
+    from embeddings import HashingEmbedder
+    from vector_index import UserVectorIndex
+
+WORDS = (
+    "slept well tired anxious calm work meeting friend family walk run rain sun "
+    "happy sad angry grateful stressed deadline dinner coffee therapy goal progress "
+    "headache lonely proud nervous weekend call mom dad partner dog park book music"
+).split()
+
+
+def make_text(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(40, 200)))
+
+
+async def main() -> None:
+    entries = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    queries = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    rng = random.Random(0)
+    embedder = HashingEmbedder()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = UserVectorIndex(Path(tmp), embedder.dim, embedder.name)
+        start = time.perf_counter()
+        for batch_start in range(0, entries, 500):
+            count = min(500, entries - batch_start)
+            vectors = await embedder.embed([make_text(rng) for _ in range(count)])
+            index.upsert([f"entry-{batch_start + i}" for i in range(count)], vectors)
+        build = time.perf_counter() - start
+
+        query_vectors = await embedder.embed([make_text(rng)[:200] for _ in range(queries)])
+        timings = []
+        for query in query_vectors:
+            start = time.perf_counter()
+            index.search(query, 10)
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+
+    print(f"entries: {entries}  dim: {embedder.dim}  queries: {queries}")
+    print(f"index build (embed + upsert): {build:.2f} s")
+    print(f"search p50: {timings[len(timings) // 2] * 1e3:.3f} ms  "
+          f"p95: {timings[int(len(timings) * 0.95)] * 1e3:.3f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
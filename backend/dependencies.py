@@ -2,8 +2,10 @@
 
 from fastapi import Header, HTTPException
 from jose import jwt, JWTError
-from supabase import create_client, Client
+from supabase import AsyncClient, AsyncClientOptions
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
 from typing import Any
+import httpx
 import os
 from dotenv import load_dotenv
 
@@ -11,36 +13,100 @@ load_dotenv()
 
 try:
     from backend.schemas import User
+    from backend.token_cache import VerifiedTokenCache
+    from backend.telemetry import TimedTransport, span
 except ModuleNotFoundError:
     from schemas import User
+    from token_cache import VerifiedTokenCache
+    from telemetry import TimedTransport, span
 
 
-# Supabase client (singleton)
-supabase: Client = create_client(
+# Pooled keep-alive HTTP connections shared by every Supabase request.
+# Bounded so a burst of requests queues here instead of opening sockets without limit.
+# Each request is timed as the "supabase" stage (see telemetry.py).
+http_client: httpx.AsyncClient = httpx.AsyncClient(
+    transport=TimedTransport(
+        "supabase",
+        httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(
+                max_connections=int(os.getenv("SUPABASE_MAX_CONNECTIONS", "20")),
+                max_keepalive_connections=int(os.getenv("SUPABASE_MAX_KEEPALIVE", "10")),
+                keepalive_expiry=30.0,
+            ),
+        ),
+    ),
+    timeout=httpx.Timeout(float(os.getenv("SUPABASE_TIMEOUT_SECONDS", "10"))),
+    follow_redirects=True,
+)
+
+# Async Supabase client (singleton). Queries are awaited, so a slow PostgREST
+# round trip no longer blocks the event loop for every other request.
+supabase: AsyncClient = AsyncClient(
     os.getenv("SUPABASE_URL"),
     os.getenv("SUPABASE_ANON_KEY"),
+    options=AsyncClientOptions(httpx_client=http_client),
 )
 
 
+# JWT key material, read once at import instead of on every request
+SUPABASE_JWT_SECRET: str | None = os.getenv("SUPABASE_JWT_SECRET")
+JWT_ALGORITHMS: list[str] = ["HS256"]
+JWT_AUDIENCE: str = "authenticated"
+
+# Verified tokens and the User built from them, kept until each token's exp
+token_cache = VerifiedTokenCache(max_entries=int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "4096")))
+
+
+# OpenAI client (singleton). Retries are left to llm_gateway, which also bounds
+# concurrency and enforces deadlines; call the client through it. Requests are
+# timed as the "openai" stage.
+openai_client: AsyncOpenAI = AsyncOpenAI(
+    api_key=os.getenv("OPENAI_API_KEY"),
+    max_retries=0,
+    http_client=DefaultAsyncHttpxClient(
+        transport=TimedTransport(
+            "openai",
+            httpx.AsyncHTTPTransport(limits=httpx.Limits(max_connections=1000, max_keepalive_connections=100)),
+        ),
+    ),
+)
+
+
+async def close_supabase() -> None:
+    """Close the pooled HTTP connections used by the Supabase client."""
+    await http_client.aclose()
+
+
 async def get_current_user(authorization: str = Header(...)) -> User:
     """
     Dependency that extracts and verifies the Bearer token from the Authorization header.
     Returns a User object with id, email, and token.
+
+    A token whose signature already verified is served from token_cache until it
+    expires, so repeat requests skip jwt.decode and reuse the same User.
     """
     if not authorization.startswith("Bearer "):
         raise HTTPException(status_code=401, detail="Missing Bearer token")
 
-    token: str = authorization.replace("Bearer ", "")
+    token: str = authorization[len("Bearer "):]
+
+    user = token_cache.get(token)
+    if user is not None:
+        return user
 
     try:
-        payload: dict[str, Any] = jwt.decode(
-            token,
-            os.getenv("SUPABASE_JWT_SECRET"),
-            algorithms=["HS256"],
-            audience="authenticated",
-        )
+        with span("jwt"):
+            payload: dict[str, Any] = jwt.decode(
+                token,
+                SUPABASE_JWT_SECRET,
+                algorithms=JWT_ALGORITHMS,
+                audience=JWT_AUDIENCE,
+            )
     except JWTError as e:
         raise HTTPException(status_code=401, detail=f"Invalid token: {str(e)}")
 
-    return User(id=payload["sub"], email=payload.get("email"), token=token)
-
+    user = User(id=payload["sub"], email=payload.get("email"), token=token)
+    # Tokens without exp are never cached: there would be no point at which to drop them
+    if "exp" in payload:
+        token_cache.set(token, user, float(payload["exp"]))
+    return user
@@ -0,0 +1,351 @@
+"""Write-coalescing autosave for journal entry drafts.
+
+The editor sends its whole draft every few seconds while the user types. Drafts
+are kept in memory, one per entry, each replacing the last, and written to
+journal_entries only once the entry has been quiet for ``debounce`` seconds
+(or, during continuous typing, ``max_delay`` seconds after the first unsaved
+draft), or when the client commits. A burst of saves costs one UPDATE.
+
+Every write is a compare-and-swap on ``updated_at``: it only applies if the row
+still has the version the draft was based on. If the entry was changed
+elsewhere (another tab or device), the write is refused, the draft is kept, and
+the next draft or commit for the entry gets a conflict carrying the server's
+version, so neither side's text is lost silently.
+
+Each editor (browser tab) sends a client_id. A draft based on an older version
+this buffer wrote continues from the newest one only when it comes from the
+client whose drafts produced those versions; any other client must base its
+draft on the current version, so two tabs that opened the same version get a
+conflict instead of overwriting each other. A client taking over an entry that
+still has another client's unsaved draft first has that draft written, then
+gets a conflict showing it.
+
+``on_saved`` runs after every write; ``on_settled`` runs once the user is done
+with the text, i.e. on an explicit commit or when an idle draft is dropped
+after ``idle_ttl``, so expensive follow-up work (summaries, embeddings) is not
+repeated for every pause in typing.
+
+Buffers live in one process: route a user's drafts to one worker (or run one
+worker); a draft that lands on another worker is saved or reported as a
+conflict there, never merged. Pending drafts are flushed on shutdown.
+"""
+
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable
+import asyncio
+import logging
+import time
+
+try:
+    from backend.dependencies import supabase
+    from backend.telemetry import metrics
+except ModuleNotFoundError:
+    from dependencies import supabase
+    from telemetry import metrics
+
+logger = logging.getLogger(__name__)
+
+drafts_received = metrics.counter("autosave_drafts_total", "Draft saves accepted by the autosave buffer")
+draft_flushes = metrics.counter(
+    "autosave_flushes_total", "Autosave database writes by result", ("result",)
+)
+
+# updated_at values this buffer wrote for an entry, so drafts based on any of them are not conflicts
+KNOWN_VERSIONS = 16
+
+
+class DraftConflict(Exception):
+    """The entry changed in the database since the version the draft was based on."""
+
+    def __init__(self, server_row: dict[str, Any]):
+        super().__init__("Journal entry was changed elsewhere")
+        self.server_row = server_row
+
+
+class DraftNotFound(Exception):
+    """The entry does not exist (or belongs to another user)."""
+
+
+def parse_timestamp(value: Any) -> datetime:
+    """A PostgREST/ISO timestamp as an aware datetime."""
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    text = str(value).replace(" ", "T").replace("Z", "+00:00")
+    if text.endswith("+00"):
+        text += ":00"
+    return datetime.fromisoformat(text)
+
+
+@dataclass
+class Draft:
+    """The newest unsaved content of one entry, and what it will replace."""
+
+    user_id: str
+    entry_id: str
+    content: str
+    # Version the next write must find in the database (compare-and-swap)
+    base_updated_at: datetime
+    revision: int = 0
+    saved_revision: int = 0
+    first_pending_at: float = 0.0
+    last_change_at: float = 0.0
+    conflict: dict[str, Any] | None = None
+    # Editor whose drafts are buffered and whose writes produced known_versions
+    client_id: str | None = None
+    # Newest row written since on_settled last ran for this entry
+    unsettled_row: dict[str, Any] | None = None
+    known_versions: deque = field(default_factory=lambda: deque(maxlen=KNOWN_VERSIONS))
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+    @property
+    def pending(self) -> bool:
+        return self.revision != self.saved_revision and self.conflict is None
+
+
+class DraftAutosaver:
+    """Buffers drafts per entry and flushes them on a debounce timer."""
+
+    def __init__(
+        self,
+        on_saved: Callable[[str, dict[str, Any]], Awaitable[None] | None] | None = None,
+        on_settled: Callable[[str, dict[str, Any]], Awaitable[None] | None] | None = None,
+        debounce: float = 2.0,
+        max_delay: float = 10.0,
+        idle_ttl: float = 600.0,
+        max_drafts: int = 10_000,
+        flush_concurrency: int = 8,
+        tick: float = 0.25,
+    ):
+        self.on_saved = on_saved
+        self.on_settled = on_settled
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.idle_ttl = idle_ttl
+        self.max_drafts = max_drafts
+        self.tick = tick
+        self._drafts: dict[tuple[str, str], Draft] = {}
+        self._flush_slots = asyncio.Semaphore(flush_concurrency)
+        self._task: asyncio.Task[None] | None = None
+        self._flushing: set[asyncio.Task] = set()
+
+    def start(self) -> None:
+        """Start the flush loop (call from within the running event loop)."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flush loop and write every pending draft."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await asyncio.gather(*self._flushing, return_exceptions=True)
+        pending = [draft for draft in self._drafts.values() if draft.pending]
+        await asyncio.gather(*(self._flush_logged(draft) for draft in pending))
+        await asyncio.gather(*(self._settle_logged(draft) for draft in self._drafts.values()))
+
+    async def save(
+        self, user_id: str, entry_id: str, content: str, base_updated_at: datetime, client_id: str | None = None
+    ) -> Draft:
+        """Buffer content as the entry's newest draft.
+
+        client_id identifies the editor; None never matches another draft's owner.
+        Raises DraftConflict if an earlier flush found the entry changed elsewhere
+        and the client has not yet based a draft on the server's version, or if
+        the draft is based on a version another client has since replaced.
+        """
+        base_updated_at = parse_timestamp(base_updated_at)
+        key = (user_id, entry_id)
+        draft = self._drafts.get(key)
+        if draft is not None and draft.conflict is None and (client_id is None or client_id != draft.client_id):
+            draft = await self._hand_over(draft, base_updated_at, client_id)
+        now = time.monotonic()
+        if draft is None:
+            draft = Draft(user_id, entry_id, content, base_updated_at, client_id=client_id)
+            draft.known_versions.append(base_updated_at)
+            self._drafts[key] = draft
+        elif draft.conflict is not None:
+            if base_updated_at != parse_timestamp(draft.conflict["updated_at"]):
+                raise DraftConflict(draft.conflict)
+            # The client has seen the server's version: its draft replaces that one
+            draft.conflict = None
+            draft.client_id = client_id
+            draft.base_updated_at = base_updated_at
+            draft.known_versions.append(base_updated_at)
+        elif base_updated_at not in draft.known_versions:
+            # Based on a version this buffer never saw; the write decides if it is stale
+            draft.base_updated_at = base_updated_at
+            draft.known_versions.append(base_updated_at)
+
+        if not draft.pending:
+            draft.first_pending_at = now
+        draft.content = content
+        draft.revision += 1
+        draft.last_change_at = now
+        drafts_received.inc()
+
+        if len(self._drafts) > self.max_drafts:
+            # Over capacity: write this one now rather than hold more in memory
+            self._spawn_flush(draft)
+        return draft
+
+    async def _hand_over(self, draft: Draft, base_updated_at: datetime, client_id: str | None) -> Draft | None:
+        """Let client_id continue draft, or raise DraftConflict.
+
+        Returns None when the draft can simply be replaced: nothing is pending and
+        the client's base is a version this buffer never wrote (the write decides).
+        """
+        if not draft.pending and base_updated_at not in draft.known_versions:
+            self.discard(draft.user_id, draft.entry_id)
+            return None
+        if draft.pending:
+            # Write the other editor's text first so the conflict below shows it
+            await self._flush(draft)
+        if base_updated_at != draft.base_updated_at:
+            raise DraftConflict({
+                "id": draft.entry_id,
+                "content": draft.content,
+                "updated_at": draft.base_updated_at.isoformat(),
+            })
+        # The client has the current version: its drafts continue from there
+        draft.client_id = client_id
+        draft.known_versions.clear()
+        draft.known_versions.append(base_updated_at)
+        return draft
+
+    def get(self, user_id: str, entry_id: str) -> Draft | None:
+        return self._drafts.get((user_id, entry_id))
+
+    def discard(self, user_id: str, entry_id: str) -> None:
+        """Forget an entry's draft (the entry was saved directly or deleted)."""
+        self._drafts.pop((user_id, entry_id), None)
+
+    def flush_due_in(self, draft: Draft) -> float | None:
+        """Seconds until a pending draft is written, None if nothing is pending."""
+        if not draft.pending:
+            return None
+        due = min(draft.last_change_at + self.debounce, draft.first_pending_at + self.max_delay)
+        return max(0.0, due - time.monotonic())
+
+    async def commit(self, user_id: str, entry_id: str) -> dict[str, Any] | None:
+        """Write the entry's draft now. Returns the saved row, or None if nothing was pending.
+
+        Raises DraftConflict or DraftNotFound.
+        """
+        draft = self._drafts.get((user_id, entry_id))
+        if draft is None:
+            return None
+        if draft.conflict is not None:
+            raise DraftConflict(draft.conflict)
+        row = await self._flush(draft)
+        await self._settle(draft)
+        return row
+
+    async def _flush(self, draft: Draft) -> dict[str, Any] | None:
+        """Write the draft's newest content if it is still unsaved; return the saved row (None if nothing was pending)."""
+        async with draft.lock:
+            if draft.conflict is not None:
+                raise DraftConflict(draft.conflict)
+            if not draft.pending:
+                return None
+            revision, content = draft.revision, draft.content
+            async with self._flush_slots:
+                response = await (
+                    supabase.table("journal_entries")
+                    .update({"content": content, "updated_at": datetime.now(timezone.utc).isoformat()})
+                    .eq("id", draft.entry_id)
+                    .eq("user_id", draft.user_id)
+                    .eq("updated_at", draft.base_updated_at.isoformat())
+                    .execute()
+                )
+            if response.data:
+                row = response.data[0]
+                draft.base_updated_at = parse_timestamp(row["updated_at"])
+                draft.known_versions.append(draft.base_updated_at)
+                draft.saved_revision = revision
+                draft.unsettled_row = row
+                draft_flushes.inc("saved")
+                if self.on_saved is not None:
+                    result = self.on_saved(draft.user_id, row)
+                    if asyncio.iscoroutine(result):
+                        await result
+                return row
+
+            current = await (
+                supabase.table("journal_entries")
+                .select("id, content, updated_at")
+                .eq("id", draft.entry_id)
+                .eq("user_id", draft.user_id)
+                .limit(1)
+                .execute()
+            )
+            if not current.data:
+                draft_flushes.inc("not_found")
+                self.discard(draft.user_id, draft.entry_id)
+                raise DraftNotFound(draft.entry_id)
+            draft.conflict = current.data[0]
+            draft_flushes.inc("conflict")
+            raise DraftConflict(draft.conflict)
+
+    async def _settle(self, draft: Draft) -> None:
+        """Run on_settled for the newest written row, once per row."""
+        row, draft.unsettled_row = draft.unsettled_row, None
+        if row is None or self.on_settled is None:
+            return
+        result = self.on_settled(draft.user_id, row)
+        if asyncio.iscoroutine(result):
+            await result
+
+    async def _settle_logged(self, draft: Draft) -> None:
+        try:
+            await self._settle(draft)
+        except Exception as e:
+            logger.error(f"Post-save work for entry {draft.entry_id} failed: {type(e).__name__}: {str(e)}")
+
+    def _spawn_settle(self, draft: Draft) -> None:
+        task = asyncio.create_task(self._settle_logged(draft))
+        self._flushing.add(task)
+        task.add_done_callback(self._flushing.discard)
+
+    async def _flush_logged(self, draft: Draft) -> None:
+        try:
+            await self._flush(draft)
+        except (DraftConflict, DraftNotFound) as e:
+            logger.info(f"Autosave for entry {draft.entry_id} not written: {str(e)}")
+        except Exception as e:
+            # Keep the draft pending; the loop retries it after another debounce
+            draft.last_change_at = time.monotonic()
+            draft.first_pending_at = draft.last_change_at
+            draft_flushes.inc("error")
+            logger.error(f"Autosave for entry {draft.entry_id} failed: {type(e).__name__}: {str(e)}")
+
+    def _spawn_flush(self, draft: Draft) -> None:
+        task = asyncio.create_task(self._flush_logged(draft))
+        self._flushing.add(task)
+        task.add_done_callback(self._flushing.discard)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.tick)
+            now = time.monotonic()
+            for key, draft in list(self._drafts.items()):
+                if draft.lock.locked():
+                    continue
+                if draft.pending:
+                    if now - draft.last_change_at >= self.debounce or now - draft.first_pending_at >= self.max_delay:
+                        self._spawn_flush(draft)
+                elif now - draft.last_change_at >= self.idle_ttl:
+                    del self._drafts[key]
+                    # The user left without committing: what was autosaved is final
+                    self._spawn_settle(draft)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "drafts": len(self._drafts),
+            "pending": sum(1 for draft in self._drafts.values() if draft.pending),
+            "conflicts": sum(1 for draft in self._drafts.values() if draft.conflict is not None),
+            "flushing": len(self._flushing),
+        }
+
@@ -0,0 +1,108 @@
+"""Text embedders for semantic journal search.
+
+EMBEDDING_BACKEND selects the implementation:
+
+- ``hashing`` (default): a deterministic local feature-hashing embedder. It needs
+  no network or model download and always maps the same text to the same vector,
+  which makes it suitable for tests and offline development.
+- ``openai``: OpenAI embeddings (EMBEDDING_MODEL, default text-embedding-3-small).
+
+Every embedder returns L2-normalized float32 rows, so cosine similarity is a dot
+product.
+"""
+
+from abc import ABC, abstractmethod
+import asyncio
+import hashlib
+import os
+import re
+
+import numpy as np
+
+try:
+    from backend.llm_gateway import llm_gateway
+except ModuleNotFoundError:
+    from llm_gateway import llm_gateway
+
+_WORD = re.compile(r"[a-z0-9']+")
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """Scale each row to unit length (all-zero rows stay zero)."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.maximum(norms, 1e-12, out=norms)
+    return (matrix / norms).astype(np.float32, copy=False)
+
+
+class Embedder(ABC):
+    """Turns texts into fixed-size unit vectors."""
+
+    name: str
+    dim: int
+
+    @abstractmethod
+    async def embed(self, texts: list[str]) -> np.ndarray:
+        """Embed texts as an (len(texts), dim) float32 array of unit rows."""
+
+
+class HashingEmbedder(Embedder):
+    """Signed feature hashing of words and word bigrams.
+
+    Not a language model: it rewards shared vocabulary rather than meaning, but it
+    is fast, deterministic and dependency-free.
+    """
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _features(self, text: str) -> list[str]:
+        words = _WORD.findall(text.lower())
+        return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    async def embed(self, texts: list[str]) -> np.ndarray:
+        # CPU-bound hashing: a backfill batch would otherwise hold up the event loop
+        return await asyncio.to_thread(self._embed, texts)
+
+    def _embed(self, texts: list[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+                value = int.from_bytes(digest, "little")
+                column = value % self.dim
+                matrix[row, column] += 1.0 if value >> 63 else -1.0
+        # Dampen repeated words so one long rant does not dominate
+        matrix = np.sign(matrix) * np.sqrt(np.abs(matrix))
+        return normalize_rows(matrix)
+
+
+class OpenAIEmbedder(Embedder):
+    """OpenAI embeddings API."""
+
+    def __init__(self, model: str = "text-embedding-3-small", dim: int = 1536):
+        self.model = model
+        self.dim = dim
+        self.name = f"openai-{model}-{dim}"
+
+    async def embed(self, texts: list[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        response = await llm_gateway.embed(
+            model=self.model, input=texts, dimensions=self.dim
+        )
+        vectors = [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+        return normalize_rows(np.asarray(vectors, dtype=np.float32))
+
+
+def create_embedder() -> Embedder:
+    """Build the embedder selected by EMBEDDING_BACKEND."""
+    backend = os.getenv("EMBEDDING_BACKEND", "hashing").lower()
+    if backend == "openai":
+        return OpenAIEmbedder(
+            model=os.getenv("EMBEDDING_MODEL", "text-embedding-3-small"),
+            dim=int(os.getenv("EMBEDDING_DIM", "1536")),
+        )
+    if backend == "hashing":
+        return HashingEmbedder(dim=int(os.getenv("EMBEDDING_DIM", "384")))
+    raise ValueError(f"Unknown EMBEDDING_BACKEND: {backend}")
@@ -0,0 +1,134 @@
+"""Per-entry summaries computed in the background when journal entries are written.
+
+Each summary is stored with the SHA-256 of the entry content it was built from,
+so check-ins only use it while it still matches the entry and an edit only
+recomputes the entry that changed.
+"""
+
+from typing import Any
+import hashlib
+import json
+import logging
+import os
+
+try:
+    from backend.dependencies import supabase
+    from backend.model_router import model_router
+    from backend.token_budget import count_tokens
+    from backend.prompt_registry import load_prompts
+    from backend.analysis_jobs import AnalysisJob, AnalysisJobQueue, JobQueueFull
+except ModuleNotFoundError:
+    from dependencies import supabase
+    from model_router import model_router
+    from token_budget import count_tokens
+    from prompt_registry import load_prompts
+    from analysis_jobs import AnalysisJob, AnalysisJobQueue, JobQueueFull
+
+logger = logging.getLogger(__name__)
+
+ENTRY_SUMMARY_MAX_TOKENS = 300
+ENTRY_SUMMARY_MAX_WORDS = 80
+
+# Latest content waiting to be summarized, per entry id. Rapid successive edits
+# collapse into one job that summarizes whatever the newest content is.
+_pending_content: dict[str, str] = {}
+
+
+def content_hash(content: str) -> str:
+    """Digest of an entry's content, used to tell whether a summary is current."""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+async def summarize_entry(content: str) -> dict[str, Any]:
+    """Ask the model for a compact summary, sentiment and themes of one entry."""
+    prompts = load_prompts("entry_summary")
+    user_prompt = prompts.render("user_prompt_template", content=content, max_words=ENTRY_SUMMARY_MAX_WORDS)
+    route = model_router.route(
+        "entry_summary",
+        count_tokens(prompts["system_prompt"]) + count_tokens(user_prompt),
+        max_tokens=ENTRY_SUMMARY_MAX_TOKENS,
+    )
+    completion, _ = await model_router.chat(
+        route,
+        # Background work: bounded by the global limit only, so it never takes a user's own slots
+        operation="entry_summary",
+        messages=[
+            {"role": "system", "content": prompts["system_prompt"]},
+            {"role": "user", "content": user_prompt},
+        ],
+        temperature=0.0,
+        response_format={"type": "json_object"},
+    )
+    result = json.loads(completion.choices[0].message.content)
+    sentiment = result.get("sentiment")
+    return {
+        "summary": str(result.get("summary", "")).strip(),
+        "sentiment": max(-1.0, min(1.0, float(sentiment))) if sentiment is not None else None,
+        "themes": [str(theme) for theme in result.get("themes", [])][:5],
+    }
+
+
+async def run_entry_summary_job(job: AnalysisJob) -> None:
+    """Summarize the newest content of one entry unless its summary is already current."""
+    content = _pending_content.pop(job.id, None)
+    if content is None:
+        return
+    digest = content_hash(content)
+
+    existing = await (
+        supabase.table("journal_entry_summaries")
+        .select("content_hash")
+        .eq("entry_id", job.id)
+        .execute()
+    )
+    if existing.data and existing.data[0]["content_hash"] == digest:
+        return
+
+    result = await summarize_entry(content)
+    await supabase.table("journal_entry_summaries").upsert({
+        "entry_id": job.id,
+        "user_id": job.user_id,
+        "content_hash": digest,
+        **result,
+    }).execute()
+
+
+entry_summary_queue = AnalysisJobQueue(
+    run_entry_summary_job,
+    workers=int(os.getenv("ENTRY_SUMMARY_WORKERS", "2")),
+    per_user_limit=1,
+    max_pending=int(os.getenv("ENTRY_SUMMARY_MAX_PENDING", "500")),
+    max_pending_per_user=50,
+)
+
+
+def schedule_entry_summary(user_id: str, entry: dict[str, Any]) -> None:
+    """Queue a summary for a freshly written entry. Never raises into the request."""
+    entry_id = str(entry["id"])
+    already_queued = entry_id in _pending_content
+    _pending_content[entry_id] = entry["content"]
+    if already_queued:
+        return
+    try:
+        entry_summary_queue.submit(AnalysisJob(id=entry_id, user_id=user_id))
+    except JobQueueFull as e:
+        _pending_content.pop(entry_id, None)
+        logger.warning(f"Skipping summary for entry {entry_id}: {str(e)}")
+
+
+async def fetch_entry_summaries(entries: list[dict[str, Any]]) -> dict[str, str]:
+    """Map entry id to its stored summary, for summaries that match the current content."""
+    if not entries:
+        return {}
+    hashes = {str(entry["id"]): content_hash(entry["content"]) for entry in entries}
+    response = await (
+        supabase.table("journal_entry_summaries")
+        .select("entry_id, content_hash, summary")
+        .in_("entry_id", list(hashes))
+        .execute()
+    )
+    return {
+        row["entry_id"]: row["summary"]
+        for row in response.data or []
+        if row.get("summary") and hashes.get(row["entry_id"]) == row["content_hash"]
+    }
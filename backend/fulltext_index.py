@@ -0,0 +1,413 @@
+"""Per-user inverted index for keyword and phrase search over journal entries.
+
+Each user's index maps a term to its postings: parallel ``array`` columns of
+document numbers and term frequencies, plus one flat array of token positions. Document numbers only grow, so postings stay sorted and an added
+entry is an append; an updated entry is re-added under a new number and its old
+number is marked dead, and dead documents are compacted away once they
+outnumber the live ones. Ranking is BM25 computed with NumPy over the postings
+of the query terms, so a query touches only the documents that contain them.
+
+Indexes live in memory (the most recently searched FULLTEXT_MAX_USERS users) and
+are built from Supabase on a user's first search. Writes handled by this process
+update a loaded index immediately; changes made through other workers are picked
+up from ``updated_at`` and ``sync_tombstones`` at most every
+FULLTEXT_REFRESH_SECONDS.
+"""
+
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any
+import asyncio
+import math
+import os
+import re
+import time
+
+import numpy as np
+
+try:
+    from backend.dependencies import supabase
+except ModuleNotFoundError:
+    from dependencies import supabase
+
+FULLTEXT_MAX_USERS = int(os.getenv("FULLTEXT_MAX_USERS", "64"))
+# How often (seconds) a loaded index checks for writes made by other workers; 0 never does
+FULLTEXT_REFRESH_SECONDS = float(os.getenv("FULLTEXT_REFRESH_SECONDS", "30"))
+
+CATCH_UP_PAGE_SIZE = 500
+SNIPPET_CHARS = 160
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_TOKEN = re.compile(r"\w+")
+_PHRASE = re.compile(r'"([^"]*)"')
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased word tokens; the same rules apply to entries and queries."""
+    return _TOKEN.findall(text.lower())
+
+
+@dataclass
+class ParsedQuery:
+    """Terms every hit must contain, plus quoted phrases that must appear verbatim."""
+
+    terms: list[str]
+    phrases: list[list[str]]
+
+    @classmethod
+    def parse(cls, text: str) -> "ParsedQuery":
+        phrases = [tokens for tokens in map(tokenize, _PHRASE.findall(text)) if tokens]
+        terms = tokenize(_PHRASE.sub(" ", text))
+        for tokens in phrases:
+            terms.extend(tokens)
+        return cls(terms=list(dict.fromkeys(terms)), phrases=[p for p in phrases if len(p) > 1])
+
+
+@dataclass
+class Postings:
+    """Occurrences of one term: docs[i] contains it freqs[i] times. positions
+    holds each document's token positions in turn, in the same order as docs."""
+
+    docs: array = field(default_factory=lambda: array("I"))
+    freqs: array = field(default_factory=lambda: array("I"))
+    positions: array = field(default_factory=lambda: array("I"))
+
+
+@dataclass
+class KeywordHit:
+    id: str
+    created_at: str
+    score: float
+    snippet: str
+    highlights: list[tuple[int, int]]
+
+
+class UserTextIndex:
+    """One user's inverted index plus the entry text needed for snippets."""
+
+    def __init__(self):
+        self.postings: dict[str, Postings] = {}
+        self.entry_ids: list[str] = []
+        self.created_at: list[str] = []
+        self.contents: list[str | None] = []
+        self.lengths = array("I")
+        self.alive = bytearray()
+        self.doc_of: dict[str, int] = {}
+        self.total_length = 0
+        # Catch-up positions: last (updated_at, id) entry and (deleted_at, id) tombstone seen
+        self.entries_position: tuple[str, str] | None = None
+        self.tombstones_position: tuple[str, str] | None = None
+        self.refreshed_at = 0.0
+
+    def __len__(self) -> int:
+        return len(self.doc_of)
+
+    def add(self, entry_id: str, created_at: str, content: str) -> None:
+        """Index an entry, replacing any earlier version of it."""
+        doc = self.doc_of.get(entry_id)
+        if doc is not None:
+            if self.contents[doc] == content:
+                return
+            self.remove(entry_id)
+
+        doc = len(self.entry_ids)
+        tokens = tokenize(content)
+        occurrences: dict[str, list[int]] = {}
+        for position, token in enumerate(tokens):
+            occurrences.setdefault(token, []).append(position)
+        for token, positions in occurrences.items():
+            postings = self.postings.get(token)
+            if postings is None:
+                postings = self.postings[token] = Postings()
+            postings.docs.append(doc)
+            postings.freqs.append(len(positions))
+            postings.positions.extend(positions)
+
+        self.entry_ids.append(entry_id)
+        self.created_at.append(created_at)
+        self.contents.append(content)
+        self.lengths.append(len(tokens))
+        self.alive.append(1)
+        self.doc_of[entry_id] = doc
+        self.total_length += len(tokens)
+
+    def remove(self, entry_id: str) -> None:
+        """Mark an entry's document dead; its postings are dropped at the next compaction."""
+        doc = self.doc_of.pop(entry_id, None)
+        if doc is None:
+            return
+        self.alive[doc] = 0
+        self.contents[doc] = None
+        self.total_length -= self.lengths[doc]
+        dead = len(self.entry_ids) - len(self.doc_of)
+        if dead > 1000 and dead > len(self.doc_of):
+            self.compact()
+
+    def compact(self) -> None:
+        """Rebuild from the live documents, renumbering them densely."""
+        live = [
+            (self.entry_ids[doc], self.created_at[doc], self.contents[doc])
+            for doc in range(len(self.entry_ids))
+            if self.alive[doc]
+        ]
+        positions = (self.entries_position, self.tombstones_position, self.refreshed_at)
+        self.__init__()
+        self.entries_position, self.tombstones_position, self.refreshed_at = positions
+        for entry_id, created_at, content in live:
+            self.add(entry_id, created_at, content)
+
+    def search(
+        self,
+        query: ParsedQuery,
+        limit: int,
+        after: tuple[float, str] | None = None,
+    ) -> tuple[list[KeywordHit], int, bool]:
+        """One page of hits ranked by BM25 (ties by entry id), the total match
+        count, and whether more hits follow the page.
+
+        after is the (score, id) of the last hit of the previous page.
+        """
+        if not query.terms or not self.doc_of:
+            return [], 0, False
+        term_postings = [self.postings.get(term) for term in query.terms]
+        if any(postings is None for postings in term_postings):
+            return [], 0, False
+
+        alive = np.frombuffer(self.alive, dtype=np.bool_)
+        lengths = np.frombuffer(self.lengths, dtype=np.uint32)
+        doc_count = len(self.doc_of)
+        average_length = max(self.total_length / doc_count, 1.0)
+
+        scores = np.zeros(len(self.entry_ids), dtype=np.float64)
+        matched = np.zeros(len(self.entry_ids), dtype=np.int32)
+        for postings in term_postings:
+            docs = np.frombuffer(postings.docs, dtype=np.uint32)
+            freqs = np.frombuffer(postings.freqs, dtype=np.uint32).astype(np.float64)
+            df = int(np.count_nonzero(alive[docs]))
+            idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[docs] / average_length)
+            scores[docs] += idf * freqs * (BM25_K1 + 1) / (freqs + norm)
+            matched[docs] += 1
+
+        candidates = np.flatnonzero((matched == len(term_postings)) & alive)
+        for phrase in query.phrases:
+            candidates = np.intersect1d(candidates, self._phrase_docs(phrase), assume_unique=True)
+        total = len(candidates)
+
+        # Rounded scores are what clients see and what cursors compare against
+        candidate_scores = np.round(scores[candidates], 6)
+        if after is not None:
+            after_score, after_id = after
+            keep = candidate_scores < after_score
+            for i in np.flatnonzero(candidate_scores == after_score).tolist():
+                keep[i] = self.entry_ids[candidates[i]] > after_id
+            candidates, candidate_scores = candidates[keep], candidate_scores[keep]
+
+        has_more = len(candidates) > limit
+        if has_more:
+            # Everything scoring at least the limit-th best, so ties at the cut are ordered by id
+            threshold = -np.partition(-candidate_scores, limit - 1)[limit - 1]
+            keep = candidate_scores >= threshold
+            candidates, candidate_scores = candidates[keep], candidate_scores[keep]
+        ranked = sorted(
+            zip(candidate_scores.tolist(), candidates.tolist()),
+            key=lambda item: (-item[0], self.entry_ids[item[1]]),
+        )[:limit]
+
+        highlight_terms = set(query.terms)
+        hits = []
+        for score, doc in ranked:
+            snippet, highlights = make_snippet(self.contents[doc], highlight_terms)
+            hits.append(KeywordHit(self.entry_ids[doc], self.created_at[doc], score, snippet, highlights))
+        return hits, total, has_more
+
+    def _phrase_docs(self, phrase: list[str]) -> np.ndarray:
+        """Documents (dead ones included) where the phrase's terms occur consecutively."""
+        # Number every token slot of every document consecutively, so a candidate
+        # phrase start is one integer and each term narrows the candidates with a
+        # bitmap lookup, starting from the rarest term.
+        lengths = np.frombuffer(self.lengths, dtype=np.uint32)
+        doc_starts = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=doc_starts[1:])
+        occupied = np.zeros(int(doc_starts[-1]), dtype=np.bool_)
+
+        terms = sorted(enumerate(phrase), key=lambda item: len(self.postings[item[1]].positions))
+        starts = None
+        for offset, term in terms:
+            postings = self.postings[term]
+            docs = np.frombuffer(postings.docs, dtype=np.uint32)
+            freqs = np.frombuffer(postings.freqs, dtype=np.uint32)
+            positions = np.frombuffer(postings.positions, dtype=np.uint32).astype(np.int64)
+            valid = positions >= offset
+            slots = (np.repeat(doc_starts[docs], freqs) + positions - offset)[valid]
+            if starts is None:
+                starts = slots
+            else:
+                occupied[slots] = True
+                starts = starts[occupied[starts]]
+                occupied[slots] = False
+            if not len(starts):
+                break
+        return np.unique(np.searchsorted(doc_starts, starts, side="right") - 1)
+
+
+@lru_cache(maxsize=256)
+def _term_pattern(terms: tuple[str, ...]) -> re.Pattern:
+    """Whole-word, case-insensitive matcher for terms (scans in C rather than per token)."""
+    alternatives = "|".join(re.escape(term) for term in sorted(terms, key=len, reverse=True))
+    return re.compile(rf"(?<!\w)(?:{alternatives})(?!\w)", re.IGNORECASE)
+
+
+def make_snippet(content: str, terms: set[str], width: int = SNIPPET_CHARS) -> tuple[str, list[tuple[int, int]]]:
+    """The width-character window with the most query terms, and their spans in it."""
+    spans = [match.span() for match in _term_pattern(tuple(sorted(terms))).finditer(content)]
+    if not spans:
+        return content[:width] + ("…" if len(content) > width else ""), []
+
+    best_start, best_count = spans[0][0], 0
+    right = 0
+    for left, (start, _) in enumerate(spans):
+        while right < len(spans) and spans[right][1] - start <= width:
+            right += 1
+        if right - left > best_count:
+            best_start, best_count = start, right - left
+
+    # Start a little before the first match, on a word boundary
+    window_start = max(0, best_start - width // 4)
+    if window_start > 0:
+        space = content.rfind(" ", 0, window_start)
+        window_start = space + 1 if space >= 0 and best_start - space <= width // 2 else window_start
+    window_end = min(len(content), window_start + width)
+
+    prefix = "…" if window_start > 0 else ""
+    suffix = "…" if window_end < len(content) else ""
+    snippet = prefix + content[window_start:window_end] + suffix
+    shift = len(prefix) - window_start
+    highlights = [
+        (start + shift, end + shift)
+        for start, end in spans
+        if start >= window_start and end <= window_end
+    ]
+    return snippet, highlights
+
+
+class FullTextIndexStore:
+    """Builds user indexes on demand and keeps the most recently searched ones."""
+
+    def __init__(self, max_users: int = FULLTEXT_MAX_USERS, refresh_seconds: float = FULLTEXT_REFRESH_SECONDS):
+        self.max_users = max_users
+        self.refresh_seconds = refresh_seconds
+        self._indexes: OrderedDict[str, UserTextIndex] = OrderedDict()
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    def index_entry(self, user_id: str, entry: dict[str, Any]) -> None:
+        """Apply a create/update made by this process to the user's index, if loaded."""
+        index = self._indexes.get(user_id)
+        if index is not None:
+            index.add(str(entry["id"]), str(entry["created_at"]), entry["content"])
+
+    def remove_entry(self, user_id: str, entry_id: str) -> None:
+        """Apply a delete made by this process to the user's index, if loaded."""
+        index = self._indexes.get(user_id)
+        if index is not None:
+            index.remove(entry_id)
+
+    async def search(
+        self, user_id: str, text: str, limit: int, after: tuple[float, str] | None = None
+    ) -> tuple[list[KeywordHit], int, bool]:
+        """Rank the user's entries against text (see UserTextIndex.search)."""
+        index = await self._current(user_id)
+        return index.search(ParsedQuery.parse(text), limit, after)
+
+    async def _current(self, user_id: str) -> UserTextIndex:
+        index = self._indexes.get(user_id)
+        if index is not None:
+            self._indexes.move_to_end(user_id)
+            if self.refresh_seconds <= 0 or time.monotonic() - index.refreshed_at < self.refresh_seconds:
+                return index
+        async with self._locks.setdefault(user_id, asyncio.Lock()):
+            index = self._indexes.get(user_id)
+            if index is None:
+                index = UserTextIndex()
+                # Deletions before the build are already absent from the entries it reads
+                index.tombstones_position = await self._latest_tombstone(user_id)
+                await self._catch_up(user_id, index)
+                self._indexes[user_id] = index
+                while len(self._indexes) > self.max_users:
+                    self._indexes.popitem(last=False)
+            elif self.refresh_seconds > 0 and time.monotonic() - index.refreshed_at >= self.refresh_seconds:
+                await self._catch_up(user_id, index)
+        return index
+
+    async def _catch_up(self, user_id: str, index: UserTextIndex) -> None:
+        """Apply entries changed and deleted since the index's positions."""
+        started = time.monotonic()
+        while True:
+            query = (
+                supabase.table("journal_entries")
+                .select("id, created_at, updated_at, content")
+                .eq("user_id", user_id)
+            )
+            if index.entries_position is not None:
+                changed_at, entry_id = index.entries_position
+                query = query.or_(
+                    f'updated_at.gt."{changed_at}",and(updated_at.eq."{changed_at}",id.gt.{entry_id})'
+                )
+            response = await query.order("updated_at").order("id").limit(CATCH_UP_PAGE_SIZE).execute()
+            rows = response.data or []
+            for row in rows:
+                index.add(str(row["id"]), str(row["created_at"]), row["content"])
+            if rows:
+                index.entries_position = (str(rows[-1]["updated_at"]), str(rows[-1]["id"]))
+            if len(rows) < CATCH_UP_PAGE_SIZE:
+                break
+
+        while True:
+            query = (
+                supabase.table("sync_tombstones")
+                .select("id, record_id, deleted_at")
+                .eq("user_id", user_id)
+                .eq("table_name", "journal_entries")
+            )
+            if index.tombstones_position is not None:
+                deleted_at, tombstone_id = index.tombstones_position
+                query = query.or_(
+                    f'deleted_at.gt."{deleted_at}",and(deleted_at.eq."{deleted_at}",id.gt.{tombstone_id})'
+                )
+            response = await query.order("deleted_at").order("id").limit(CATCH_UP_PAGE_SIZE).execute()
+            rows = response.data or []
+            for row in rows:
+                index.remove(str(row["record_id"]))
+            if rows:
+                index.tombstones_position = (str(rows[-1]["deleted_at"]), str(rows[-1]["id"]))
+            if len(rows) < CATCH_UP_PAGE_SIZE:
+                break
+        index.refreshed_at = started
+
+    async def _latest_tombstone(self, user_id: str) -> tuple[str, str] | None:
+        response = await (
+            supabase.table("sync_tombstones")
+            .select("id, deleted_at")
+            .eq("user_id", user_id)
+            .order("deleted_at", desc=True)
+            .order("id", desc=True)
+            .limit(1)
+            .execute()
+        )
+        if not response.data:
+            return None
+        row = response.data[0]
+        return str(row["deleted_at"]), str(row["id"])
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "loaded_users": len(self._indexes),
+            "documents": sum(len(index) for index in self._indexes.values()),
+            "terms": sum(len(index.postings) for index in self._indexes.values()),
+        }
+
+
+fulltext_store = FullTextIndexStore()
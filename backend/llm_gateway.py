@@ -0,0 +1,471 @@
+"""Gateway for every OpenAI call: bounded concurrency, deadlines, retries, hedging.
+
+All completions and embeddings go through ``llm_gateway`` rather than the raw
+client, so an upstream slowdown queues requests here instead of piling them onto
+OpenAI and tying up the server without limit:
+
+- A global semaphore caps calls in flight (LLM_MAX_CONCURRENCY) and a per-user
+  one stops a single user from taking every slot (LLM_PER_USER_CONCURRENCY).
+  Waiting for a slot counts against the call's deadline.
+- Every call has a deadline (LLM_TIMEOUT_SECONDS unless the caller passes one);
+  each attempt gets only the time that remains.
+- 429s, 5xxs, timeouts and connection errors are retried up to LLM_MAX_RETRIES
+  times with full-jitter exponential backoff, honouring Retry-After, as long as
+  the wait fits in the deadline. The OpenAI client's own retries are disabled.
+- Calls that opt in are hedged: if no answer arrives within
+  LLM_HEDGE_AFTER_SECONDS (0 disables) and a global slot is free, a second
+  identical request races the first and the loser is cancelled.
+
+``stats()`` reports queue depth, calls in flight and per-operation counters and
+latency percentiles. Token usage reported by the API is counted in the
+llm_tokens_total metric.
+"""
+
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, TypeVar
+import asyncio
+import logging
+import os
+import random
+import time
+
+import openai
+from openai.types.chat import ChatCompletion, ChatCompletionMessage
+from openai.types.chat.chat_completion import Choice
+
+try:
+    from backend.dependencies import openai_client
+    from backend.telemetry import llm_tokens
+except ModuleNotFoundError:
+    from dependencies import openai_client
+    from telemetry import llm_tokens
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS = {408, 409, 429}
+
+
+class LLMDeadlineExceeded(TimeoutError):
+    """The call did not complete (including queueing and retries) before its deadline."""
+
+
+def is_retryable(error: Exception) -> bool:
+    """Rate limits, server errors, timeouts and dropped connections are worth retrying."""
+    if isinstance(error, openai.APIConnectionError):  # includes APITimeoutError
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in RETRYABLE_STATUS or error.status_code >= 500
+    return False
+
+
+def count_usage(model: str, usage: Any) -> None:
+    """Add a response's token usage to the llm_tokens_total metric."""
+    if usage is None:
+        return
+    llm_tokens.inc(model, "prompt", amount=usage.prompt_tokens or 0)
+    completion_tokens = getattr(usage, "completion_tokens", None)
+    if completion_tokens:
+        llm_tokens.inc(model, "completion", amount=completion_tokens)
+
+
+def retry_after_seconds(error: Exception) -> float | None:
+    """The server's Retry-After hint, if it sent one in seconds."""
+    response = getattr(error, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+@dataclass
+class OperationStats:
+    """Counters and recent latencies for one kind of call (e.g. "checkin")."""
+
+    calls: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    retries: int = 0
+    deadline_exceeded: int = 0
+    hedges: int = 0
+    hedge_wins: int = 0
+    latencies: deque = field(default_factory=lambda: deque(maxlen=1024))
+
+    def snapshot(self) -> dict[str, Any]:
+        ordered = sorted(self.latencies)
+
+        def percentile(p: float) -> float | None:
+            if not ordered:
+                return None
+            return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000, 1)
+
+        return {
+            "calls": self.calls,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "retries": self.retries,
+            "deadline_exceeded": self.deadline_exceeded,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "p99_ms": percentile(0.99),
+        }
+
+
+class LLMGateway:
+    """Runs OpenAI calls under concurrency limits, deadlines and a retry policy."""
+
+    def __init__(
+        self,
+        client: openai.AsyncOpenAI,
+        max_concurrency: int = 16,
+        per_user_concurrency: int = 2,
+        timeout: float = 60.0,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_cap: float = 8.0,
+        hedge_after: float = 0.0,
+    ):
+        self.client = client
+        self.max_concurrency = max_concurrency
+        self.per_user_concurrency = per_user_concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.hedge_after = hedge_after
+        self._global = asyncio.Semaphore(max_concurrency)
+        self._users: dict[str, asyncio.Semaphore] = {}
+        self._user_refs: dict[str, int] = {}
+        self._operations: dict[str, OperationStats] = {}
+        self.waiting = 0
+        self.in_flight = 0
+
+    def _stats(self, operation: str) -> OperationStats:
+        stats = self._operations.get(operation)
+        if stats is None:
+            stats = self._operations[operation] = OperationStats()
+        return stats
+
+    def _deadline(self, timeout: float | None) -> float:
+        return asyncio.get_running_loop().time() + (timeout if timeout is not None else self.timeout)
+
+    def _remaining(self, deadline: float) -> float:
+        remaining = deadline - asyncio.get_running_loop().time()
+        if remaining <= 0:
+            raise LLMDeadlineExceeded("LLM call deadline exceeded")
+        return remaining
+
+    @asynccontextmanager
+    async def _slot(self, user_id: str | None, deadline: float):
+        """Hold a per-user slot (if user_id) and a global slot, waiting until deadline at most."""
+        user_slot = None
+        if user_id is not None:
+            user_slot = self._users.setdefault(user_id, asyncio.Semaphore(self.per_user_concurrency))
+            self._user_refs[user_id] = self._user_refs.get(user_id, 0) + 1
+        self.waiting += 1
+        acquired_user = acquired_global = False
+        try:
+            async with asyncio.timeout_at(deadline):
+                if user_slot is not None:
+                    await user_slot.acquire()
+                    acquired_user = True
+                await self._global.acquire()
+                acquired_global = True
+        except TimeoutError:
+            raise LLMDeadlineExceeded("Timed out waiting for an LLM slot")
+        finally:
+            self.waiting -= 1
+            if not acquired_global:
+                self._release(user_id, user_slot if acquired_user else None, False)
+
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._release(user_id, user_slot, True)
+
+    def _release(self, user_id: str | None, user_slot: asyncio.Semaphore | None, global_held: bool) -> None:
+        if global_held:
+            self._global.release()
+        if user_slot is not None:
+            user_slot.release()
+        if user_id is not None:
+            self._user_refs[user_id] -= 1
+            if self._user_refs[user_id] == 0:
+                # Forget idle users so the map does not grow with every user ever seen
+                del self._user_refs[user_id]
+                del self._users[user_id]
+
+    async def _retrying(
+        self, stats: OperationStats, deadline: float, call: Callable[[float], Awaitable[T]]
+    ) -> T:
+        """Run call(remaining_seconds) until it succeeds, fails for good or runs out of time."""
+        attempt = 0
+        while True:
+            remaining = self._remaining(deadline)
+            try:
+                async with asyncio.timeout_at(deadline):
+                    return await call(remaining)
+            except TimeoutError:
+                raise LLMDeadlineExceeded("LLM call deadline exceeded") from None
+            except Exception as e:
+                remaining = deadline - asyncio.get_running_loop().time()
+                if isinstance(e, openai.APITimeoutError) and remaining <= 0:
+                    # The attempt was given exactly the time left, so this is the deadline
+                    raise LLMDeadlineExceeded("LLM call deadline exceeded") from e
+                if not is_retryable(e) or attempt >= self.max_retries:
+                    raise
+                delay = random.uniform(0, min(self.backoff_cap, self.backoff_base * 2**attempt))
+                hint = retry_after_seconds(e)
+                if hint is not None:
+                    delay = max(delay, hint)
+                if delay >= remaining:
+                    raise
+                attempt += 1
+                stats.retries += 1
+                logger.warning(f"Retrying LLM call in {delay:.2f}s (attempt {attempt}): {type(e).__name__}: {str(e)}")
+                await asyncio.sleep(delay)
+
+    async def _hedged(
+        self, stats: OperationStats, deadline: float, primary: Callable[[], Awaitable[T]],
+        backup: Callable[[], Awaitable[T]],
+    ) -> T:
+        """Race a backup request against a slow primary; the first success wins."""
+        wait = min(self.hedge_after, self._remaining(deadline))
+        first = asyncio.ensure_future(primary())
+        tasks = [first]
+        try:
+            done, _ = await asyncio.wait({first}, timeout=wait)
+            if done or self._global.locked():
+                # Answered in time, or no spare capacity to spend on a duplicate
+                return await first
+
+            stats.hedges += 1
+            second = asyncio.ensure_future(backup())
+            tasks.append(second)
+            pending = {first, second}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            stats.hedge_wins += 1
+                        return task.result()
+            # Both failed: report the primary's error
+            return first.result()
+        finally:
+            # Also runs when the caller is cancelled: neither request may outlive it
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def _first_token_deadline(self, deadline: float, first_token_timeout: float | None) -> float:
+        if first_token_timeout is None:
+            return deadline
+        return min(deadline, asyncio.get_running_loop().time() + first_token_timeout)
+
+    async def _open_stream(
+        self, stats: OperationStats, first_deadline: float, params: dict[str, Any]
+    ) -> Any:
+        async def create(remaining: float) -> Any:
+            # The final chunk then carries token usage (with no choices)
+            return await self.client.chat.completions.create(
+                timeout=remaining, stream=True, **{"stream_options": {"include_usage": True}, **params}
+            )
+
+        return await self._retrying(stats, first_deadline, create)
+
+    async def _chunks(self, stream: Any, first_deadline: float, deadline: float) -> AsyncIterator[Any]:
+        """Chunks of an open stream; the first must arrive by first_deadline, all by deadline."""
+        chunks = stream.__aiter__()
+        until = first_deadline
+        try:
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), self._remaining(until))
+                except StopAsyncIteration:
+                    return
+                except TimeoutError:
+                    raise LLMDeadlineExceeded("LLM stream deadline exceeded") from None
+                until = deadline
+                yield chunk
+        finally:
+            await stream.close()
+
+    async def _collect(
+        self, stats: OperationStats, first_deadline: float, deadline: float, params: dict[str, Any]
+    ) -> ChatCompletion:
+        """A streamed completion assembled into the object a non-streamed call returns."""
+        stream = await self._open_stream(stats, first_deadline, params)
+        parts: list[str] = []
+        finish_reason, usage, chunk_id, created = "stop", None, "", int(time.time())
+        async for chunk in self._chunks(stream, first_deadline, deadline):
+            chunk_id, created = chunk.id, chunk.created
+            if chunk.choices:
+                choice = chunk.choices[0]
+                if choice.delta.content:
+                    parts.append(choice.delta.content)
+                if choice.finish_reason:
+                    finish_reason = choice.finish_reason
+            if getattr(chunk, "usage", None) is not None:
+                usage = chunk.usage
+        return ChatCompletion(
+            id=chunk_id,
+            object="chat.completion",
+            created=created,
+            model=params.get("model", ""),
+            choices=[Choice(
+                index=0,
+                finish_reason=finish_reason,
+                message=ChatCompletionMessage(role="assistant", content="".join(parts)),
+            )],
+            usage=usage,
+        )
+
+    async def chat(
+        self,
+        *,
+        operation: str,
+        user_id: str | None = None,
+        timeout: float | None = None,
+        first_token_timeout: float | None = None,
+        hedge: bool = False,
+        **params: Any,
+    ) -> Any:
+        """chat.completions.create(**params) through the gateway.
+
+        With first_token_timeout the completion is streamed and assembled, so a
+        model that has not started answering within it raises LLMDeadlineExceeded
+        while a long answer that is still arriving only has to beat the deadline.
+        """
+        stats = self._stats(operation)
+        stats.calls += 1
+        deadline = self._deadline(timeout)
+        start = time.perf_counter()
+
+        async def create(remaining: float) -> Any:
+            return await self.client.chat.completions.create(timeout=remaining, **params)
+
+        async def attempt(user: str | None) -> Any:
+            first_deadline = self._first_token_deadline(deadline, first_token_timeout)
+            async with self._slot(user, first_deadline):
+                if first_token_timeout is not None:
+                    return await self._collect(stats, first_deadline, deadline, params)
+                return await self._retrying(stats, deadline, create)
+
+        async def primary() -> Any:
+            return await attempt(user_id)
+
+        async def backup() -> Any:
+            # Runs on spare global capacity and shares the caller's per-user slot
+            return await attempt(None)
+
+        try:
+            if hedge and self.hedge_after > 0:
+                result = await self._hedged(stats, deadline, primary, backup)
+            else:
+                result = await primary()
+        except Exception as e:
+            self._record_failure(stats, e)
+            raise
+        stats.succeeded += 1
+        stats.latencies.append(time.perf_counter() - start)
+        count_usage(params.get("model", ""), getattr(result, "usage", None))
+        return result
+
+    async def chat_stream(
+        self,
+        *,
+        operation: str,
+        user_id: str | None = None,
+        timeout: float | None = None,
+        first_token_timeout: float | None = None,
+        **params: Any,
+    ) -> AsyncIterator[str]:
+        """Stream the content deltas of a chat completion through the gateway.
+
+        Opening the stream is retried like any call; once tokens have been yielded
+        a failure is raised to the caller rather than restarting the answer. With
+        first_token_timeout, the first chunk must arrive within that many seconds
+        (queueing included); the rest only has to arrive before the deadline.
+        """
+        stats = self._stats(operation)
+        stats.calls += 1
+        deadline = self._deadline(timeout)
+        first_deadline = self._first_token_deadline(deadline, first_token_timeout)
+        start = time.perf_counter()
+
+        try:
+            async with self._slot(user_id, first_deadline):
+                stream = await self._open_stream(stats, first_deadline, params)
+                async for chunk in self._chunks(stream, first_deadline, deadline):
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+                    if getattr(chunk, "usage", None) is not None:
+                        count_usage(params.get("model", ""), chunk.usage)
+        except Exception as e:
+            self._record_failure(stats, e)
+            raise
+        stats.succeeded += 1
+        stats.latencies.append(time.perf_counter() - start)
+
+    async def embed(
+        self,
+        *,
+        operation: str = "embedding",
+        user_id: str | None = None,
+        timeout: float | None = None,
+        **params: Any,
+    ) -> Any:
+        """embeddings.create(**params) through the gateway."""
+        stats = self._stats(operation)
+        stats.calls += 1
+        deadline = self._deadline(timeout)
+        start = time.perf_counter()
+
+        async def create(remaining: float) -> Any:
+            return await self.client.embeddings.create(timeout=remaining, **params)
+
+        try:
+            async with self._slot(user_id, deadline):
+                result = await self._retrying(stats, deadline, create)
+        except Exception as e:
+            self._record_failure(stats, e)
+            raise
+        stats.succeeded += 1
+        stats.latencies.append(time.perf_counter() - start)
+        count_usage(params.get("model", ""), getattr(result, "usage", None))
+        return result
+
+    def _record_failure(self, stats: OperationStats, error: Exception) -> None:
+        stats.failed += 1
+        if isinstance(error, LLMDeadlineExceeded):
+            stats.deadline_exceeded += 1
+
+    def stats(self) -> dict[str, Any]:
+        """Queue depth, calls in flight and per-operation counters (for /cache-stats style debugging)."""
+        return {
+            "waiting": self.waiting,
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "per_user_concurrency": self.per_user_concurrency,
+            "active_users": len(self._users),
+            "operations": {name: stats.snapshot() for name, stats in sorted(self._operations.items())},
+        }
+
+
+llm_gateway = LLMGateway(
+    openai_client,
+    max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "16")),
+    per_user_concurrency=int(os.getenv("LLM_PER_USER_CONCURRENCY", "2")),
+    timeout=float(os.getenv("LLM_TIMEOUT_SECONDS", "60")),
+    max_retries=int(os.getenv("LLM_MAX_RETRIES", "3")),
+    hedge_after=float(os.getenv("LLM_HEDGE_AFTER_SECONDS", "0")),
+)
@@ -1,14 +1,37 @@
 """TherapyAI FastAPI backend."""
 
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from dotenv import load_dotenv
+import asyncio
+import ipaddress
 import os
+import secrets
 
 try:
-    from backend.routers import journal, inference, goals
+    from backend.routers import journal, inference, goals, analysis, sync, dashboard, stats, bulk
+    from backend.dependencies import close_supabase, token_cache
+    from backend.entry_summaries import entry_summary_queue
+    from backend.vector_index import embedding_queue
+    from backend.prompt_registry import registry as prompt_registry
+    from backend.llm_gateway import llm_gateway
+    from backend.model_router import model_router
+    from backend.telemetry import TimingMiddleware, metrics
+    from backend.read_cache import read_cache
+    from backend.responses import CompressionMiddleware, FastJSONResponse
 except ModuleNotFoundError:
-    from routers import journal, inference, goals
+    from routers import journal, inference, goals, analysis, sync, dashboard, stats, bulk
+    from dependencies import close_supabase, token_cache
+    from entry_summaries import entry_summary_queue
+    from vector_index import embedding_queue
+    from prompt_registry import registry as prompt_registry
+    from llm_gateway import llm_gateway
+    from model_router import model_router
+    from telemetry import TimingMiddleware, metrics
+    from read_cache import read_cache
+    from responses import CompressionMiddleware, FastJSONResponse
 
 
 load_dotenv()
@@ -28,7 +51,33 @@ else:
     ]
 
 
-app = FastAPI(title="TherapyAI API", version="0.1.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Load prompts and start background workers; release them and pooled connections on shutdown."""
+    # Parse and compile every prompt up front so a broken template fails the deploy, not a request
+    prompt_registry.load_all()
+    stale_sweep = asyncio.create_task(analysis.sweep_stale_analyses())
+    analysis.analysis_queue.start()
+    entry_summary_queue.start()
+    embedding_queue.start()
+    journal.draft_autosaver.start()
+    yield
+    # Write buffered drafts before the workers that index them stop
+    await journal.draft_autosaver.stop()
+    await embedding_queue.stop()
+    await entry_summary_queue.stop()
+    await analysis.analysis_queue.stop()
+    stale_sweep.cancel()
+    await asyncio.gather(stale_sweep, return_exceptions=True)
+    await close_supabase()
+
+
+app = FastAPI(
+    title="TherapyAI API", version="0.1.0", lifespan=lifespan, default_response_class=FastJSONResponse
+)
+
+# Innermost: compress bodies once the app has produced them
+app.add_middleware(CompressionMiddleware)
 
 # CORS middleware
 app.add_middleware(
@@ -37,15 +86,117 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Let the browser's network panel show Server-Timing on cross-origin API calls
+    expose_headers=["Server-Timing"],
 )
 
+# Outermost, so its timings cover every other middleware too
+app.add_middleware(TimingMiddleware)
+
 # Register routers
 app.include_router(journal.router)
 app.include_router(inference.router)
 app.include_router(goals.router)
+app.include_router(analysis.router)
+app.include_router(sync.router)
+app.include_router(dashboard.router)
+app.include_router(stats.router)
+app.include_router(bulk.router)
 
 
 @app.get("/")
 async def root():
     """Root endpoint."""
     return {"message": "TherapyAI API is running", "docs": "/docs"}
+
+
+def metrics_allowed(request: Request) -> bool:
+    """Bearer METRICS_TOKEN when one is configured, otherwise loopback clients only."""
+    token = os.getenv("METRICS_TOKEN")
+    if token:
+        scheme, _, credentials = request.headers.get("authorization", "").partition(" ")
+        return scheme.lower() == "bearer" and secrets.compare_digest(credentials.encode(), token.encode())
+    if "x-forwarded-for" in request.headers or "x-real-ip" in request.headers:
+        # Relayed by a local reverse proxy on behalf of someone else
+        return False
+    try:
+        return request.client is not None and ipaddress.ip_address(request.client.host).is_loopback
+    except ValueError:
+        return False
+
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics(request: Request) -> PlainTextResponse:
+    """Prometheus scrape endpoint (this worker's metrics)."""
+    if not metrics_allowed(request):
+        # Same answer as an unknown path, so the endpoint is not advertised
+        raise HTTPException(status_code=404, detail="Not Found")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+CACHES = (("analysis", inference.analysis_cache), ("auth_token", token_cache), ("read", read_cache))
+
+
+def cache_lookups():
+    for name, cache in CACHES:
+        yield (name, "hit"), cache.hits
+        yield (name, "miss"), cache.misses
+
+
+def cache_hit_ratios():
+    for name, cache in CACHES:
+        lookups = cache.hits + cache.misses
+        yield (name,), cache.hits / lookups if lookups else 0.0
+
+
+def llm_calls():
+    for operation, op_stats in llm_gateway.stats()["operations"].items():
+        for outcome in ("succeeded", "failed", "deadline_exceeded"):
+            yield (operation, outcome), op_stats[outcome]
+
+
+def queue_depths():
+    queues = (
+        ("analysis", analysis.analysis_queue),
+        ("entry_summary", entry_summary_queue),
+        ("embedding", embedding_queue),
+    )
+    for name, queue in queues:
+        queue_stats = queue.stats()
+        yield (name, "queued"), queue_stats["queued"]
+        yield (name, "running"), queue_stats["running"]
+
+
+# Values that already live in caches, the LLM gateway and job queues, read at scrape time
+metrics.callback("cache_lookups_total", "counter", "Cache lookups by result", ("cache", "result"), cache_lookups)
+metrics.callback("cache_hit_ratio", "gauge", "Hits / lookups since start", ("cache",), cache_hit_ratios)
+metrics.callback("llm_calls_total", "counter", "LLM calls by gateway operation and outcome", ("operation", "outcome"), llm_calls)
+metrics.callback(
+    "llm_retries_total", "counter", "LLM call retries", ("operation",),
+    lambda: [((name,), op_stats["retries"]) for name, op_stats in llm_gateway.stats()["operations"].items()],
+)
+metrics.callback(
+    "llm_hedges_total", "counter", "Hedged LLM requests sent", ("operation",),
+    lambda: [((name,), op_stats["hedges"]) for name, op_stats in llm_gateway.stats()["operations"].items()],
+)
+metrics.callback(
+    "llm_gateway_calls", "gauge", "LLM calls waiting for a slot or in flight", ("state",),
+    lambda: [(("waiting",), llm_gateway.waiting), (("in_flight",), llm_gateway.in_flight)],
+)
+metrics.callback(
+    "llm_tier_fallbacks_total", "counter", "Calls that fell back from a model tier", ("tier",),
+    lambda: [((name,), tier_stats["fallbacks_from"]) for name, tier_stats in model_router.stats()["tiers"].items()],
+)
+metrics.callback(
+    "read_cache_bytes", "gauge", "Approximate size of cached entry and goal reads", (),
+    lambda: [((), read_cache.stats()["bytes"])],
+)
+metrics.callback(
+    "read_cache_evictions_total", "counter", "Reads evicted from the read cache to stay under its size bound", (),
+    lambda: [((), read_cache.evictions)],
+)
+metrics.callback("job_queue_jobs", "gauge", "Background jobs by queue and state", ("queue", "state"), queue_depths)
+metrics.callback(
+    "autosave_drafts", "gauge", "Journal drafts buffered by the autosave", ("state",),
+    lambda: [((state,), value) for state, value in journal.draft_autosaver.stats().items()],
+)
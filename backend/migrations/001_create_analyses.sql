@@ -0,0 +1,29 @@
+-- Background analysis jobs and their persisted results.
+-- Run once in the Supabase SQL editor.
+
+create table if not exists public.analyses (
+    id uuid primary key default gen_random_uuid(),
+    user_id uuid not null references auth.users (id) on delete cascade,
+    status text not null default 'queued'
+        check (status in ('queued', 'running', 'completed', 'failed')),
+    start_date date not null,
+    end_date date not null,
+    input_hash text,
+    date_range text,
+    entry_count integer,
+    goals_analyzed integer,
+    analysis text,
+    error text,
+    created_at timestamptz not null default now(),
+    completed_at timestamptz
+);
+
+create index if not exists analyses_user_created_idx
+    on public.analyses (user_id, created_at desc);
+
+create index if not exists analyses_user_input_hash_idx
+    on public.analyses (user_id, input_hash)
+    where status = 'completed';
+
+-- If row level security is enabled on journal_entries/goals, mirror those
+-- policies here; the backend always filters by user_id itself.
@@ -0,0 +1,18 @@
+-- Compact per-entry summaries computed in the background after each write.
+-- Run once in the Supabase SQL editor.
+
+create table if not exists public.journal_entry_summaries (
+    entry_id uuid primary key references public.journal_entries (id) on delete cascade,
+    user_id uuid not null references auth.users (id) on delete cascade,
+    content_hash text not null,
+    summary text not null,
+    sentiment real,
+    themes jsonb not null default '[]'::jsonb,
+    updated_at timestamptz not null default now()
+);
+
+create index if not exists journal_entry_summaries_user_idx
+    on public.journal_entry_summaries (user_id);
+
+-- If row level security is enabled on journal_entries/goals, mirror those
+-- policies here; the backend always filters by user_id itself.
@@ -0,0 +1,6 @@
+-- Supports keyset pagination of journal entries: WHERE user_id = ? ORDER BY
+-- created_at DESC, id DESC with a (created_at, id) cursor.
+-- Run once in the Supabase SQL editor.
+
+create index if not exists journal_entries_user_created_id_idx
+    on public.journal_entries (user_id, created_at desc, id desc);
@@ -0,0 +1,67 @@
+-- Delta sync: change timestamps on every row and tombstones for deletions.
+-- Run once in the Supabase SQL editor.
+
+alter table public.goals
+    add column if not exists updated_at timestamptz not null default now();
+
+-- Keep updated_at authoritative even if a client forgets to send it. clock_timestamp()
+-- rather than now() (the transaction start), so the gap between a row's stamp and its
+-- commit, which /api/sync covers with SYNC_OVERLAP_SECONDS, is as small as possible
+create or replace function public.set_updated_at() returns trigger as $$
+begin
+    new.updated_at = clock_timestamp();
+    return new;
+end;
+$$ language plpgsql;
+
+drop trigger if exists journal_entries_set_updated_at on public.journal_entries;
+create trigger journal_entries_set_updated_at
+    before insert or update on public.journal_entries
+    for each row execute function public.set_updated_at();
+
+drop trigger if exists goals_set_updated_at on public.goals;
+create trigger goals_set_updated_at
+    before insert or update on public.goals
+    for each row execute function public.set_updated_at();
+
+create index if not exists journal_entries_user_updated_id_idx
+    on public.journal_entries (user_id, updated_at, id);
+
+create index if not exists goals_user_updated_id_idx
+    on public.goals (user_id, updated_at, id);
+
+create table if not exists public.sync_tombstones (
+    id bigint generated always as identity primary key,
+    user_id uuid not null references auth.users (id) on delete cascade,
+    table_name text not null check (table_name in ('journal_entries', 'goals')),
+    record_id uuid not null,
+    deleted_at timestamptz not null default clock_timestamp()
+);
+
+alter table public.sync_tombstones alter column deleted_at set default clock_timestamp();
+
+create index if not exists sync_tombstones_user_deleted_id_idx
+    on public.sync_tombstones (user_id, deleted_at, id);
+
+-- Record every delete in the same transaction as the delete itself, so a row
+-- removed by any path (API, bulk tools, SQL editor) reaches syncing clients
+create or replace function public.record_sync_tombstone() returns trigger as $$
+begin
+    insert into public.sync_tombstones (user_id, table_name, record_id)
+    values (old.user_id, tg_table_name, old.id);
+    return null;
+end;
+$$ language plpgsql;
+
+drop trigger if exists journal_entries_sync_tombstone on public.journal_entries;
+create trigger journal_entries_sync_tombstone
+    after delete on public.journal_entries
+    for each row execute function public.record_sync_tombstone();
+
+drop trigger if exists goals_sync_tombstone on public.goals;
+create trigger goals_sync_tombstone
+    after delete on public.goals
+    for each row execute function public.record_sync_tombstone();
+
+-- If row level security is enabled on journal_entries/goals, mirror those
+-- policies here; the backend always filters by user_id itself.
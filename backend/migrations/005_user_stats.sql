@@ -0,0 +1,198 @@
+-- Per-user journaling and goal statistics, maintained on every write.
+-- Run once in the Supabase SQL editor, then backfill existing users with
+-- `python -m backend.user_stats rebuild` (or `select public.rebuild_all_user_stats();`).
+--
+-- Triggers on journal_entries and goals apply each insert, update and delete to
+-- the user's row as a delta in the same transaction as the write, so the stats
+-- never drift from the data and /api/stats reads one row by primary key.
+-- Days are UTC calendar days of created_at.
+
+create table if not exists public.user_stats (
+    user_id uuid primary key references auth.users (id) on delete cascade,
+    entry_count integer not null default 0,
+    total_words bigint not null default 0,
+    -- 'YYYY-MM-DD' -> entries written that day (days without entries are absent)
+    daily_counts jsonb not null default '{}'::jsonb,
+    -- lower bound of a word-count bucket (see stats_word_bucket) -> entries in it
+    word_histogram jsonb not null default '{}'::jsonb,
+    -- goal status -> goals with that status
+    goal_status_counts jsonb not null default '{}'::jsonb,
+    first_entry_day date,
+    last_entry_day date,
+    -- consecutive days with entries ending at last_entry_day
+    last_run_days integer not null default 0,
+    longest_streak_days integer not null default 0,
+    updated_at timestamptz not null default now()
+);
+
+create or replace function public.stats_word_count(content text) returns integer as $$
+    select case when btrim(coalesce(content, '')) = '' then 0
+                else array_length(regexp_split_to_array(btrim(content), '\s+'), 1) end;
+$$ language sql immutable;
+
+create or replace function public.stats_word_bucket(words integer) returns text as $$
+    select case when words < 50 then '0'
+                when words < 100 then '50'
+                when words < 250 then '100'
+                when words < 500 then '250'
+                when words < 1000 then '500'
+                else '1000' end;
+$$ language sql immutable;
+
+-- Add delta to counts[key], dropping the key when it reaches zero
+create or replace function public.stats_bump(counts jsonb, key text, delta integer) returns jsonb as $$
+    select case when coalesce((counts ->> key)::integer, 0) + delta > 0
+                then jsonb_set(counts, array[key], to_jsonb(coalesce((counts ->> key)::integer, 0) + delta))
+                else counts - key end;
+$$ language sql immutable;
+
+-- Recompute first/last day and streaks from daily_counts (one key per active day)
+create or replace function public.stats_refresh_streaks(p_user_id uuid) returns void as $$
+    with days as (
+        select key::date as day from public.user_stats, jsonb_object_keys(daily_counts) as key
+        where user_id = p_user_id
+    ),
+    runs as (
+        select min(day) as run_start, max(day) as run_end, count(*)::integer as length
+        from (select day, day - (row_number() over (order by day))::integer as run from days) numbered
+        group by run
+    )
+    update public.user_stats set
+        first_entry_day = (select min(run_start) from runs),
+        last_entry_day = (select max(run_end) from runs),
+        last_run_days = coalesce((select length from runs order by run_end desc limit 1), 0),
+        longest_streak_days = coalesce((select max(length) from runs), 0)
+    where user_id = p_user_id;
+$$ language sql;
+
+create or replace function public.stats_apply_entry(
+    p_user_id uuid, p_created_at timestamptz, p_content text, p_sign integer
+) returns void as $$
+declare
+    words integer := public.stats_word_count(p_content);
+    day text := to_char(p_created_at at time zone 'utc', 'YYYY-MM-DD');
+    day_count integer;
+begin
+    insert into public.user_stats (user_id) values (p_user_id) on conflict (user_id) do nothing;
+    update public.user_stats set
+        entry_count = entry_count + p_sign,
+        total_words = total_words + p_sign * words,
+        daily_counts = public.stats_bump(daily_counts, day, p_sign),
+        word_histogram = public.stats_bump(word_histogram, public.stats_word_bucket(words), p_sign),
+        updated_at = now()
+    where user_id = p_user_id
+    returning coalesce((daily_counts ->> day)::integer, 0) into day_count;
+    -- Streaks only change when a day gains its first entry or loses its last one
+    if (p_sign > 0 and day_count = 1) or (p_sign < 0 and day_count = 0) then
+        perform public.stats_refresh_streaks(p_user_id);
+    end if;
+end;
+$$ language plpgsql;
+
+create or replace function public.stats_journal_entries_trigger() returns trigger as $$
+begin
+    if tg_op = 'UPDATE' and old.content is not distinct from new.content
+            and old.created_at = new.created_at and old.user_id = new.user_id then
+        return null;
+    end if;
+    if tg_op in ('UPDATE', 'DELETE') then
+        perform public.stats_apply_entry(old.user_id, old.created_at, old.content, -1);
+    end if;
+    if tg_op in ('INSERT', 'UPDATE') then
+        perform public.stats_apply_entry(new.user_id, new.created_at, new.content, 1);
+    end if;
+    return null;
+end;
+$$ language plpgsql;
+
+create or replace function public.stats_goals_trigger() returns trigger as $$
+begin
+    if tg_op = 'UPDATE' and old.status is not distinct from new.status and old.user_id = new.user_id then
+        return null;
+    end if;
+    if tg_op in ('UPDATE', 'DELETE') then
+        insert into public.user_stats (user_id) values (old.user_id) on conflict (user_id) do nothing;
+        update public.user_stats set
+            goal_status_counts = public.stats_bump(goal_status_counts, old.status, -1),
+            updated_at = now()
+        where user_id = old.user_id;
+    end if;
+    if tg_op in ('INSERT', 'UPDATE') then
+        insert into public.user_stats (user_id) values (new.user_id) on conflict (user_id) do nothing;
+        update public.user_stats set
+            goal_status_counts = public.stats_bump(goal_status_counts, new.status, 1),
+            updated_at = now()
+        where user_id = new.user_id;
+    end if;
+    return null;
+end;
+$$ language plpgsql;
+
+drop trigger if exists journal_entries_user_stats on public.journal_entries;
+create trigger journal_entries_user_stats
+    after insert or update or delete on public.journal_entries
+    for each row execute function public.stats_journal_entries_trigger();
+
+drop trigger if exists goals_user_stats on public.goals;
+create trigger goals_user_stats
+    after insert or update or delete on public.goals
+    for each row execute function public.stats_goals_trigger();
+
+-- Recompute one user's stats from their rows (backfills and repairs)
+create or replace function public.rebuild_user_stats(p_user_id uuid) returns void as $$
+begin
+    insert into public.user_stats (user_id) values (p_user_id) on conflict (user_id) do nothing;
+    with entries as (
+        select to_char(created_at at time zone 'utc', 'YYYY-MM-DD') as day,
+               public.stats_word_count(content) as words
+        from public.journal_entries where user_id = p_user_id
+    )
+    update public.user_stats set
+        entry_count = (select count(*) from entries),
+        total_words = (select coalesce(sum(words), 0) from entries),
+        daily_counts = coalesce((
+            select jsonb_object_agg(day, n) from (select day, count(*) as n from entries group by day) d
+        ), '{}'::jsonb),
+        word_histogram = coalesce((
+            select jsonb_object_agg(bucket, n) from (
+                select public.stats_word_bucket(words) as bucket, count(*) as n from entries group by 1
+            ) b
+        ), '{}'::jsonb),
+        goal_status_counts = coalesce((
+            select jsonb_object_agg(status, n) from (
+                select status, count(*) as n from public.goals where user_id = p_user_id group by status
+            ) g
+        ), '{}'::jsonb),
+        updated_at = now()
+    where user_id = p_user_id;
+    perform public.stats_refresh_streaks(p_user_id);
+end;
+$$ language plpgsql;
+
+-- Rebuild every user with entries or goals; returns how many were rebuilt
+create or replace function public.rebuild_all_user_stats() returns integer as $$
+declare
+    rebuilt integer := 0;
+    uid uuid;
+begin
+    for uid in
+        select user_id from public.journal_entries
+        union
+        select user_id from public.goals
+    loop
+        perform public.rebuild_user_stats(uid);
+        rebuilt := rebuilt + 1;
+    end loop;
+    return rebuilt;
+end;
+$$ language plpgsql;
+
+-- Rebuilds touch every user's row: keep them away from API clients (functions are
+-- executable by public by default) and run them with the service role key
+revoke execute on function public.rebuild_user_stats(uuid) from public, anon, authenticated;
+revoke execute on function public.rebuild_all_user_stats() from public, anon, authenticated;
+grant execute on function public.rebuild_user_stats(uuid) to service_role;
+grant execute on function public.rebuild_all_user_stats() to service_role;
+
+-- If row level security is enabled on journal_entries/goals, mirror those
+-- policies here; the backend always filters by user_id itself.
@@ -0,0 +1,4 @@
+-- Record which model tier produced each analysis (see backend/model_router.py).
+-- Run once in the Supabase SQL editor.
+
+alter table public.analyses add column if not exists model_route jsonb;
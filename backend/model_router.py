@@ -0,0 +1,328 @@
+"""Model routing: which model and output budget each LLM call gets.
+
+Tiers and per-endpoint preferences live in model_routes.yaml (MODEL_ROUTES_PATH
+overrides it). ``route()`` starts from the endpoint's preferred tier, moves up
+to a larger tier when the prompt is too big for it, and sizes the output budget
+from the number of entries in the window.
+
+``chat()`` and ``chat_stream()`` run the call through ``llm_gateway``. When the
+chosen tier already has max_concurrency calls in flight, or has not started
+answering (first token) within its timeout_seconds, the call falls back along the
+tier's ``fallback`` chain to a cheaper, faster tier (skipping tiers the prompt
+does not fit). Each tier gets its own first-token budget; the whole call,
+fallbacks included, must finish within the gateway's LLM_TIMEOUT_SECONDS. A
+long answer that is still arriving is never cut off by the tier timeout, and a
+streamed answer only falls back before its first token.
+
+The tier that actually answered, why, and the token counts are recorded on each
+result, and ``stats()`` totals calls, fallbacks, tokens and estimated cost per
+tier. The gateway's per-operation latency is kept per tier too ("checkin:fast").
+"""
+
+from dataclasses import asdict, dataclass, replace
+from pathlib import Path
+from typing import Any, AsyncIterator
+import asyncio
+import logging
+import os
+import yaml
+
+try:
+    from backend.llm_gateway import LLMDeadlineExceeded, llm_gateway
+    from backend.token_budget import count_tokens
+except ModuleNotFoundError:
+    from llm_gateway import LLMDeadlineExceeded, llm_gateway
+    from token_budget import count_tokens
+
+logger = logging.getLogger(__name__)
+
+MODEL_ROUTES_PATH = Path(os.getenv("MODEL_ROUTES_PATH", Path(__file__).parent / "model_routes.yaml"))
+
+
+@dataclass(frozen=True)
+class ModelTier:
+    """One model and the limits it is used under."""
+
+    name: str
+    model: str
+    max_tokens: int
+    max_prompt_tokens: int
+    max_concurrency: int
+    timeout_seconds: float
+    fallback: str | None = None
+    input_cost_per_1m: float = 0.0
+    output_cost_per_1m: float = 0.0
+
+
+@dataclass
+class RouteDecision:
+    """The tier chosen for one call, then updated with the tier that answered.
+
+    ``reason`` is why the answering tier differs from the endpoint's preference:
+    "prompt_size" (routed up), "saturated" or "deadline" (fell back), else None.
+    """
+
+    endpoint: str
+    tier: str
+    model: str
+    max_tokens: int
+    prompt_tokens: int
+    preferred_tier: str
+    reason: str | None = None
+    completion_tokens: int | None = None
+
+    @property
+    def fell_back(self) -> bool:
+        """Answered by a fallback tier: a degraded result that should not be reused."""
+        return self.reason in ("saturated", "deadline")
+
+    def record(self) -> dict[str, Any]:
+        """What is returned and stored alongside a result."""
+        return asdict(self)
+
+
+@dataclass
+class TierStats:
+    calls: int = 0
+    in_flight: int = 0
+    fallbacks_from: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+
+class ModelRouter:
+    """Picks tiers for endpoints and runs calls with saturation and deadline fallback."""
+
+    def __init__(
+        self,
+        tiers: dict[str, ModelTier],
+        routes: dict[str, str],
+        output_base: int = 500,
+        output_per_entry: int = 150,
+        default_tier: str | None = None,
+    ):
+        for tier in tiers.values():
+            if tier.fallback is not None and tier.fallback not in tiers:
+                raise ValueError(f"Tier {tier.name!r} falls back to unknown tier {tier.fallback!r}")
+        for endpoint, tier_name in routes.items():
+            if tier_name not in tiers:
+                raise ValueError(f"Route {endpoint!r} uses unknown tier {tier_name!r}")
+        self.tiers = tiers
+        self.routes = routes
+        self.output_base = output_base
+        self.output_per_entry = output_per_entry
+        # Tiers ordered by how large a prompt they take, for routing up
+        self._by_size = sorted(tiers.values(), key=lambda tier: tier.max_prompt_tokens)
+        self.default_tier = default_tier or self._by_size[-1].name
+        self._stats = {name: TierStats() for name in tiers}
+
+    @classmethod
+    def from_file(cls, path: Path = MODEL_ROUTES_PATH) -> "ModelRouter":
+        data = yaml.safe_load(path.read_text(encoding="utf-8")) or {}
+        tiers = {name: ModelTier(name=name, **fields) for name, fields in (data.get("tiers") or {}).items()}
+        if not tiers:
+            raise ValueError(f"No model tiers defined in {path}")
+        budget = data.get("output_budget") or {}
+        return cls(
+            tiers,
+            dict(data.get("routes") or {}),
+            output_base=int(budget.get("base", 500)),
+            output_per_entry=int(budget.get("per_entry", 150)),
+        )
+
+    def route(
+        self, endpoint: str, prompt_tokens: int, entry_count: int = 1, max_tokens: int | None = None
+    ) -> RouteDecision:
+        """Preferred tier for endpoint, moved up if the prompt does not fit it.
+
+        max_tokens fixes the output budget (still capped by the tier); otherwise
+        it grows with entry_count.
+        """
+        preferred = self.tiers[self.routes.get(endpoint, self.default_tier)]
+        tier, reason = preferred, None
+        if prompt_tokens > tier.max_prompt_tokens:
+            larger = [t for t in self._by_size if t.max_prompt_tokens >= prompt_tokens]
+            tier = larger[0] if larger else self._by_size[-1]
+            reason = "prompt_size"
+        return RouteDecision(
+            endpoint=endpoint,
+            tier=tier.name,
+            model=tier.model,
+            max_tokens=self._output_budget(tier, entry_count, max_tokens),
+            prompt_tokens=prompt_tokens,
+            preferred_tier=preferred.name,
+            reason=reason,
+        )
+
+    def _output_budget(self, tier: ModelTier, entry_count: int, max_tokens: int | None) -> int:
+        if max_tokens is None:
+            max_tokens = self.output_base + self.output_per_entry * max(entry_count, 1)
+        return min(max_tokens, tier.max_tokens)
+
+    def _candidates(self, decision: RouteDecision) -> list[ModelTier]:
+        """The decided tier, then each fallback the prompt still fits."""
+        tier = self.tiers[decision.tier]
+        chain = [tier]
+        seen = {tier.name}
+        while tier.fallback is not None and tier.fallback not in seen:
+            tier = self.tiers[tier.fallback]
+            seen.add(tier.name)
+            if decision.prompt_tokens <= tier.max_prompt_tokens:
+                chain.append(tier)
+        return chain
+
+    def _answered_by(self, decision: RouteDecision, tier: ModelTier, reason: str | None) -> RouteDecision:
+        if tier.name == decision.tier:
+            return decision
+        return replace(
+            decision,
+            tier=tier.name,
+            model=tier.model,
+            max_tokens=min(decision.max_tokens, tier.max_tokens),
+            reason=reason,
+        )
+
+    def _pick(self, candidates: list[ModelTier], index: int) -> bool:
+        """Whether to try candidates[index] now (the last candidate is always tried)."""
+        tier = candidates[index]
+        return index == len(candidates) - 1 or self._stats[tier.name].in_flight < tier.max_concurrency
+
+    def _deadline_left(self, deadline: float) -> float:
+        remaining = deadline - asyncio.get_running_loop().time()
+        if remaining <= 0:
+            raise LLMDeadlineExceeded("LLM call deadline exceeded")
+        return remaining
+
+    async def chat(
+        self,
+        decision: RouteDecision,
+        *,
+        operation: str,
+        user_id: str | None = None,
+        hedge: bool = False,
+        **params: Any,
+    ) -> tuple[Any, RouteDecision]:
+        """Run a chat completion on the decided tier or a fallback.
+
+        Returns the completion and the decision as answered (tier, reason, tokens).
+        """
+        candidates = self._candidates(decision)
+        deadline = asyncio.get_running_loop().time() + llm_gateway.timeout
+        reason = None
+        for index, tier in enumerate(candidates):
+            if not self._pick(candidates, index):
+                reason = "saturated"
+                self._stats[tier.name].fallbacks_from += 1
+                continue
+            answered = self._answered_by(decision, tier, reason)
+            stats = self._stats[tier.name]
+            stats.calls += 1
+            stats.in_flight += 1
+            try:
+                completion = await llm_gateway.chat(
+                    operation=f"{operation}:{tier.name}",
+                    user_id=user_id,
+                    hedge=hedge,
+                    timeout=self._deadline_left(deadline),
+                    first_token_timeout=tier.timeout_seconds,
+                    model=tier.model,
+                    max_tokens=answered.max_tokens,
+                    **params,
+                )
+            except LLMDeadlineExceeded:
+                # Past its first-token budget, or out of total time (then the next tier raises too)
+                if index == len(candidates) - 1:
+                    raise
+                reason = "deadline"
+                stats.fallbacks_from += 1
+                logger.warning(f"Tier {tier.name} timed out for {operation}; falling back to {candidates[index + 1].name}")
+                continue
+            finally:
+                stats.in_flight -= 1
+            usage = getattr(completion, "usage", None)
+            if usage is not None:
+                answered = replace(
+                    answered, prompt_tokens=usage.prompt_tokens, completion_tokens=usage.completion_tokens
+                )
+            self._count_tokens(tier, answered)
+            return completion, answered
+        raise RuntimeError("No model tier available")  # unreachable: the last candidate is always tried
+
+    async def chat_stream(
+        self,
+        decision: RouteDecision,
+        answered: list[RouteDecision],
+        *,
+        operation: str,
+        user_id: str | None = None,
+        **params: Any,
+    ) -> AsyncIterator[str]:
+        """Stream a chat completion on the decided tier or a fallback.
+
+        The decision as answered is appended to ``answered`` once a tier starts
+        producing tokens; completion_tokens is estimated from the streamed text.
+        """
+        candidates = self._candidates(decision)
+        deadline = asyncio.get_running_loop().time() + llm_gateway.timeout
+        reason = None
+        for index, tier in enumerate(candidates):
+            if not self._pick(candidates, index):
+                reason = "saturated"
+                self._stats[tier.name].fallbacks_from += 1
+                continue
+            route = self._answered_by(decision, tier, reason)
+            stats = self._stats[tier.name]
+            stats.calls += 1
+            stats.in_flight += 1
+            parts: list[str] = []
+            try:
+                stream = llm_gateway.chat_stream(
+                    operation=f"{operation}:{tier.name}",
+                    user_id=user_id,
+                    timeout=self._deadline_left(deadline),
+                    first_token_timeout=tier.timeout_seconds,
+                    model=tier.model,
+                    max_tokens=route.max_tokens,
+                    **params,
+                )
+                async for content in stream:
+                    if not parts:
+                        answered.append(route)
+                    parts.append(content)
+                    yield content
+            except LLMDeadlineExceeded:
+                # Once tokens reached the client the answer cannot switch models
+                if parts or index == len(candidates) - 1:
+                    raise
+                reason = "deadline"
+                stats.fallbacks_from += 1
+                logger.warning(f"Tier {tier.name} timed out for {operation}; falling back to {candidates[index + 1].name}")
+                continue
+            finally:
+                stats.in_flight -= 1
+            route.completion_tokens = count_tokens("".join(parts), tier.model)
+            self._count_tokens(tier, route)
+            return
+
+    def _count_tokens(self, tier: ModelTier, route: RouteDecision) -> None:
+        stats = self._stats[tier.name]
+        stats.prompt_tokens += route.prompt_tokens
+        stats.completion_tokens += route.completion_tokens or 0
+
+    def stats(self) -> dict[str, Any]:
+        """Per-tier calls, fallbacks, tokens and estimated cost, plus the routing table."""
+        tiers = {}
+        for name, stats in self._stats.items():
+            tier = self.tiers[name]
+            cost = (
+                stats.prompt_tokens * tier.input_cost_per_1m + stats.completion_tokens * tier.output_cost_per_1m
+            ) / 1_000_000
+            tiers[name] = {
+                "model": tier.model,
+                **asdict(stats),
+                "estimated_cost_usd": round(cost, 4),
+            }
+        return {"routes": self.routes, "tiers": tiers}
+
+
+model_router = ModelRouter.from_file()
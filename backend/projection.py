@@ -0,0 +1,26 @@
+"""Column projection for list endpoints (``?fields=a,b,c``)."""
+
+from fastapi import HTTPException
+
+
+def select_columns(
+    fields: str | None,
+    allowed: tuple[str, ...],
+    required: tuple[str, ...] = ("id",),
+    default: str = "*",
+) -> str:
+    """Validate a comma-separated column list and turn it into a select clause.
+
+    Columns in required are always included (ids for links, keys for cursors).
+    Unknown columns are a 400 rather than being passed through to PostgREST.
+    """
+    if not fields:
+        return default
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = sorted(set(requested) - set(allowed))
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(allowed)}",
+        )
+    return ",".join(column for column in allowed if column in requested or column in required)
@@ -0,0 +1,166 @@
+"""Registry of the YAML prompt templates under routers/prompts/.
+
+Every file is parsed once and its ``*_template`` strings are precompiled into
+literal/placeholder pieces, so building a prompt on the request path is a join
+rather than file I/O, YAML parsing and format-string parsing. Files are checked
+for changes at most every PROMPT_RELOAD_SECONDS: a file is re-read only if its
+mtime changed, and re-parsed only if its content hash changed too.
+
+Each prompt set carries a version id derived from its file content. Caches that
+include it in their keys never serve an answer generated from a different
+prompt, which makes it safe to edit or swap prompts while the server runs.
+"""
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from string import Formatter
+from typing import Any
+import hashlib
+import logging
+import os
+import threading
+import time
+import yaml
+
+logger = logging.getLogger(__name__)
+
+PROMPTS_DIR = Path(__file__).parent / "routers" / "prompts"
+
+# How often (seconds) to look for edited prompt files; 0 disables hot reload
+PROMPT_RELOAD_SECONDS = float(os.getenv("PROMPT_RELOAD_SECONDS", "5"))
+
+
+class PromptTemplate:
+    """A ``str.format``-style template parsed once into literal and field pieces."""
+
+    def __init__(self, source: str):
+        self.source = source
+        self._pieces: list[tuple[str, str | None]] = []
+        self._simple = True
+        for literal, name, spec, conversion in Formatter().parse(source):
+            if name is not None and (spec or conversion or not name.isidentifier()):
+                self._simple = False
+            self._pieces.append((literal, name))
+        self.fields = frozenset(name for _, name in self._pieces if name)
+
+    def render(self, **values: Any) -> str:
+        """Fill the placeholders; raises KeyError for a missing one like str.format."""
+        if not self._simple:
+            return self.source.format(**values)
+        parts: list[str] = []
+        for literal, name in self._pieces:
+            parts.append(literal)
+            if name is not None:
+                parts.append(str(values[name]))
+        return "".join(parts)
+
+
+@dataclass
+class PromptSet:
+    """The prompts from one YAML file, with a version id of its content."""
+
+    name: str
+    version: str
+    texts: dict[str, str]
+    templates: dict[str, PromptTemplate] = field(default_factory=dict)
+
+    def __getitem__(self, key: str) -> str:
+        return self.texts[key]
+
+    def render(self, key: str, **values: Any) -> str:
+        """Render the template stored under key."""
+        return self.templates[key].render(**values)
+
+
+@dataclass
+class _Loaded:
+    path: Path
+    mtime_ns: int
+    digest: str
+    prompts: PromptSet
+
+
+class PromptRegistry:
+    """Loads every prompt file in a directory and keeps them current."""
+
+    def __init__(self, directory: Path = PROMPTS_DIR, reload_seconds: float = PROMPT_RELOAD_SECONDS):
+        self.directory = directory
+        self.reload_seconds = reload_seconds
+        self._loaded: dict[str, _Loaded] = {}
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.reloads = 0
+
+    def load_all(self) -> None:
+        """Load (or refresh) every *.yaml file in the directory."""
+        with self._lock:
+            self._refresh()
+
+    def get(self, name: str) -> PromptSet:
+        """Return the current prompts for name (e.g. "mental_health_checkin")."""
+        if not self._loaded or (
+            self.reload_seconds > 0 and time.monotonic() - self._checked_at >= self.reload_seconds
+        ):
+            with self._lock:
+                self._refresh()
+        try:
+            return self._loaded[name].prompts
+        except KeyError:
+            raise KeyError(f"No prompt file {name}.yaml in {self.directory}")
+
+    def versions(self) -> dict[str, str]:
+        """Version id per prompt set."""
+        return {name: item.prompts.version for name, item in sorted(self._loaded.items())}
+
+    def _refresh(self) -> None:
+        self._checked_at = time.monotonic()
+        seen = set()
+        for path in sorted(self.directory.glob("*.yaml")):
+            name = path.stem
+            seen.add(name)
+            mtime_ns = path.stat().st_mtime_ns
+            current = self._loaded.get(name)
+            if current is not None and current.mtime_ns == mtime_ns:
+                continue
+
+            raw = path.read_bytes()
+            digest = hashlib.sha256(raw).hexdigest()
+            if current is not None and current.digest == digest:
+                # Touched but unchanged
+                current.mtime_ns = mtime_ns
+                continue
+
+            try:
+                prompts = _compile(name, digest, raw)
+            except (yaml.YAMLError, ValueError) as e:
+                if current is None:
+                    raise
+                # Keep serving the last good version rather than failing requests;
+                # the next edit of the file changes its mtime and is tried again
+                logger.error(f"Ignoring invalid prompt file {path.name}: {str(e)}")
+                current.mtime_ns = mtime_ns
+                continue
+
+            self._loaded[name] = _Loaded(path, mtime_ns, digest, prompts)
+            if current is not None:
+                self.reloads += 1
+                logger.info(f"Reloaded prompts {name} (version {prompts.version})")
+
+        for name in set(self._loaded) - seen:
+            del self._loaded[name]
+
+
+def _compile(name: str, digest: str, raw: bytes) -> PromptSet:
+    data = yaml.safe_load(raw)
+    if not isinstance(data, dict) or not all(isinstance(v, str) for v in data.values()):
+        raise ValueError(f"{name}.yaml must map prompt names to strings")
+    templates = {key: PromptTemplate(text) for key, text in data.items() if key.endswith("_template")}
+    return PromptSet(name=name, version=digest[:12], texts=data, templates=templates)
+
+
+registry = PromptRegistry()
+
+
+def load_prompts(name: str = "mental_health_checkin") -> PromptSet:
+    """Current prompts for name, from the registry (no file I/O on the hot path)."""
+    return registry.get(name)
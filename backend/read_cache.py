@@ -0,0 +1,246 @@
+"""Per-user read-through cache for journal entry and goal reads.
+
+Entries and goals only change through this backend's own write handlers, so list
+and detail reads are served from memory until one of those handlers invalidates
+them. Every cached value is stored under a versioned key,
+``user / resource / version / request parameters``, and a write bumps the user's
+version for that resource. Stale values are never deleted one by one: they
+simply stop being looked up and age out of the LRU. A read that races with a
+write stores its result under the old version, where nobody reads it.
+
+Versions live in a ``VersionStore``. The in-memory store only sees this
+process's writes; with several uvicorn workers set READ_CACHE_VERSIONS=sqlite so
+all workers bump and read versions in one SQLite file, and a write on one worker
+invalidates the others' copies on their next read. SQLite calls run in a worker
+thread so they never block the event loop; a version lookup that fails (e.g.
+the file is locked for longer than the busy timeout) is answered as a miss and
+the read goes straight to the database, and a failed bump drops this process's
+copies and leaves other workers' to the TTL. Memory is bounded by the
+approximate JSON size of the cached values (READ_CACHE_MAX_BYTES), with a TTL as
+a backstop for writes made outside the backend.
+"""
+
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class VersionStore(ABC):
+    """Current cache version of each (user, resource)."""
+
+    # Whether calls do blocking I/O and must be kept off the event loop
+    blocking = False
+
+    @abstractmethod
+    def get(self, user_id: str, resource: str) -> int:
+        """The current version (0 if never bumped)."""
+
+    @abstractmethod
+    def bump(self, user_id: str, resource: str) -> None:
+        """Move to a new version, orphaning everything cached under the old one."""
+
+
+class MemoryVersionStore(VersionStore):
+    """Versions in a dict; invalidation is only seen by this process."""
+
+    def __init__(self):
+        self._versions: dict[tuple[str, str], int] = {}
+
+    def get(self, user_id: str, resource: str) -> int:
+        return self._versions.get((user_id, resource), 0)
+
+    def bump(self, user_id: str, resource: str) -> None:
+        key = (user_id, resource)
+        self._versions[key] = self._versions.get(key, 0) + 1
+
+
+class SQLiteVersionStore(VersionStore):
+    """Versions in a SQLite file shared by every worker on the host."""
+
+    blocking = True
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._connect().execute(
+            """
+            CREATE TABLE IF NOT EXISTS read_cache_versions (
+                user_id TEXT NOT NULL,
+                resource TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                PRIMARY KEY (user_id, resource)
+            )
+            """
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        """One connection per thread; WAL keeps reads from waiting on bumps."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, user_id: str, resource: str) -> int:
+        row = self._connect().execute(
+            "SELECT version FROM read_cache_versions WHERE user_id = ? AND resource = ?", (user_id, resource)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def bump(self, user_id: str, resource: str) -> None:
+        self._connect().execute(
+            """
+            INSERT INTO read_cache_versions (user_id, resource, version) VALUES (?, ?, 1)
+            ON CONFLICT(user_id, resource) DO UPDATE SET version = version + 1
+            """,
+            (user_id, resource),
+        )
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate memory cost of a cached value: its nbytes if it has one, else the length of its JSON."""
+    nbytes = getattr(value, "nbytes", None)
+    if nbytes is not None:
+        return nbytes
+    return len(json.dumps(value, default=str, separators=(",", ":")))
+
+
+class UserReadCache:
+    """Versioned, size-bounded LRU of read results, with hit/miss counters."""
+
+    def __init__(self, versions: VersionStore, max_bytes: int = 64 * 1024 * 1024, ttl_seconds: float = 300.0):
+        self.versions = versions
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        # key -> (expires_at, size, value)
+        self._data: OrderedDict[str, tuple[float, int, Any]] = OrderedDict()
+        self._bytes = 0
+        # Loads in progress, so concurrent misses for one key share a database read
+        self._loading: dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    async def _call(self, method: Callable[..., Any], *args: Any) -> Any:
+        if not self.versions.blocking:
+            return method(*args)
+        return await asyncio.to_thread(method, *args)
+
+    async def get_or_load(
+        self, user_id: str, resource: str, key: str, load: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """The cached value for key, or load() stored under the current version.
+
+        Exceptions from load() are not cached.
+        """
+        try:
+            version = await self._call(self.versions.get, user_id, resource)
+        except sqlite3.OperationalError as e:
+            # Without the current version nothing cached can be trusted, nor stored
+            logger.warning(f"Read cache version lookup failed, reading through: {str(e)}")
+            self.misses += 1
+            return await load()
+        full_key = f"{user_id}/{resource}/{version}/{key}"
+        item = self._data.get(full_key)
+        if item is not None:
+            if item[0] > time.monotonic():
+                self._data.move_to_end(full_key)
+                self.hits += 1
+                return item[2]
+            self._drop(full_key)
+        self.misses += 1
+
+        task = self._loading.get(full_key)
+        if task is None:
+            task = asyncio.ensure_future(load())
+            self._loading[full_key] = task
+            task.add_done_callback(lambda done: self._loaded(full_key, done))
+        # Shielded: one caller going away must not cancel the read the others wait on
+        return await asyncio.shield(task)
+
+    def _loaded(self, key: str, task: asyncio.Task) -> None:
+        self._loading.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        self._store(key, task.result())
+
+    def _store(self, key: str, value: Any) -> None:
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        self._drop(key)
+        self._data[key] = (time.monotonic() + self.ttl_seconds, size, value)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            oldest = next(iter(self._data))
+            self._drop(oldest)
+            self.evictions += 1
+
+    def _drop(self, key: str) -> None:
+        item = self._data.pop(key, None)
+        if item is not None:
+            self._bytes -= item[1]
+
+    async def invalidate(self, user_id: str, *resources: str) -> None:
+        """Called after a write: the user's cached reads of these resources are no longer served.
+
+        Never raises, since the write has already committed. If the version
+        cannot be bumped, this process's copies are dropped instead and other
+        workers serve theirs until the TTL expires.
+        """
+        for resource in resources:
+            try:
+                await self._call(self.versions.bump, user_id, resource)
+            except sqlite3.Error as e:
+                logger.error(f"Read cache version bump failed for {resource}, dropping local copies: {str(e)}")
+                prefix = f"{user_id}/{resource}/"
+                for key in [key for key in self._data if key.startswith(prefix)]:
+                    self._drop(key)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._bytes = 0
+
+    def stats(self) -> dict[str, Any]:
+        """Hit/miss counters for this process, size and evictions."""
+        lookups = self.hits + self.misses
+        return {
+            "versions": type(self.versions).__name__,
+            "entries": len(self._data),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def create_read_cache() -> UserReadCache:
+    """Build the read cache from READ_CACHE_* environment variables."""
+    versions_name = os.getenv("READ_CACHE_VERSIONS", "memory").lower()
+    if versions_name == "sqlite":
+        versions: VersionStore = SQLiteVersionStore(os.getenv("READ_CACHE_VERSIONS_PATH", "read_cache_versions.sqlite3"))
+    elif versions_name == "memory":
+        versions = MemoryVersionStore()
+    else:
+        raise ValueError(f"Unknown READ_CACHE_VERSIONS: {versions_name}")
+    return UserReadCache(
+        versions,
+        max_bytes=int(os.getenv("READ_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+        ttl_seconds=float(os.getenv("READ_CACHE_TTL_SECONDS", "300")),
+    )
+
+
+read_cache = create_read_cache()
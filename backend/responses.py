@@ -0,0 +1,208 @@
+"""Response encoding: fast JSON, ETags with 304s, compression, timestamp normalization.
+
+``FastJSONResponse`` renders with orjson (a declared dependency; the guarded
+import falls back to the same compact ``json.dumps`` as Starlette's
+JSONResponse if it is missing). It is the app's default response class.
+
+List and detail reads of entries and goals skip pydantic altogether: the rows
+PostgREST returns are already JSON-shaped, so they are rendered to bytes once
+(``RenderedJSON``), kept in the read cache, and sent as is. Their strong ETag is
+derived from each row's id and updated_at, so ``conditional_response`` can
+answer a matching If-None-Match with an empty 304.
+
+``CompressionMiddleware`` brotli-compresses bodies over COMPRESSION_MIN_BYTES
+for clients that accept it (brotli is declared like orjson and guarded the same
+way) and gzips them otherwise. A compressed response's ETag gets the encoding appended, so
+each encoding has its own strong validator.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Iterable
+import hashlib
+import json
+import os
+
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.middleware.gzip import GZipMiddleware, GZipResponder, IdentityResponder
+
+try:
+    import orjson
+except ModuleNotFoundError:
+    orjson = None
+
+try:
+    import brotli
+except ModuleNotFoundError:
+    brotli = None
+
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+
+TIMESTAMP_COLUMNS = ("created_at", "updated_at")
+
+
+def dumps(content: Any) -> bytes:
+    """Compact UTF-8 JSON."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson when available."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def _is_iso(value: str) -> bool:
+    return "T" in value and not value.endswith("+00")
+
+
+def _to_iso(value: str) -> str:
+    # PostgreSQL text format "2025-12-29 11:06:37.634234+00" -> "2025-12-29T11:06:37.634234+00:00"
+    if " " in value and "T" not in value:
+        value = value.replace(" ", "T")
+    if value.endswith("+00"):
+        value += ":00"
+    return value
+
+
+def normalize_timestamps(rows: list[dict], columns: Iterable[str] = TIMESTAMP_COLUMNS) -> list[dict]:
+    """Rewrite PostgreSQL-format timestamps in rows to ISO 8601, in place, a column at a time.
+
+    A column's format is decided from its first value, so when PostgREST already
+    returns ISO 8601 (the usual case) a page costs one check per column instead
+    of a string rewrite per field.
+    """
+    for column in columns:
+        sample = next((row[column] for row in rows if row.get(column)), None)
+        if sample is None or _is_iso(str(sample)):
+            continue
+        for row in rows:
+            value = row.get(column)
+            if value:
+                row[column] = _to_iso(str(value))
+    return rows
+
+
+def rows_etag(rows: Iterable[dict], salt: str = "") -> str:
+    """Strong ETag for a response built from rows.
+
+    Rows are identified by id and updated_at (bumped by a trigger on every
+    change); rows without both are hashed whole. salt covers whatever else
+    shapes the body (selected columns, paging).
+    """
+    digest = hashlib.blake2b(salt.encode("utf-8"), digest_size=16)
+    for row in rows:
+        if row.get("id") is not None and row.get("updated_at") is not None:
+            digest.update(f"\n{row['id']}@{row['updated_at']}".encode("utf-8"))
+        else:
+            digest.update(b"\n" + dumps(row))
+    return f'"{digest.hexdigest()}"'
+
+
+@dataclass(frozen=True)
+class RenderedJSON:
+    """A JSON body rendered once, with its ETag, ready to be sent (or cached) as is."""
+
+    body: bytes
+    etag: str
+
+    @classmethod
+    def of_rows(cls, content: Any, rows: list[dict], salt: str = "") -> "RenderedJSON":
+        """Render content, tagging it by the rows it was built from."""
+        return cls(dumps(content), rows_etag(rows, salt))
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.body) + len(self.etag)
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Whether an If-None-Match header matches etag (weak comparison, any content encoding)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.strip('"')
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip().removeprefix("W/").strip('"')
+        # CompressionMiddleware appends "-gzip" / "-br"; the hex digest itself has no "-"
+        if candidate.split("-", 1)[0] == opaque:
+            return True
+    return False
+
+
+def conditional_response(request: Request, rendered: RenderedJSON) -> Response:
+    """200 with the rendered body, or an empty 304 if the client already has this version."""
+    # no-cache: browsers keep the body but revalidate it with If-None-Match every time
+    headers = {"ETag": rendered.etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), rendered.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(rendered.body, media_type="application/json", headers=headers)
+
+
+class _EncodedETag:
+    """Responder mixin: suffix the ETag of a response it compressed with the encoding."""
+
+    content_encoding: str
+
+    async def __call__(self, scope, receive, send):
+        async def send_tagged(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(raw=message["headers"])
+                etag = headers.get("etag")
+                if etag and etag.endswith('"') and headers.get("content-encoding") == self.content_encoding:
+                    headers["etag"] = f'{etag[:-1]}-{self.content_encoding}"'
+            await send(message)
+
+        await super().__call__(scope, receive, send_tagged)
+
+
+class GZipETagResponder(_EncodedETag, GZipResponder):
+    pass
+
+
+class BrotliResponder(_EncodedETag, IdentityResponder):
+    content_encoding = "br"
+
+    def __init__(self, app, minimum_size: int, quality: int):
+        super().__init__(app, minimum_size)
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        # Flush after each streamed chunk so NDJSON exports still arrive progressively
+        data = self.compressor.process(body)
+        return data + (self.compressor.flush() if more_body else self.compressor.finish())
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """Brotli or gzip for bodies of at least minimum_size bytes (event streams are left alone)."""
+
+    def __init__(
+        self,
+        app,
+        minimum_size: int = COMPRESSION_MIN_BYTES,
+        gzip_level: int = GZIP_LEVEL,
+        brotli_quality: int = BROTLI_QUALITY,
+    ):
+        super().__init__(app, minimum_size=minimum_size, compresslevel=gzip_level)
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept = Headers(scope=scope).get("accept-encoding", "")
+        if brotli is not None and "br" in accept:
+            responder = BrotliResponder(self.app, self.minimum_size, self.brotli_quality)
+        elif "gzip" in accept:
+            responder = GZipETagResponder(self.app, self.minimum_size, compresslevel=self.compresslevel)
+        else:
+            responder = IdentityResponder(self.app, self.minimum_size)
+        await responder(scope, receive, send)
@@ -0,0 +1,316 @@
+"""Background analysis jobs over arbitrary date ranges, with persisted history."""
+
+from fastapi import APIRouter, Depends, HTTPException
+from typing import Any
+from datetime import date, datetime, time, timedelta, timezone
+import asyncio
+import logging
+import os
+import uuid
+
+try:
+    from backend.schemas import User, Analysis, AnalysisCreate
+    from backend.dependencies import get_current_user, supabase
+    from backend.analysis_jobs import AnalysisJob, AnalysisJobQueue, JobQueueFull
+    from backend.routers.inference import (
+        CHECKIN_ENTRY_COLUMNS,
+        analysis_cache,
+        analysis_flights,
+        checkin_flight_key,
+        complete_checkin,
+        fetch_open_goals,
+        render_checkin_context,
+    )
+    from backend.responses import normalize_timestamps
+except ModuleNotFoundError:
+    from schemas import User, Analysis, AnalysisCreate
+    from dependencies import get_current_user, supabase
+    from analysis_jobs import AnalysisJob, AnalysisJobQueue, JobQueueFull
+    from routers.inference import (
+        CHECKIN_ENTRY_COLUMNS,
+        analysis_cache,
+        analysis_flights,
+        checkin_flight_key,
+        complete_checkin,
+        fetch_open_goals,
+        render_checkin_context,
+    )
+    from responses import normalize_timestamps
+
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api", tags=["analysis"])
+
+MAX_ANALYSIS_RANGE_DAYS = 366
+# Below PostgREST's max-rows cap, which would otherwise truncate a long range silently
+ENTRY_PAGE_SIZE = 500
+# Queued or running analyses older than this were lost with a process that died
+STALE_ANALYSIS_SECONDS = float(os.getenv("ANALYSIS_STALE_SECONDS", "900"))
+# How often every process sweeps for them, so a crash is cleaned up without waiting for a restart
+STALE_SWEEP_SECONDS = float(os.getenv("ANALYSIS_STALE_SWEEP_SECONDS", "60"))
+INTERRUPTED_ERROR = "Interrupted by a server restart or crash; please run the analysis again."
+
+
+ANALYSIS_TIMESTAMPS = ("created_at", "completed_at")
+
+
+def format_analysis_timestamps(analysis: dict) -> dict:
+    """Convert PostgreSQL timestamps to ISO 8601 format."""
+    return normalize_timestamps([analysis], ANALYSIS_TIMESTAMPS)[0]
+
+
+async def fetch_entries_in_range(user_id: str, start_date: str, end_date: str) -> list[dict[str, Any]]:
+    """Fetch a user's entries created between two dates (inclusive), oldest first.
+
+    Paged in (created_at, id) keyset order so every entry in the range is read.
+    """
+    start = datetime.combine(date.fromisoformat(start_date), time.min, tzinfo=timezone.utc)
+    end = datetime.combine(date.fromisoformat(end_date), time.min, tzinfo=timezone.utc) + timedelta(days=1)
+    entries: list[dict[str, Any]] = []
+    after: tuple[str, str] | None = None
+    while True:
+        query = (
+            supabase.table("journal_entries")
+            .select(CHECKIN_ENTRY_COLUMNS)
+            .eq("user_id", user_id)
+            .gte("created_at", start.isoformat())
+            .lt("created_at", end.isoformat())
+        )
+        if after is not None:
+            query = query.or_(f'created_at.gt."{after[0]}",and(created_at.eq."{after[0]}",id.gt.{after[1]})')
+        response = await query.order("created_at").order("id").limit(ENTRY_PAGE_SIZE).execute()
+        page = response.data or []
+        entries.extend(page)
+        if len(page) < ENTRY_PAGE_SIZE:
+            return entries
+        after = (str(page[-1]["created_at"]), str(page[-1]["id"]))
+
+
+async def find_completed_analysis(user_id: str, input_hash: str) -> dict[str, Any] | None:
+    """Return the text and model route of an earlier completed analysis with the same inputs, if any."""
+    response = await (
+        supabase.table("analyses")
+        .select("analysis, model_route")
+        .eq("user_id", user_id)
+        .eq("input_hash", input_hash)
+        .eq("status", "completed")
+        .limit(1)
+        .execute()
+    )
+    return response.data[0] if response.data else None
+
+
+async def update_analysis(analysis_id: str, fields: dict[str, Any]) -> None:
+    """Patch an analysis row (status transitions and results)."""
+    await supabase.table("analyses").update(fields).eq("id", analysis_id).execute()
+
+
+def failed_fields(error: str) -> dict[str, Any]:
+    return {"status": "failed", "error": error, "completed_at": datetime.now(timezone.utc).isoformat()}
+
+
+async def fail_dropped_analysis(job: AnalysisJob) -> None:
+    """Record a queued analysis that shutdown dropped before it started."""
+    await update_analysis(job.id, failed_fields(INTERRUPTED_ERROR))
+
+
+async def fail_stale_analyses() -> None:
+    """Mark analyses left queued or running by a process that died as failed.
+
+    Only rows older than ANALYSIS_STALE_SECONDS are touched, so jobs another
+    live worker is still running are left alone. Never raises: a failure here
+    must not block startup or stop the periodic sweep.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=STALE_ANALYSIS_SECONDS)
+    try:
+        response = await (
+            supabase.table("analyses")
+            .update(failed_fields(INTERRUPTED_ERROR))
+            .in_("status", ["queued", "running"])
+            .lt("created_at", cutoff.isoformat())
+            .execute()
+        )
+        if response.data:
+            logger.warning(f"Marked {len(response.data)} interrupted analyses as failed")
+    except Exception as e:
+        logger.error(f"Failed to clean up interrupted analyses: {str(e)}")
+
+
+async def sweep_stale_analyses() -> None:
+    """Run fail_stale_analyses every ANALYSIS_STALE_SWEEP_SECONDS until cancelled."""
+    while True:
+        await fail_stale_analyses()
+        await asyncio.sleep(STALE_SWEEP_SECONDS)
+
+
+async def claim_analysis(analysis_id: str) -> bool:
+    """Move a queued analysis to running; False if a sweep already failed it."""
+    response = await (
+        supabase.table("analyses")
+        .update({"status": "running"})
+        .eq("id", analysis_id)
+        .eq("status", "queued")
+        .execute()
+    )
+    return bool(response.data)
+
+
+async def run_analysis_job(job: AnalysisJob) -> None:
+    """Worker entry point: run one queued analysis and persist its result."""
+    try:
+        if not await claim_analysis(job.id):
+            logger.warning(f"Skipping analysis {job.id}: no longer queued")
+            return
+        entries = await fetch_entries_in_range(
+            job.user_id, job.payload["start_date"], job.payload["end_date"]
+        )
+        if not entries:
+            await update_analysis(job.id, failed_fields("No journal entries found in this date range."))
+            return
+
+        goals = await fetch_open_goals(job.user_id)
+        context = render_checkin_context(entries, goals, len(entries), "analysis_range", user_id=job.user_id)
+        input_hash = context.cache_key()
+
+        # Identical inputs are answered from the cache or from an earlier stored result
+        cached = await analysis_cache.get(input_hash)
+        model_route = None
+        reusable = True
+        if cached is not None:
+            analysis_text = cached["analysis"]
+            model_route = cached.get("model_route")
+        else:
+            earlier = await find_completed_analysis(job.user_id, input_hash)
+            if earlier is not None:
+                analysis_text, model_route = earlier["analysis"], earlier.get("model_route")
+            else:
+                analysis_text = await analysis_flights.do(
+                    checkin_flight_key(job.user_id, context, input_hash),
+                    lambda: complete_checkin(context, input_hash),
+                )
+                model_route = context.route.record()
+                # A fallback tier's answer must not satisfy later identical requests
+                reusable = not context.route.fell_back
+
+        await update_analysis(job.id, {
+            "status": "completed",
+            "input_hash": input_hash if reusable else None,
+            "date_range": context.date_range,
+            "entry_count": context.entry_count,
+            "goals_analyzed": context.goals_analyzed,
+            "analysis": analysis_text,
+            "model_route": model_route,
+            "completed_at": datetime.now(timezone.utc).isoformat(),
+        })
+    except asyncio.CancelledError:
+        # Shutdown cancelled the job: record it before the process goes away
+        await asyncio.shield(update_analysis(job.id, failed_fields(INTERRUPTED_ERROR)))
+        raise
+    except Exception as e:
+        await update_analysis(job.id, failed_fields(f"Failed to generate analysis: {str(e)}"))
+        raise
+
+
+analysis_queue = AnalysisJobQueue(
+    run_analysis_job,
+    workers=int(os.getenv("ANALYSIS_WORKERS", "4")),
+    per_user_limit=int(os.getenv("ANALYSIS_PER_USER_CONCURRENCY", "1")),
+    max_pending=int(os.getenv("ANALYSIS_MAX_PENDING", "100")),
+    max_pending_per_user=int(os.getenv("ANALYSIS_MAX_PENDING_PER_USER", "5")),
+    on_dropped=fail_dropped_analysis,
+)
+
+
+@router.get("/analysis/health")
+async def analysis_health() -> dict[str, Any]:
+    """Health check and queue depth for the analysis workers."""
+    return {"status": "ok", "message": "Analysis router is ready", "queue": analysis_queue.stats()}
+
+
+@router.post("/post_analysis", status_code=202)
+async def post_analysis(
+    analysis_request: AnalysisCreate,
+    current_user: User = Depends(get_current_user),
+) -> Analysis:
+    """Queue an analysis of the user's entries between start_date and end_date.
+
+    Returns immediately with the queued job; poll get_analysis/{id} for the result.
+    """
+    if analysis_request.end_date < analysis_request.start_date:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+    if (analysis_request.end_date - analysis_request.start_date).days >= MAX_ANALYSIS_RANGE_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Date range must be at most {MAX_ANALYSIS_RANGE_DAYS} days",
+        )
+    if analysis_queue.pending(current_user.id) >= analysis_queue.max_pending_per_user:
+        raise HTTPException(status_code=429, detail="Too many analyses in progress for this user")
+
+    try:
+        insert_payload = analysis_request.model_dump(mode="json")
+        insert_payload["id"] = str(uuid.uuid4())
+        insert_payload["user_id"] = current_user.id
+        insert_payload["status"] = "queued"
+        response = await supabase.table("analyses").insert(insert_payload).execute()
+        row = response.data[0]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    try:
+        analysis_queue.submit(AnalysisJob(
+            id=row["id"],
+            user_id=current_user.id,
+            payload={
+                "start_date": insert_payload["start_date"],
+                "end_date": insert_payload["end_date"],
+            },
+        ))
+    except JobQueueFull as e:
+        await update_analysis(row["id"], failed_fields(str(e)))
+        raise HTTPException(status_code=429, detail=str(e))
+
+    return format_analysis_timestamps(row)
+
+
+@router.get("/get_analyses")
+async def get_analyses(
+    limit: int = 50,
+    current_user: User = Depends(get_current_user),
+) -> list[Analysis]:
+    """Retrieve the user's analysis history, newest first."""
+    try:
+        response = await (
+            supabase.table("analyses")
+            .select("*")
+            .eq("user_id", current_user.id)
+            .order("created_at", desc=True)
+            .limit(min(max(limit, 1), 200))
+            .execute()
+        )
+        return normalize_timestamps(response.data, ANALYSIS_TIMESTAMPS)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/get_analysis/{analysis_id}")
+async def get_analysis(
+    analysis_id: str,
+    current_user: User = Depends(get_current_user),
+) -> Analysis:
+    """Retrieve one analysis (and its status) by ID for the authenticated user."""
+    try:
+        response = await (
+            supabase.table("analyses")
+            .select("*")
+            .eq("id", analysis_id)
+            .eq("user_id", current_user.id)
+            .execute()
+        )
+        if not response.data:
+            raise HTTPException(status_code=404, detail="Analysis not found")
+        return format_analysis_timestamps(response.data[0])
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
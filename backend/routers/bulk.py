@@ -0,0 +1,268 @@
+"""Bulk export and import of journal entries and goals.
+
+Export streams the user's whole history of one table as NDJSON (one JSON object
+per line) or CSV. It reads (created_at, id) keyset pages and writes each page as
+it arrives, so memory use stays flat however many rows there are.
+
+Import reads an NDJSON upload line by line, validates each line with the same
+schemas as the single-row endpoints, and inserts valid rows in multi-row
+requests of IMPORT_BATCH_SIZE. Bad lines are reported by line number and never
+block the rest: a batch the database rejects for a data or constraint error is
+retried row by row to find them. Any other failure (a timeout, a dropped
+connection) is not retried, since the batch may have committed. The NDJSON produced by export can be imported as is; ids and
+updated_at are assigned fresh, created_at is kept.
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ValidationError
+from typing import Any, AsyncIterator
+from datetime import datetime, timezone
+from postgrest.exceptions import APIError as PostgrestAPIError
+import csv
+import io
+import logging
+import os
+
+try:
+    from backend.schemas import User, JournalEntryImport, GoalImport, BulkImportResult
+    from backend.dependencies import get_current_user, supabase
+    from backend.responses import dumps, normalize_timestamps
+    from backend.vector_index import schedule_entry_embeddings
+    from backend.fulltext_index import fulltext_store
+    from backend.read_cache import read_cache
+except ModuleNotFoundError:
+    from schemas import User, JournalEntryImport, GoalImport, BulkImportResult
+    from dependencies import get_current_user, supabase
+    from responses import dumps, normalize_timestamps
+    from vector_index import schedule_entry_embeddings
+    from fulltext_index import fulltext_store
+    from read_cache import read_cache
+
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api", tags=["bulk"])
+
+EXPORT_PAGE_SIZE = int(os.getenv("EXPORT_PAGE_SIZE", "1000"))
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "500"))
+IMPORT_MAX_ROWS = int(os.getenv("IMPORT_MAX_ROWS", "100000"))
+# Longest accepted NDJSON line, so one malformed upload cannot buffer unbounded memory
+IMPORT_MAX_LINE_BYTES = 1_000_000
+MAX_REPORTED_ERRORS = 100
+# SQLSTATE classes of errors caused by a row's data (22: data exception, 23: constraint
+# violation); the statement was rolled back, so the batch can be retried row by row
+ROW_ERROR_SQLSTATE_CLASSES = ("22", "23")
+
+# Table -> exported columns (in CSV column order), import schema
+BULK_TABLES: dict[str, tuple[tuple[str, ...], type[BaseModel]]] = {
+    "journal_entries": (("id", "created_at", "updated_at", "content"), JournalEntryImport),
+    "goals": (("id", "created_at", "updated_at", "title", "status", "body_text"), GoalImport),
+}
+
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+
+def bulk_table(table: str) -> tuple[tuple[str, ...], type[BaseModel]]:
+    if table not in BULK_TABLES:
+        raise HTTPException(status_code=404, detail=f"Unknown table {table!r}; use one of {', '.join(BULK_TABLES)}")
+    return BULK_TABLES[table]
+
+
+async def fetch_page(table: str, user_id: str, columns: tuple[str, ...], after: tuple[str, str] | None) -> list[dict]:
+    """The next EXPORT_PAGE_SIZE rows in (created_at, id) order after a keyset position."""
+    query = supabase.table(table).select(",".join(columns)).eq("user_id", user_id)
+    if after is not None:
+        query = query.or_(f'created_at.gt."{after[0]}",and(created_at.eq."{after[0]}",id.gt.{after[1]})')
+    response = await query.order("created_at").order("id").limit(EXPORT_PAGE_SIZE).execute()
+    return response.data or []
+
+
+async def export_pages(table: str, user_id: str, first: list[dict]) -> AsyncIterator[list[dict]]:
+    """Yield first, then every following page until the table is exhausted."""
+    columns, _ = BULK_TABLES[table]
+    page = first
+    while page:
+        yield page
+        if len(page) < EXPORT_PAGE_SIZE:
+            return
+        page = await fetch_page(table, user_id, columns, (str(page[-1]["created_at"]), str(page[-1]["id"])))
+
+
+async def render_ndjson(table: str, pages: AsyncIterator[list[dict]]) -> AsyncIterator[bytes]:
+    async for page in pages:
+        yield b"".join(dumps(row) + b"\n" for row in normalize_timestamps(page))
+
+
+async def render_csv(table: str, pages: AsyncIterator[list[dict]]) -> AsyncIterator[str]:
+    columns, _ = BULK_TABLES[table]
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore")
+    writer.writeheader()
+    async for page in pages:
+        writer.writerows(normalize_timestamps(page))
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+@router.get("/export/{table}")
+async def export_table(
+    table: str,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    current_user: User = Depends(get_current_user),
+) -> StreamingResponse:
+    """Stream every journal entry or goal of the user, oldest first, as NDJSON or CSV."""
+    columns, _ = bulk_table(table)
+    try:
+        # Read the first page before streaming starts, so a database error is still a 500
+        first = await fetch_page(table, current_user.id, columns, None)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    pages = export_pages(table, current_user.id, first)
+    body = render_csv(table, pages) if format == "csv" else render_ndjson(table, pages)
+    filename = f"{table}-{datetime.now(timezone.utc):%Y%m%d}.{format}"
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+async def ndjson_lines(request: Request) -> AsyncIterator[tuple[int, bytes]]:
+    """(line number, line) for each non-blank line of the request body, read as it arrives."""
+    buffer = b""
+    number = 0
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        if len(buffer) > IMPORT_MAX_LINE_BYTES:
+            raise HTTPException(status_code=413, detail=f"Line {number + len(lines) + 1} is longer than {IMPORT_MAX_LINE_BYTES} bytes")
+        for line in lines:
+            number += 1
+            if line.strip():
+                yield number, line
+    if buffer.strip():
+        yield number + 1, buffer
+
+
+def is_row_error(error: Exception) -> bool:
+    """Whether an insert failed on the rows themselves (and nothing was written)."""
+    return isinstance(error, PostgrestAPIError) and str(error.code or "").startswith(ROW_ERROR_SQLSTATE_CLASSES)
+
+
+def describe_validation_error(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(part) for part in e['loc']) or 'row'}: {e['msg']}" for e in error.errors())
+
+
+class ImportBatch:
+    """Validated rows waiting to be inserted, and the running totals of one import."""
+
+    def __init__(self, table: str, user_id: str):
+        self.table = table
+        self.user_id = user_id
+        self.rows: list[tuple[int, dict[str, Any]]] = []
+        self.received = 0
+        self.imported = 0
+        self.failed = 0
+        self.errors: list[dict[str, Any]] = []
+
+    def reject(self, line: int, error: str) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": error})
+
+    async def flush(self) -> None:
+        """Insert the buffered rows in one request; if rows were rejected, row by row to find the bad ones."""
+        rows, self.rows = self.rows, []
+        if not rows:
+            return
+        try:
+            inserted = await self._insert([payload for _, payload in rows])
+        except Exception as e:
+            if not is_row_error(e):
+                # Possibly committed before the failure: retrying could insert the rows twice
+                logger.error(f"Bulk insert of {len(rows)} {self.table} rows failed: {str(e)}")
+                for line, _ in rows:
+                    self.reject(line, f"Batch insert failed, not retried (rows may have been imported): {str(e)}")
+                return
+            if len(rows) == 1:
+                self.reject(rows[0][0], str(e))
+                return
+            logger.info(f"Bulk insert of {len(rows)} {self.table} rows failed ({str(e)}); retrying row by row")
+            inserted = []
+            for line, payload in rows:
+                try:
+                    inserted.extend(await self._insert([payload]))
+                except Exception as e:
+                    self.reject(line, str(e))
+        self.imported += len(inserted)
+        if inserted:
+            await read_cache.invalidate(self.user_id, self.table)
+        if self.table == "journal_entries" and inserted:
+            self._index_entries(inserted)
+
+    async def _insert(self, payloads: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        # missing=default: rows without created_at get the column default, not NULL
+        response = await supabase.table(self.table).insert(payloads, default_to_null=False).execute()
+        return response.data or []
+
+    def _index_entries(self, entries: list[dict[str, Any]]) -> None:
+        try:
+            for entry in entries:
+                fulltext_store.index_entry(self.user_id, entry)
+        except Exception as e:
+            # Not fatal: the entries are imported, they are only missing from keyword search
+            logger.error(f"Failed to index {len(entries)} imported entries: {str(e)}")
+        # Embedded in the background, the whole batch in one job
+        schedule_entry_embeddings(self.user_id, entries)
+
+
+@router.post("/import/{table}")
+async def import_table(
+    table: str,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+) -> BulkImportResult:
+    """Create journal entries or goals from an NDJSON upload (one object per line).
+
+    Each line is validated like a single create (plus an optional created_at);
+    invalid lines and rows the database rejects are listed in errors by line
+    number while the rest are imported. Lines are inserted IMPORT_BATCH_SIZE
+    rows per request. Imported entries are added to the search indexes; entry
+    summaries are not generated for them.
+    """
+    _, schema = bulk_table(table)
+    batch = ImportBatch(table, current_user.id)
+    try:
+        async for line, raw in ndjson_lines(request):
+            batch.received += 1
+            if batch.received > IMPORT_MAX_ROWS:
+                raise HTTPException(status_code=413, detail=f"Imports are limited to {IMPORT_MAX_ROWS} rows")
+            try:
+                row = schema.model_validate_json(raw)
+            except ValidationError as e:
+                batch.reject(line, describe_validation_error(e))
+                continue
+            payload = row.model_dump(mode="json", exclude_none=True)
+            payload["user_id"] = current_user.id
+            batch.rows.append((line, payload))
+            if len(batch.rows) >= IMPORT_BATCH_SIZE:
+                await batch.flush()
+        await batch.flush()
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    logger.info(f"Imported {batch.imported}/{batch.received} {table} rows for user {current_user.id}")
+    return {
+        "table": table,
+        "received": batch.received,
+        "imported": batch.imported,
+        "failed": batch.failed,
+        "errors": batch.errors,
+    }
@@ -0,0 +1,119 @@
+"""Dashboard aggregate endpoint: every dashboard card's data in one request."""
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Any
+import asyncio
+
+try:
+    from backend.schemas import User, Dashboard
+    from backend.dependencies import get_current_user, supabase
+    from backend.projection import select_columns
+    from backend.routers.journal import ENTRY_COLUMNS
+    from backend.responses import normalize_timestamps
+    from backend.routers.analysis import format_analysis_timestamps
+except ModuleNotFoundError:
+    from schemas import User, Dashboard
+    from dependencies import get_current_user, supabase
+    from projection import select_columns
+    from routers.journal import ENTRY_COLUMNS
+    from responses import normalize_timestamps
+    from routers.analysis import format_analysis_timestamps
+
+
+router = APIRouter(prefix="/api", tags=["dashboard"])
+
+GOAL_COLUMNS = ("id", "user_id", "title", "status", "body_text", "created_at", "updated_at")
+ANALYSIS_COLUMNS = (
+    "id", "status", "start_date", "end_date", "date_range", "entry_count",
+    "goals_analyzed", "analysis", "created_at", "completed_at",
+)
+
+# Only the columns the dashboard cards render, unless the caller asks for others
+DEFAULT_ENTRY_FIELDS = "id,created_at,content"
+DEFAULT_GOAL_FIELDS = "id,title,body_text"
+DEFAULT_ANALYSIS_FIELDS = "id,date_range,entry_count,completed_at"
+
+
+async def fetch_recent_entries(user_id: str, select: str, limit: int) -> tuple[list[dict[str, Any]], int]:
+    """Newest entries plus the user's total entry count, in one query."""
+    response = await (
+        supabase.table("journal_entries")
+        .select(select, count="exact")
+        .eq("user_id", user_id)
+        .order("created_at", desc=True)
+        .limit(limit)
+        .execute()
+    )
+    return response.data or [], response.count or 0
+
+
+async def fetch_active_goals(user_id: str, select: str, limit: int) -> tuple[list[dict[str, Any]], int]:
+    """Newest active goals plus the number of active goals, in one query."""
+    response = await (
+        supabase.table("goals")
+        .select(select, count="exact")
+        .eq("user_id", user_id)
+        .eq("status", "active")
+        .order("created_at", desc=True)
+        .limit(limit)
+        .execute()
+    )
+    return response.data or [], response.count or 0
+
+
+async def fetch_latest_analysis(user_id: str, select: str) -> dict[str, Any] | None:
+    """The user's most recently completed analysis, if any."""
+    response = await (
+        supabase.table("analyses")
+        .select(select)
+        .eq("user_id", user_id)
+        .eq("status", "completed")
+        .order("completed_at", desc=True)
+        .limit(1)
+        .execute()
+    )
+    return response.data[0] if response.data else None
+
+
+@router.get("/dashboard", response_model_exclude_unset=True)
+async def get_dashboard(
+    current_user: User = Depends(get_current_user),
+    entries_limit: int = Query(3, ge=0, le=20),
+    goals_limit: int = Query(3, ge=0, le=20),
+    entry_fields: str = DEFAULT_ENTRY_FIELDS,
+    goal_fields: str = DEFAULT_GOAL_FIELDS,
+    analysis_fields: str = DEFAULT_ANALYSIS_FIELDS,
+    preview_chars: int | None = Query(280, ge=0),
+) -> Dashboard:
+    """Recent entries, active goals, counts and the latest analysis in one payload.
+
+    The reads run concurrently, so the response takes as long as the slowest
+    query rather than their sum. *_fields choose the returned columns (id is
+    always included) and preview_chars trims entry content for the cards.
+    """
+    entry_select = select_columns(entry_fields, ENTRY_COLUMNS)
+    goal_select = select_columns(goal_fields, GOAL_COLUMNS)
+    analysis_select = select_columns(analysis_fields, ANALYSIS_COLUMNS)
+
+    try:
+        (entries, entry_count), (goals, active_goal_count), latest_analysis = await asyncio.gather(
+            fetch_recent_entries(current_user.id, entry_select, entries_limit),
+            fetch_active_goals(current_user.id, goal_select, goals_limit),
+            fetch_latest_analysis(current_user.id, analysis_select),
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if preview_chars is not None:
+        for entry in entries:
+            content = entry.get("content")
+            if content and len(content) > preview_chars:
+                entry["content"] = content[:preview_chars].rstrip() + "…"
+
+    return {
+        "entries": normalize_timestamps(entries),
+        "entry_count": entry_count,
+        "goals": normalize_timestamps(goals),
+        "active_goal_count": active_goal_count,
+        "latest_analysis": format_analysis_timestamps(latest_analysis) if latest_analysis else None,
+    }
@@ -1,9 +1,10 @@
 """Goal CRUD endpoints."""
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from typing import Any
-from datetime import datetime
+from datetime import datetime, timezone
 from postgrest.exceptions import APIError as PostgrestAPIError
+import logging
 
 try:
     from backend.schemas import (
@@ -14,6 +15,8 @@ try:
         GoalDeleteRequest,
     )
     from backend.dependencies import get_current_user, supabase
+    from backend.read_cache import read_cache
+    from backend.responses import RenderedJSON, conditional_response, normalize_timestamps
 except ModuleNotFoundError:
     from schemas import (
         User,
@@ -23,23 +26,18 @@ except ModuleNotFoundError:
         GoalDeleteRequest,
     )
     from dependencies import get_current_user, supabase
+    from read_cache import read_cache
+    from responses import RenderedJSON, conditional_response, normalize_timestamps
 
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/api", tags=["goals"])
 
 
 def format_goal_timestamps(goal: dict) -> dict:
     """Convert PostgreSQL timestamps to ISO 8601 format."""
-    if "created_at" in goal and goal["created_at"]:
-        # PostgreSQL format: "2025-12-29 11:06:37.634234+00"
-        # Convert to ISO 8601: "2025-12-29T11:06:37.634234+00:00"
-        ts = str(goal["created_at"])
-        if " " in ts and "T" not in ts:
-            ts = ts.replace(" ", "T")
-        if ts.endswith("+00"):
-            ts = ts + ":00"
-        goal["created_at"] = ts
-    return goal
+    return normalize_timestamps([goal])[0]
 
 
 @router.get("/health")
@@ -60,7 +58,8 @@ async def post_goal(
         if "body_text" not in insert_payload or insert_payload["body_text"] is None:
             insert_payload["body_text"] = ""
         insert_payload["user_id"] = current_user.id
-        response = supabase.table("goals").insert(insert_payload).execute()
+        response = await supabase.table("goals").insert(insert_payload).execute()
+        await read_cache.invalidate(current_user.id, "goals")
         if not response.data:
             # Check if there's an error in the response
             if hasattr(response, 'error') and response.error:
@@ -89,18 +88,29 @@ async def post_goal(
 
 @router.get("/get_goals")
 async def get_goals(
+    request: Request,
     current_user: User = Depends(get_current_user),
 ) -> list[Goal]:
-    """Retrieve all goals for the authenticated user."""
-    try:
-        response = (
+    """Retrieve all goals for the authenticated user.
+
+    Served rendered from the read cache until a goal changes, with an ETag for
+    If-None-Match / 304.
+    """
+
+    async def load() -> RenderedJSON:
+        response = await (
             supabase.table("goals")
             .select("*")
             .eq("user_id", current_user.id)
             .order("created_at", desc=True)
             .execute()
         )
-        return [format_goal_timestamps(goal) for goal in response.data]
+        goals = normalize_timestamps(response.data)
+        return RenderedJSON.of_rows(goals, goals)
+
+    try:
+        rendered = await read_cache.get_or_load(current_user.id, "goals", "all", load)
+        return conditional_response(request, rendered)
     except PostgrestAPIError as e:
         error_msg = str(e)
         if "row-level security policy" in error_msg.lower():
@@ -116,11 +126,13 @@ async def get_goals(
 @router.get("/get_goal/{goal_id}")
 async def get_goal(
     goal_id: str,
+    request: Request,
     current_user: User = Depends(get_current_user),
 ) -> Goal:
-    """Retrieve a specific goal by ID for the authenticated user."""
-    try:
-        response = (
+    """Retrieve a specific goal by ID for the authenticated user (ETag / 304 like get_goals)."""
+
+    async def load() -> RenderedJSON:
+        response = await (
             supabase.table("goals")
             .select("*")
             .eq("id", goal_id)
@@ -129,7 +141,12 @@ async def get_goal(
         )
         if not response.data:
             raise HTTPException(status_code=404, detail="Goal not found")
-        return format_goal_timestamps(response.data[0])
+        goal = format_goal_timestamps(response.data[0])
+        return RenderedJSON.of_rows(goal, [goal])
+
+    try:
+        rendered = await read_cache.get_or_load(current_user.id, "goals", f"goal:{goal_id}", load)
+        return conditional_response(request, rendered)
     except HTTPException:
         raise
     except PostgrestAPIError as e:
@@ -164,8 +181,9 @@ async def update_goal(
             raise HTTPException(
                 status_code=400, detail="At least one field must be provided for update"
             )
+        update_payload["updated_at"] = datetime.now(timezone.utc).isoformat()
 
-        response = (
+        response = await (
             supabase.table("goals")
             .update(update_payload)
             .eq("id", str(update_request.goal_id))
@@ -173,10 +191,11 @@ async def update_goal(
             .execute()
         )
         if not response.data:
-            print(
+            logger.info(
                 f"Goal not found or unauthorized: goal_id={update_request.goal_id}, user_id={current_user.id}"
             )
             raise HTTPException(status_code=404, detail="Goal not found")
+        await read_cache.invalidate(current_user.id, "goals")
         return format_goal_timestamps(response.data[0])
     except HTTPException:
         raise
@@ -199,7 +218,7 @@ async def delete_goal(
 ) -> dict[str, Any]:
     """Delete a goal for the authenticated user."""
     try:
-        response = (
+        response = await (
             supabase.table("goals")
             .delete()
             .eq("id", str(delete_request.goal_id))
@@ -208,6 +227,7 @@ async def delete_goal(
         )
         if not response.data:
             raise HTTPException(status_code=404, detail="Goal not found")
+        await read_cache.invalidate(current_user.id, "goals")
         return {"message": "Goal deleted successfully"}
     except HTTPException:
         raise
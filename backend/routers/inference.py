@@ -1,37 +1,80 @@
 """AI inference endpoints (therapy chat, sentiment analysis, etc.)."""
 
-from fastapi import APIRouter, Depends, HTTPException
-from typing import Any
-from datetime import datetime, timedelta
-from openai import OpenAI
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from typing import Any, AsyncIterator
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timedelta, timezone
+import asyncio
+import json
 import os
 import logging
-import yaml
-from pathlib import Path
+import time
 from dotenv import load_dotenv
 
 logger = logging.getLogger(__name__)
 
 try:
-    from backend.schemas import User
+    from backend.schemas import User, AnalyzeSentimentRequest, SentimentResponse, MoodTrend
     from backend.dependencies import get_current_user, supabase
+    from backend.llm_gateway import LLMDeadlineExceeded, llm_gateway
+    from backend.model_router import RouteDecision, model_router
+    from backend.telemetry import server_timing, span
+    from backend.prompt_registry import PromptTemplate, load_prompts, registry as prompt_registry
+    from backend.analysis_cache import AnalysisCache, create_analysis_cache
+    from backend.single_flight import SingleFlight
+    from backend.summarization import map_reduce
+    from backend.token_budget import count_tokens
+    from backend.entry_summaries import fetch_entry_summaries
+    from backend.vector_index import vector_store
+    from backend.sentiment import scorer as sentiment_scorer, daily_trend
 except ModuleNotFoundError:
-    from schemas import User
+    from schemas import User, AnalyzeSentimentRequest, SentimentResponse, MoodTrend
     from dependencies import get_current_user, supabase
+    from llm_gateway import LLMDeadlineExceeded, llm_gateway
+    from model_router import RouteDecision, model_router
+    from telemetry import server_timing, span
+    from prompt_registry import PromptTemplate, load_prompts, registry as prompt_registry
+    from analysis_cache import AnalysisCache, create_analysis_cache
+    from single_flight import SingleFlight
+    from summarization import map_reduce
+    from token_budget import count_tokens
+    from entry_summaries import fetch_entry_summaries
+    from vector_index import vector_store
+    from sentiment import scorer as sentiment_scorer, daily_trend
 
 load_dotenv()
 
 router = APIRouter(prefix="/api/inference", tags=["inference"])
 
-# Initialize OpenAI client
-openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# Tokenizer used for budgeting; the model that answers comes from model_router
+CHECKIN_MODEL = "gpt-4-turbo"
+CHECKIN_TEMPERATURE = 0.7
 
+# model_routes.yaml route for each check-in window
+CHECKIN_ENDPOINTS = {1: "checkin_1day", 7: "checkin_7days", 14: "checkin_14days"}
 
-def load_prompts():
-    """Load prompts from the YAML file."""
-    prompt_path = Path(__file__).parent / "prompts" / "mental_health_checkin.yaml"
-    with open(prompt_path, "r") as f:
-        return yaml.safe_load(f)
+# Token budget for the journal text in a check-in prompt. Longer windows are
+# condensed with map-reduce summarization before the final check-in.
+ENTRY_TOKEN_BUDGET = int(os.getenv("CHECKIN_ENTRY_TOKEN_BUDGET", "6000"))
+SUMMARY_CHUNK_TOKEN_BUDGET = int(os.getenv("SUMMARY_CHUNK_TOKEN_BUDGET", "3000"))
+SUMMARY_MAX_TOKENS = 400
+SUMMARY_CONCURRENCY = int(os.getenv("SUMMARY_CONCURRENCY", "4"))
+
+# Only the columns the check-in prompt uses (id is needed to look up stored summaries)
+CHECKIN_ENTRY_COLUMNS = "id, created_at, content"
+CHECKIN_GOAL_COLUMNS = "title, status, body_text"
+
+# Earlier entries outside the window that are most similar to it, added for context
+# (0 disables; each one is trimmed to RELATED_ENTRY_MAX_CHARS)
+CHECKIN_RELATED_ENTRIES = int(os.getenv("CHECKIN_RELATED_ENTRIES", "0"))
+RELATED_ENTRY_MAX_CHARS = 800
+
+# Completed analyses keyed by a digest of their prompts and model settings
+analysis_cache: AnalysisCache = create_analysis_cache()
+
+# Identical check-ins that are already running share one upstream completion
+analysis_flights = SingleFlight()
 
 
 @router.get("/health")
@@ -51,6 +94,99 @@ async def check_setup() -> dict[str, Any]:
     return {"checks": checks}
 
 
+@dataclass
+class CheckinContext:
+    """Rendered prompts plus the metadata returned alongside a check-in.
+
+    entries keeps the chronologically ordered rows the prompt was built from, so
+    condensing can look up their stored summaries only when it is needed.
+    user_id scopes the LLM calls to that user's gateway slots. route is the model
+    tier chosen for endpoint, replaced by the tier that answered once it has run.
+    timings collects per-stage durations in milliseconds.
+    """
+
+    num_entries: int
+    system_prompt: str
+    user_prompt_template: PromptTemplate
+    prompt_version: str
+    formatted_entries: list[str]
+    formatted_goals: str
+    date_range: str
+    entry_count: int
+    goals_analyzed: int
+    entries: list[dict[str, Any]] = field(default_factory=list)
+    user_id: str | None = None
+    endpoint: str = "analysis_range"
+    route: RouteDecision | None = None
+    related_entries: list[str] = field(default_factory=list)
+    condensed: bool = False
+    timings: dict[str, float] = field(default_factory=dict)
+
+    @property
+    def user_prompt(self) -> str:
+        """The user prompt rendered from the template."""
+        formatted_entries = "\n\n".join(self.formatted_entries)
+        if self.related_entries:
+            formatted_entries += (
+                "\n\nRELATED EARLIER ENTRIES (outside the analysis period, for context only):\n"
+                + "\n\n".join(self.related_entries)
+            )
+        return self.user_prompt_template.render(
+            date_range=self.date_range,
+            num_entries=self.num_entries,
+            formatted_entries=formatted_entries,
+            formatted_goals=self.formatted_goals,
+        )
+
+    def cache_key(self) -> str:
+        """Content address of this check-in's completion.
+
+        Always derived from the raw entries, so a window that needs condensing is
+        still found in the cache before any summarization runs.
+        """
+        return AnalysisCache.make_key(
+            self.system_prompt,
+            self.user_prompt,
+            model=self.route.model,
+            temperature=CHECKIN_TEMPERATURE,
+            max_tokens=self.route.max_tokens,
+            prompt_version=self.prompt_version,
+        )
+
+    def metadata(self) -> dict[str, Any]:
+        """Response fields that describe the analyzed window."""
+        return {
+            "success": True,
+            "period_days": self.num_entries,
+            "date_range": self.date_range,
+            "entry_count": self.entry_count,
+            "goals_analyzed": self.goals_analyzed,
+            "model_route": self.route.record() if self.route is not None else None,
+            "timings": self.timings,
+        }
+
+
+def format_sse(event: str, data: dict[str, Any]) -> str:
+    """Encode a single Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.get("/gateway-stats")
+async def gateway_stats() -> dict[str, Any]:
+    """LLM queue depth, calls in flight, per-operation latency and per-tier usage (for debugging)."""
+    return {**llm_gateway.stats(), "model_router": model_router.stats()}
+
+
+@router.get("/cache-stats")
+async def cache_stats() -> dict[str, Any]:
+    """Hit/miss counters for the analysis cache and current prompt versions (for debugging)."""
+    return {
+        **(await analysis_cache.stats()),
+        "single_flight": analysis_flights.stats(),
+        "prompt_versions": prompt_registry.versions(),
+    }
+
+
 @router.get("/mental-health-checkin/1day")
 async def checkin_1day(current_user: User = Depends(get_current_user)) -> dict[str, Any]:
     """Analyze last 1 entry."""
@@ -69,99 +205,404 @@ async def checkin_14days(current_user: User = Depends(get_current_user)) -> dict
     return await analyze_entries(14, current_user)
 
 
-async def analyze_entries(num_entries: int, current_user: User) -> dict[str, Any]:
-    """Helper to analyze last N journal entries."""
-    try:
-        # Fetch last N entries
-        entries_response = (
-            supabase.table("journal_entries")
-            .select("*")
-            .eq("user_id", current_user.id)
-            .order("created_at", desc=True)
-            .limit(num_entries)
-            .execute()
-        )
+@router.get("/mental-health-checkin/1day/stream")
+async def checkin_1day_stream(current_user: User = Depends(get_current_user)) -> StreamingResponse:
+    """Stream the analysis of the last 1 entry as Server-Sent Events."""
+    return await stream_analysis(1, current_user)
 
-        if not entries_response.data:
-            raise HTTPException(
-                status_code=404,
-                detail=f"No journal entries found.",
-            )
 
-        if len(entries_response.data) < num_entries:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Not enough entries. You have {len(entries_response.data)} entry/entries but requested analysis for {num_entries}.",
-            )
+@router.get("/mental-health-checkin/7days/stream")
+async def checkin_7days_stream(current_user: User = Depends(get_current_user)) -> StreamingResponse:
+    """Stream the analysis of the last 7 entries as Server-Sent Events."""
+    return await stream_analysis(7, current_user)
+
+
+@router.get("/mental-health-checkin/14days/stream")
+async def checkin_14days_stream(current_user: User = Depends(get_current_user)) -> StreamingResponse:
+    """Stream the analysis of the last 14 entries as Server-Sent Events."""
+    return await stream_analysis(14, current_user)
+
+
+def elapsed_ms(start: float) -> float:
+    """Milliseconds since a time.perf_counter() reading."""
+    return round((time.perf_counter() - start) * 1000, 1)
 
-        entries = entries_response.data
-        # Reverse to get chronological order for display
-        entries_reversed = list(reversed(entries))
-
-        # Fetch user's goals (especially active and paused ones, not completed)
-        goals_response = (
-            supabase.table("goals")
-            .select("*")
-            .eq("user_id", current_user.id)
-            .neq("status", "completed")  # Get active and paused goals, exclude completed
-            .order("created_at", desc=True)
-            .execute()
+
+async def build_checkin_context(num_entries: int, current_user: User) -> CheckinContext:
+    """Fetch the last N entries and the user's goals and render the check-in prompts.
+
+    The two reads are independent, so they run concurrently and the data-gathering
+    stage costs one database round trip.
+    """
+    with span("fetch") as fetch:
+        entries, goals = await asyncio.gather(
+            fetch_recent_entries(current_user.id, num_entries),
+            fetch_open_goals(current_user.id),
         )
 
-        goals = goals_response.data if goals_response.data else []
-        
-        # Format entries
-        formatted_entries = "\n\n".join([
-            f"[{datetime.fromisoformat(entry['created_at'].replace('Z', '+00:00')).strftime('%B %d, %Y at %I:%M %p')}]\n{entry['content']}"
-            for entry in entries_reversed
-        ])
-
-        # Format goals
-        formatted_goals = ""
-        if goals:
-            goals_list = []
-            for goal in goals:
-                status_label = goal.get("status", "active").title()
-                goals_list.append(
-                    f"- {goal.get('title', 'Untitled Goal')} ({status_label}): {goal.get('body_text', 'No description')}"
-                )
-            formatted_goals = "\n".join(goals_list)
-        else:
-            formatted_goals = "No active goals set."
+    if not entries:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No journal entries found.",
+        )
 
-        date_range = f"{entries_reversed[0]['created_at'][:10]} to {entries_reversed[-1]['created_at'][:10]}"
+    if len(entries) < num_entries:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Not enough entries. You have {len(entries)} entry/entries but requested analysis for {num_entries}.",
+        )
+
+    # Reverse to get chronological order for display
+    entries_reversed = list(reversed(entries))
 
-        # Load prompts from YAML
-        prompts = load_prompts()
-        system_prompt = prompts["system_prompt"]
-        user_prompt = prompts["user_prompt_template"].format(
+    with span("format") as format_span:
+        context = render_checkin_context(
+            entries_reversed, goals, num_entries, CHECKIN_ENDPOINTS[num_entries], user_id=current_user.id
+        )
+    context.timings.update(fetch_ms=fetch.ms, format_ms=format_span.ms)
+
+    if CHECKIN_RELATED_ENTRIES > 0:
+        with span("related") as related:
+            context.related_entries = await fetch_related_entries(current_user.id, entries_reversed)
+            context.route = model_router.route(context.endpoint, prompt_tokens(context), context.entry_count)
+        context.timings["related_ms"] = related.ms
+    return context
+
+
+async def fetch_related_entries(user_id: str, window: list[dict[str, Any]]) -> list[str]:
+    """Format the past entries most similar to the window, oldest first."""
+    matches = await vector_store.search(
+        user_id,
+        "\n".join(entry["content"] for entry in window),
+        k=CHECKIN_RELATED_ENTRIES,
+        exclude={str(entry["id"]) for entry in window},
+    )
+    if not matches:
+        return []
+    response = await (
+        supabase.table("journal_entries")
+        .select(CHECKIN_ENTRY_COLUMNS)
+        .eq("user_id", user_id)
+        .in_("id", [entry_id for entry_id, _ in matches])
+        .lt("created_at", window[0]["created_at"])
+        .order("created_at")
+        .execute()
+    )
+    return [
+        f"{entry_header(entry)}\n{entry['content'][:RELATED_ENTRY_MAX_CHARS]}"
+        for entry in response.data or []
+    ]
+
+
+async def fetch_recent_entries(user_id: str, num_entries: int) -> list[dict[str, Any]]:
+    """Fetch the user's last N entries, newest first."""
+    entries_response = await (
+        supabase.table("journal_entries")
+        .select(CHECKIN_ENTRY_COLUMNS)
+        .eq("user_id", user_id)
+        .order("created_at", desc=True)
+        .limit(num_entries)
+        .execute()
+    )
+    return entries_response.data or []
+
+
+async def fetch_open_goals(user_id: str) -> list[dict[str, Any]]:
+    """Fetch the user's active and paused goals (completed ones are excluded)."""
+    goals_response = await (
+        supabase.table("goals")
+        .select(CHECKIN_GOAL_COLUMNS)
+        .eq("user_id", user_id)
+        .neq("status", "completed")  # Get active and paused goals, exclude completed
+        .order("created_at", desc=True)
+        .execute()
+    )
+
+    return goals_response.data if goals_response.data else []
+
+
+def entry_header(entry: dict[str, Any]) -> str:
+    """The date line that precedes an entry in the check-in prompt."""
+    created_at = datetime.fromisoformat(entry["created_at"].replace("Z", "+00:00"))
+    return f"[{created_at.strftime('%B %d, %Y at %I:%M %p')}]"
+
+
+def render_checkin_context(
+    entries_reversed: list[dict[str, Any]],
+    goals: list[dict[str, Any]],
+    num_entries: int,
+    endpoint: str,
+    user_id: str | None = None,
+) -> CheckinContext:
+    """Render the check-in prompts for chronologically ordered entries and goals
+    and route them to a model tier for endpoint by their size."""
+    # Format entries
+    formatted_entries = [f"{entry_header(entry)}\n{entry['content']}" for entry in entries_reversed]
+
+    # Format goals
+    formatted_goals = ""
+    if goals:
+        goals_list = []
+        for goal in goals:
+            status_label = goal.get("status", "active").title()
+            goals_list.append(
+                f"- {goal.get('title', 'Untitled Goal')} ({status_label}): {goal.get('body_text', 'No description')}"
+            )
+        formatted_goals = "\n".join(goals_list)
+    else:
+        formatted_goals = "No active goals set."
+
+    date_range = f"{entries_reversed[0]['created_at'][:10]} to {entries_reversed[-1]['created_at'][:10]}"
+
+    prompts = load_prompts()
+
+    context = CheckinContext(
+        num_entries=num_entries,
+        system_prompt=prompts["system_prompt"],
+        user_prompt_template=prompts.templates["user_prompt_template"],
+        prompt_version=prompts.version,
+        formatted_entries=formatted_entries,
+        formatted_goals=formatted_goals,
+        date_range=date_range,
+        entry_count=len(entries_reversed),
+        goals_analyzed=len(goals),
+        entries=entries_reversed,
+        user_id=user_id,
+        endpoint=endpoint,
+    )
+    context.route = model_router.route(endpoint, prompt_tokens(context), len(entries_reversed))
+    return context
+
+
+def prompt_tokens(context: CheckinContext) -> int:
+    """Tokens in the check-in's system and user prompts."""
+    return count_tokens(context.system_prompt, CHECKIN_MODEL) + count_tokens(context.user_prompt, CHECKIN_MODEL)
+
+
+def checkin_messages(context: CheckinContext) -> list[dict[str, str]]:
+    """Chat messages for a check-in completion."""
+    return [
+        {"role": "system", "content": context.system_prompt},
+        {"role": "user", "content": context.user_prompt},
+    ]
+
+
+def checkin_flight_key(user_id: str, context: CheckinContext, cache_key: str) -> str:
+    """Coalescing key: same user, same window, same inputs."""
+    return f"{user_id}:{context.num_entries}:{cache_key}"
+
+
+async def summarize_chunk(texts: list[str], level: int, date_range: str, user_id: str | None = None) -> str:
+    """Summarize one chunk of entries (level 0) or of earlier summaries (level > 0)."""
+    prompts = load_prompts("journal_summary")
+    if level == 0:
+        user_prompt = prompts.render(
+            "entries_prompt_template",
             date_range=date_range,
-            num_entries=num_entries,
-            formatted_entries=formatted_entries,
-            formatted_goals=formatted_goals,
+            max_words=int(SUMMARY_MAX_TOKENS * 0.6),
+            entries="\n\n".join(texts),
+        )
+    else:
+        user_prompt = prompts.render(
+            "summaries_prompt_template",
+            date_range=date_range,
+            max_words=int(SUMMARY_MAX_TOKENS * 0.6),
+            summaries="\n\n".join(texts),
         )
 
-        completion = openai_client.chat.completions.create(
-            model="gpt-4-turbo",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
-            temperature=0.7,
-            max_tokens=2000,
+    route = model_router.route(
+        "checkin_summary",
+        count_tokens(prompts["system_prompt"], CHECKIN_MODEL) + count_tokens(user_prompt, CHECKIN_MODEL),
+        len(texts),
+        max_tokens=SUMMARY_MAX_TOKENS,
+    )
+
+    # Chunk summaries are content-addressed too, so overlapping windows reuse them
+    cache_key = AnalysisCache.make_key(
+        prompts["system_prompt"],
+        user_prompt,
+        model=route.model,
+        temperature=0.0,
+        max_tokens=route.max_tokens,
+        prompt_version=prompts.version,
+    )
+    cached = await analysis_cache.get(cache_key)
+    if cached is not None:
+        return cached["analysis"]
+
+    completion, answered = await model_router.chat(
+        route,
+        operation="checkin_summary",
+        user_id=user_id,
+        hedge=True,
+        messages=[
+            {"role": "system", "content": prompts["system_prompt"]},
+            {"role": "user", "content": user_prompt},
+        ],
+        temperature=0.0,
+    )
+    summary = completion.choices[0].message.content
+    if not answered.fell_back:
+        await analysis_cache.set(cache_key, {"analysis": summary})
+    return summary
+
+
+def call_route(context: CheckinContext) -> RouteDecision:
+    """The context's route, with the prompt size recounted if it was condensed.
+
+    The tier stays the one the cache key was built for; only fallbacks move it.
+    """
+    if not context.condensed:
+        return context.route
+    return replace(context.route, prompt_tokens=prompt_tokens(context))
+
+
+async def condense_context(context: CheckinContext) -> CheckinContext:
+    """Fit the entries into the entry token budget.
+
+    Every entry with a current stored summary that is smaller than its raw text
+    is replaced by that summary, whether or not the window is over budget, so
+    the prompt stays short without extra LLM calls at request time. Only if the
+    result is still too large does map-reduce summarization run.
+    """
+    summaries = await fetch_entry_summaries(context.entries)
+    if summaries:
+        formatted_entries = []
+        for entry, formatted in zip(context.entries, context.formatted_entries):
+            summary = summaries.get(str(entry["id"]))
+            if summary:
+                summarized = f"{entry_header(entry)} (summary)\n{summary}"
+                if count_tokens(summarized, CHECKIN_MODEL) < count_tokens(formatted, CHECKIN_MODEL):
+                    formatted = summarized
+            formatted_entries.append(formatted)
+        if formatted_entries != context.formatted_entries:
+            context = replace(context, formatted_entries=formatted_entries, condensed=True)
+
+    entry_tokens = sum(count_tokens(text, CHECKIN_MODEL) for text in context.formatted_entries)
+    if entry_tokens <= ENTRY_TOKEN_BUDGET:
+        return context
+
+    chunk_summaries = await map_reduce(
+        context.formatted_entries,
+        lambda texts, level: summarize_chunk(texts, level, context.date_range, context.user_id),
+        budget=ENTRY_TOKEN_BUDGET,
+        chunk_budget=SUMMARY_CHUNK_TOKEN_BUDGET,
+        concurrency=SUMMARY_CONCURRENCY,
+        model=CHECKIN_MODEL,
+    )
+    summary_note = (
+        f"[Condensed: {context.entry_count} entries were summarized chronologically "
+        f"to fit the analysis budget. Each section covers consecutive entries.]"
+    )
+    return replace(context, formatted_entries=[summary_note, *chunk_summaries], condensed=True)
+
+
+async def complete_checkin(context: CheckinContext, cache_key: str) -> str:
+    """Run one check-in completion and cache its text.
+
+    context.route is replaced by the tier that answered. A fallback tier's answer
+    is not cached: the key stands for the preferred tier, and the next request
+    should get another chance at it.
+    """
+    condensed = await condense_context(context)
+    completion, context.route = await model_router.chat(
+        call_route(condensed),
+        operation="checkin",
+        user_id=context.user_id,
+        hedge=True,
+        messages=checkin_messages(condensed),
+        temperature=CHECKIN_TEMPERATURE,
+    )
+    analysis_text = completion.choices[0].message.content
+    if not context.route.fell_back:
+        await analysis_cache.set(cache_key, {"analysis": analysis_text, "model_route": context.route.record()})
+    return analysis_text
+
+
+async def stream_checkin(context: CheckinContext, cache_key: str) -> AsyncIterator[str]:
+    """Stream one check-in completion and cache its text once it finishes.
+
+    context.route is replaced by the tier that answered (fallback answers are not
+    cached, as in complete_checkin).
+    """
+    condensed = await condense_context(context)
+    answered: list[RouteDecision] = []
+    stream = model_router.chat_stream(
+        call_route(condensed),
+        answered,
+        operation="checkin_stream",
+        user_id=context.user_id,
+        messages=checkin_messages(condensed),
+        temperature=CHECKIN_TEMPERATURE,
+    )
+    parts: list[str] = []
+    async for content in stream:
+        parts.append(content)
+        yield content
+    if answered:
+        context.route = answered[0]
+    if context.route.fell_back:
+        return
+    await analysis_cache.set(cache_key, {"analysis": "".join(parts), "model_route": context.route.record()})
+
+
+def log_checkin_timings(user_id: str, context: CheckinContext, cached: bool) -> None:
+    """Log where a check-in spent its time."""
+    stages = " ".join(f"{name}={value}" for name, value in context.timings.items())
+    tier = context.route.tier if context.route is not None else None
+    logger.info(f"Check-in user={user_id} entries={context.entry_count} tier={tier} cached={cached} {stages}")
+
+
+async def analyze_entries(num_entries: int, current_user: User) -> dict[str, Any]:
+    """Helper to analyze last N journal entries."""
+    try:
+        context = await build_checkin_context(num_entries, current_user)
+
+        cache_key = context.cache_key()
+        cached = await analysis_cache.get(cache_key)
+        if cached is not None:
+            context.timings["llm_ms"] = 0.0
+            log_checkin_timings(current_user.id, context, cached=True)
+            return {
+                **context.metadata(),
+                "model_route": cached.get("model_route", context.route.record()),
+                "analysis": cached["analysis"],
+                "cached": True,
+            }
+
+        with span("llm") as llm:
+            analysis_text = await analysis_flights.do(
+                checkin_flight_key(current_user.id, context, cache_key),
+                lambda: complete_checkin(context, cache_key),
+            )
+        context.timings["llm_ms"] = llm.ms
+        log_checkin_timings(current_user.id, context, cached=False)
+
+        return {**context.metadata(), "analysis": analysis_text, "cached": False}
+
+    except HTTPException:
+        raise
+    except LLMDeadlineExceeded as e:
+        logger.warning(f"Analysis timed out: {str(e)}")
+        raise HTTPException(status_code=504, detail="The analysis took too long. Please try again.")
+    except Exception as e:
+        logger.error(f"Analysis error: {type(e).__name__}: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500, detail=f"Failed to generate analysis: {str(e)}"
         )
 
-        analysis_text = completion.choices[0].message.content
 
-        return {
-            "success": True,
-            "period_days": num_entries,
-            "date_range": date_range,
-            "entry_count": len(entries),
-            "goals_analyzed": len(goals),
-            "analysis": analysis_text,
-        }
+async def stream_analysis(num_entries: int, current_user: User) -> StreamingResponse:
+    """Helper to stream the analysis of the last N journal entries over SSE.
 
+    Emits ``token`` events as the completion arrives, then a final ``done`` event
+    carrying the same metadata as the JSON check-in. The Server-Timing header is sent
+    before the completion runs, so ``done`` also carries ``server_timing`` with every
+    stage including ``llm``. Failures after the stream has started are reported as an
+    ``error`` event since the status code is already sent.
+    """
+    try:
+        context = await build_checkin_context(num_entries, current_user)
     except HTTPException:
         raise
     except Exception as e:
@@ -169,6 +610,133 @@ async def analyze_entries(num_entries: int, current_user: User) -> dict[str, Any
         raise HTTPException(
             status_code=500, detail=f"Failed to generate analysis: {str(e)}"
         )
+
+    cache_key = context.cache_key()
+    cached = await analysis_cache.get(cache_key)
+
+    async def event_stream() -> AsyncIterator[str]:
+        if cached is not None:
+            context.timings["llm_ms"] = 0.0
+            log_checkin_timings(current_user.id, context, cached=True)
+            yield format_sse("token", {"content": cached["analysis"]})
+            yield format_sse("done", {
+                **context.metadata(),
+                "model_route": cached.get("model_route", context.route.record()),
+                "cached": True,
+                "server_timing": server_timing(),
+            })
+            return
+        try:
+            with span("llm") as llm:
+                start = time.perf_counter()
+                tokens = analysis_flights.stream(
+                    checkin_flight_key(current_user.id, context, cache_key),
+                    lambda: stream_checkin(context, cache_key),
+                )
+                async for content in tokens:
+                    context.timings.setdefault("llm_first_token_ms", elapsed_ms(start))
+                    yield format_sse("token", {"content": content})
+            context.timings["llm_ms"] = llm.ms
+            log_checkin_timings(current_user.id, context, cached=False)
+            yield format_sse("done", {**context.metadata(), "cached": False, "server_timing": server_timing()})
+        except Exception as e:
+            logger.error(f"Streaming analysis error: {type(e).__name__}: {str(e)}", exc_info=True)
+            yield format_sse("error", {"detail": f"Failed to generate analysis: {str(e)}"})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        # Disable proxy buffering (nginx) so tokens reach the browser as they arrive
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/analyze_sentiment")
+async def analyze_sentiment(
+    request: AnalyzeSentimentRequest,
+    current_user: User = Depends(get_current_user),
+) -> SentimentResponse:
+    """Score texts locally for valence (-1 to 1) and emotions, in one batch.
+
+    Uses the lexicon scorer in sentiment.py: no LLM call and no tokens spent.
+    """
+    with span("score"):
+        scores = sentiment_scorer.score(request.texts)
+    return {
+        "lexicon_version": sentiment_scorer.version,
+        "results": [scores.row(i) for i in range(len(request.texts))],
+    }
+
+
+MOOD_TREND_PAGE_SIZE = 1000
+
+
+async def fetch_entries_since(user_id: str, since: datetime) -> list[dict[str, Any]]:
+    """All of the user's entries created at or after since, oldest first."""
+    entries: list[dict[str, Any]] = []
+    cursor: tuple[str, str] | None = None
+    while True:
+        query = (
+            supabase.table("journal_entries")
+            .select("id, created_at, content")
+            .eq("user_id", user_id)
+            .gte("created_at", since.isoformat())
+        )
+        if cursor is not None:
+            query = query.or_(
+                f'created_at.gt."{cursor[0]}",and(created_at.eq."{cursor[0]}",id.gt.{cursor[1]})'
+            )
+        response = await query.order("created_at").order("id").limit(MOOD_TREND_PAGE_SIZE).execute()
+        rows = response.data or []
+        entries.extend(rows)
+        if len(rows) < MOOD_TREND_PAGE_SIZE:
+            return entries
+        cursor = (str(rows[-1]["created_at"]), str(rows[-1]["id"]))
+
+
+@router.get("/mood-trend")
+async def mood_trend(
+    days: int = Query(90, ge=1, le=730),
+    window: int = Query(7, ge=1, le=90),
+    current_user: User = Depends(get_current_user),
+) -> MoodTrend:
+    """Per-day mood scores and trailing rolling averages for charts.
+
+    Every entry in the last days UTC calendar days is scored with the local
+    sentiment scorer (no LLM tokens). Each day has its mean valence and emotions
+    (None/empty without entries) and rolling_valence, the entry-weighted mean
+    over the window days ending that day.
+    """
+    try:
+        end_date = datetime.now(timezone.utc).date()
+        start_date = end_date - timedelta(days=days - 1)
+        with span("fetch") as fetch:
+            entries = await fetch_entries_since(
+                current_user.id, datetime.combine(start_date, datetime.min.time(), tzinfo=timezone.utc)
+            )
+
+        with span("score") as score:
+            day_index = [
+                (datetime.fromisoformat(str(entry["created_at"])).astimezone(timezone.utc).date() - start_date).days
+                for entry in entries
+            ]
+            scores = sentiment_scorer.score([entry["content"] for entry in entries])
+            day_labels = [(start_date + timedelta(days=d)).isoformat() for d in range(days)]
+            trend = daily_trend(day_labels, day_index, scores, window)
+        return {
+            "start_date": start_date,
+            "end_date": end_date,
+            "window": window,
+            "entry_count": len(entries),
+            "lexicon_version": sentiment_scorer.version,
+            "days": trend,
+            "timings": {"fetch_ms": fetch.ms, "score_ms": score.ms},
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 # - POST /chat - therapy chatbot conversation
-# - POST /analyze_sentiment - sentiment analysis on journal entries
 # - POST /generate_insights - weekly insights from journal data
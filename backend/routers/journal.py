@@ -1,50 +1,122 @@
 """Journal entry CRUD endpoints."""
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from typing import Any
-from datetime import datetime, timedelta
+from datetime import datetime, timezone
+import base64
+import json
+import logging
+import os
+import uuid
 
 try:
     from backend.schemas import (
         User,
         JournalEntry,
+        JournalEntryFields,
+        JournalEntryPage,
+        JournalSearchHit,
+        KeywordSearchPage,
         JournalEntryCreate,
         JournalEntryUpdateRequest,
         JournalEntryDeleteRequest,
+        JournalDraftUpdate,
+        DraftStatus,
     )
     from backend.dependencies import get_current_user, supabase
+    from backend.entry_summaries import schedule_entry_summary
+    from backend.vector_index import remove_entry_embedding, schedule_entry_embedding, vector_store
+    from backend.fulltext_index import fulltext_store
+    from backend.projection import select_columns
+    from backend.draft_autosave import DraftAutosaver, DraftConflict, DraftNotFound
+    from backend.read_cache import read_cache
+    from backend.responses import RenderedJSON, conditional_response, normalize_timestamps
 except ModuleNotFoundError:
     from schemas import (
         User,
         JournalEntry,
+        JournalEntryFields,
+        JournalEntryPage,
+        JournalSearchHit,
+        KeywordSearchPage,
         JournalEntryCreate,
         JournalEntryUpdateRequest,
         JournalEntryDeleteRequest,
+        JournalDraftUpdate,
+        DraftStatus,
     )
     from dependencies import get_current_user, supabase
+    from entry_summaries import schedule_entry_summary
+    from vector_index import remove_entry_embedding, schedule_entry_embedding, vector_store
+    from fulltext_index import fulltext_store
+    from projection import select_columns
+    from draft_autosave import DraftAutosaver, DraftConflict, DraftNotFound
+    from read_cache import read_cache
+    from responses import RenderedJSON, conditional_response, normalize_timestamps
 
 
-router = APIRouter(prefix="/api", tags=["journal"])
+logger = logging.getLogger(__name__)
 
+router = APIRouter(prefix="/api", tags=["journal"])
 
-def calculate_journal_entry_date(days: int = 30) -> datetime:
-    """Helper to calculate a date 'days' ago from now."""
-    return datetime.now() - timedelta(days=days)
+ENTRY_COLUMNS = ("id", "user_id", "content", "created_at", "updated_at")
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
 
 
 def format_entry_timestamps(entry: dict) -> dict:
     """Convert PostgreSQL timestamps to ISO 8601 format."""
-    for field in ["created_at", "updated_at"]:
-        if field in entry and entry[field]:
-            # PostgreSQL format: "2025-12-29 11:06:37.634234+00"
-            # Convert to ISO 8601: "2025-12-29T11:06:37.634234+00:00"
-            ts = str(entry[field])
-            if " " in ts and "T" not in ts:
-                ts = ts.replace(" ", "T")
-            if ts.endswith("+00"):
-                ts = ts + ":00"
-            entry[field] = ts
-    return entry
+    return normalize_timestamps([entry])[0]
+
+
+async def entry_written(user_id: str, entry: dict) -> None:
+    """Refresh cached reads, the entry's summary, embedding and keyword index after its content changed.
+
+    Never raises: the write has already committed, and a 500 would make the
+    client retry it.
+    """
+    await read_cache.invalidate(user_id, "journal_entries")
+    try:
+        schedule_entry_summary(user_id, entry)
+        schedule_entry_embedding(user_id, entry)
+        fulltext_store.index_entry(user_id, entry)
+    except Exception as e:
+        logger.error(f"Failed to index entry {entry.get('id')}: {str(e)}")
+
+
+async def draft_flushed(user_id: str, entry: dict) -> None:
+    """Keep reads and keyword search current after each autosave write. Never raises.
+
+    Summaries and embeddings wait for the draft to settle (commit or idle), see
+    draft_autosave.py, so steady typing does not queue an LLM call per flush.
+    """
+    await read_cache.invalidate(user_id, "journal_entries")
+    try:
+        fulltext_store.index_entry(user_id, entry)
+    except Exception as e:
+        logger.error(f"Failed to index entry {entry.get('id')}: {str(e)}")
+
+
+async def entry_deleted(user_id: str, entry_id: str) -> None:
+    """Drop a deleted entry from cached reads, its draft and the search indexes. Never raises."""
+    draft_autosaver.discard(user_id, entry_id)
+    await read_cache.invalidate(user_id, "journal_entries")
+    await remove_entry_embedding(user_id, entry_id)
+    try:
+        fulltext_store.remove_entry(user_id, entry_id)
+    except Exception as e:
+        logger.error(f"Failed to remove entry {entry_id} from keyword search: {str(e)}")
+
+
+draft_autosaver = DraftAutosaver(
+    on_saved=draft_flushed,
+    on_settled=entry_written,
+    debounce=float(os.getenv("AUTOSAVE_DEBOUNCE_SECONDS", "2")),
+    max_delay=float(os.getenv("AUTOSAVE_MAX_DELAY_SECONDS", "10")),
+    idle_ttl=float(os.getenv("AUTOSAVE_IDLE_SECONDS", "600")),
+    max_drafts=int(os.getenv("AUTOSAVE_MAX_DRAFTS", "10000")),
+    flush_concurrency=int(os.getenv("AUTOSAVE_FLUSH_CONCURRENCY", "8")),
+)
 
 
 @router.get("/health")
@@ -61,28 +133,217 @@ async def post_journal_entry(
     try:
         insert_payload = journal_entry.model_dump(mode="json")
         insert_payload["user_id"] = current_user.id
-        response = supabase.table("journal_entries").insert(insert_payload).execute()
+        response = await supabase.table("journal_entries").insert(insert_payload).execute()
+        await entry_written(current_user.id, response.data[0])
         return format_entry_timestamps(response.data[0])
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/get_journal_entries")
+def parse_fields(fields: str | None) -> str:
+    """Select clause for ?fields; id and created_at are always included for cursors."""
+    return select_columns(fields, ENTRY_COLUMNS, required=("id", "created_at"))
+
+
+def encode_cursor(entry: dict) -> str:
+    """Opaque cursor pointing just past entry in (created_at, id) order."""
+    raw = json.dumps([entry["created_at"], str(entry["id"])])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[str, str]:
+    """Inverse of encode_cursor; raises 400 for anything it did not produce."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, entry_id = json.loads(raw)
+        datetime.fromisoformat(created_at)
+        return created_at, str(uuid.UUID(entry_id))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@router.get("/get_journal_entries", response_model_exclude_unset=True)
 async def get_journal_entries(
+    request: Request,
     current_user: User = Depends(get_current_user),
-    since: datetime = Depends(calculate_journal_entry_date),
-) -> list[JournalEntry]:
-    """Retrieve all journal entries for the authenticated user created since 'since'."""
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    q: str | None = Query(None, max_length=200),
+    fields: str | None = None,
+) -> JournalEntryPage:
+    """Retrieve one page of the user's journal entries, newest first.
+
+    Entries are ordered by (created_at, id) and paged with an opaque cursor, so
+    each page costs the same regardless of how far back it is. since/until bound
+    created_at, q matches content case-insensitively, and fields limits the
+    returned columns (e.g. ``fields=id,created_at`` for a lightweight list).
+
+    Pages are cached rendered (see read_cache.py) and carry an ETag; send it
+    back as If-None-Match to get an empty 304 while nothing on the page changed.
+    """
+    select = parse_fields(fields)
+    after = decode_cursor(cursor) if cursor else None
+
+    key = json.dumps(["page", select, limit, after, since and since.isoformat(), until and until.isoformat(), q])
+
+    async def load() -> RenderedJSON:
+        query = (
+            supabase.table("journal_entries")
+            .select(select)
+            .eq("user_id", current_user.id)
+        )
+        if since is not None:
+            query = query.gte("created_at", since.isoformat())
+        if until is not None:
+            query = query.lt("created_at", until.isoformat())
+        if q:
+            # Escape LIKE wildcards so the search text is matched literally
+            pattern = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            query = query.ilike("content", f"%{pattern}%")
+        if after:
+            created_at, entry_id = after
+            query = query.or_(
+                f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt.{entry_id})'
+            )
+
+        # Fetch one extra row to learn whether another page exists
+        response = await (
+            query.order("created_at", desc=True)
+            .order("id", desc=True)
+            .limit(limit + 1)
+            .execute()
+        )
+        rows = response.data or []
+        page = normalize_timestamps(rows[:limit])
+        next_cursor = encode_cursor(page[-1]) if len(rows) > limit else None
+        return RenderedJSON.of_rows({"entries": page, "next_cursor": next_cursor}, page, salt=f"{key}{next_cursor}")
+
+    try:
+        rendered = await read_cache.get_or_load(current_user.id, "journal_entries", key, load)
+        return conditional_response(request, rendered)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/journal/search", response_model_exclude_unset=True)
+async def search_journal_entries(
+    q: str = Query(..., min_length=1, max_length=500),
+    limit: int = Query(10, ge=1, le=50),
+    fields: str | None = None,
+    current_user: User = Depends(get_current_user),
+) -> list[JournalSearchHit]:
+    """Entries most similar in meaning to q, best match first, each with its score.
+
+    Backed by the per-user vector index (see vector_index.py); the first search
+    for a user without an index builds it from their existing entries.
+    """
+    select = parse_fields(fields)
     try:
-        response = (
+        matches = await vector_store.search(current_user.id, q, k=limit)
+        if not matches:
+            return []
+        response = await (
             supabase.table("journal_entries")
-            .select("*")
+            .select(select)
             .eq("user_id", current_user.id)
-            .gte("created_at", since)
-            .order("created_at", desc=True)
+            .in_("id", [entry_id for entry_id, _ in matches])
             .execute()
         )
-        return [format_entry_timestamps(entry) for entry in response.data]
+        rows = {str(row["id"]): row for row in response.data or []}
+        hits = []
+        for entry_id, score in matches:
+            row = rows.get(entry_id)
+            if row is None:
+                # Deleted by another worker before its index caught up
+                await remove_entry_embedding(current_user.id, entry_id)
+                continue
+            hits.append({**format_entry_timestamps(row), "score": round(score, 4)})
+        return hits
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def encode_search_cursor(score: float, entry_id: str) -> str:
+    """Opaque cursor pointing just past a hit in (score desc, id) order."""
+    raw = json.dumps([score, entry_id])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_search_cursor(cursor: str) -> tuple[float, str]:
+    """Inverse of encode_search_cursor; raises 400 for anything it did not produce."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        score, entry_id = json.loads(raw)
+        return float(score), str(uuid.UUID(entry_id))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@router.get("/journal/keyword_search")
+async def keyword_search_journal_entries(
+    q: str = Query(..., min_length=1, max_length=500),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = None,
+    current_user: User = Depends(get_current_user),
+) -> KeywordSearchPage:
+    """Entries containing every word of q (and every "quoted phrase"), ranked by BM25.
+
+    Searches the user's whole history through an in-memory inverted index (see
+    fulltext_index.py). Each hit has a snippet around the best cluster of
+    matches, with highlights as [start, end) offsets into the snippet. Pass
+    next_cursor back as cursor for the next page.
+    """
+    after = decode_search_cursor(cursor) if cursor else None
+    try:
+        hits, total, has_more = await fulltext_store.search(current_user.id, q, limit, after)
+        next_cursor = encode_search_cursor(hits[-1].score, hits[-1].id) if has_more and hits else None
+        return {
+            "hits": normalize_timestamps([vars(hit) for hit in hits], ("created_at",)),
+            "total": total,
+            "next_cursor": next_cursor,
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/get_journal_entry/{journal_entry_id}", response_model_exclude_unset=True)
+async def get_journal_entry(
+    journal_entry_id: uuid.UUID,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    fields: str | None = None,
+) -> JournalEntryFields:
+    """Retrieve a specific journal entry by ID for the authenticated user (ETag / 304 like the list)."""
+    select = parse_fields(fields)
+
+    async def load() -> RenderedJSON:
+        response = await (
+            supabase.table("journal_entries")
+            .select(select)
+            .eq("id", str(journal_entry_id))
+            .eq("user_id", current_user.id)
+            .execute()
+        )
+        if not response.data:
+            raise HTTPException(status_code=404, detail="Journal entry not found")
+        entry = format_entry_timestamps(response.data[0])
+        return RenderedJSON.of_rows(entry, [entry], salt=select)
+
+    try:
+        rendered = await read_cache.get_or_load(
+            current_user.id, "journal_entries", json.dumps(["entry", str(journal_entry_id), select]), load
+        )
+        return conditional_response(request, rendered)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -96,9 +357,9 @@ async def update_journal_entry(
     try:
         update_payload = {
             "content": update_request.content,
-            "updated_at": datetime.now().isoformat()
+            "updated_at": datetime.now(timezone.utc).isoformat(),
         }
-        response = (
+        response = await (
             supabase.table("journal_entries")
             .update(update_payload)
             .eq("id", str(update_request.journal_entry_id))
@@ -106,11 +367,98 @@ async def update_journal_entry(
             .execute()
         )
         if not response.data:
-            print(
+            logger.info(
                 f"Journal entry not found or unauthorized: entry_id={update_request.journal_entry_id}, user_id={current_user.id}"
             )
             raise HTTPException(status_code=404, detail="Journal entry not found")
+        # A direct save replaces whatever the editor had buffered
+        draft_autosaver.discard(current_user.id, str(update_request.journal_entry_id))
+        await entry_written(current_user.id, response.data[0])
+        return format_entry_timestamps(response.data[0])
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def conflict_error(conflict: DraftConflict) -> HTTPException:
+    """409 carrying the server's version, so the client can show or merge it."""
+    server = format_entry_timestamps(dict(conflict.server_row))
+    return HTTPException(
+        status_code=409,
+        detail={
+            "message": "Journal entry was changed elsewhere; reload it before saving",
+            "server_updated_at": server["updated_at"],
+            "server_content": server["content"],
+        },
+    )
+
+
+@router.put("/journal/{journal_entry_id}/draft", status_code=202)
+async def save_journal_draft(
+    journal_entry_id: uuid.UUID,
+    draft: JournalDraftUpdate,
+    current_user: User = Depends(get_current_user),
+) -> DraftStatus:
+    """Autosave the editor's content; it is written once the user pauses typing.
+
+    Drafts for an entry are coalesced in memory (see draft_autosave.py), so a
+    stream of autosaves costs one database write per pause. base_updated_at is
+    the updated_at of the entry as the editor loaded it (or as last returned
+    here). client_id should be stable for one editor tab. 409 means the entry was
+    changed elsewhere (including by another tab): the detail carries the
+    server's content and updated_at, and a draft based on that version is
+    accepted again.
+    """
+    try:
+        buffered = await draft_autosaver.save(
+            current_user.id, str(journal_entry_id), draft.content, draft.base_updated_at, draft.client_id
+        )
+        return {
+            "journal_entry_id": journal_entry_id,
+            "revision": buffered.revision,
+            "pending": buffered.pending,
+            "updated_at": buffered.base_updated_at,
+            "flush_in_seconds": draft_autosaver.flush_due_in(buffered),
+        }
+    except DraftConflict as e:
+        raise conflict_error(e)
+    except DraftNotFound:
+        raise HTTPException(status_code=404, detail="Journal entry not found")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/journal/{journal_entry_id}/commit")
+async def commit_journal_draft(
+    journal_entry_id: uuid.UUID,
+    current_user: User = Depends(get_current_user),
+) -> JournalEntry:
+    """Write the entry's buffered draft now (explicit save) and return the stored entry.
+
+    With no draft pending this just returns the entry as stored.
+    """
+    entry_id = str(journal_entry_id)
+    try:
+        saved = await draft_autosaver.commit(current_user.id, entry_id)
+        if saved is not None:
+            return format_entry_timestamps(saved)
+        response = await (
+            supabase.table("journal_entries")
+            .select("*")
+            .eq("id", entry_id)
+            .eq("user_id", current_user.id)
+            .execute()
+        )
+        if not response.data:
+            raise HTTPException(status_code=404, detail="Journal entry not found")
         return format_entry_timestamps(response.data[0])
+    except DraftConflict as e:
+        raise conflict_error(e)
+    except DraftNotFound:
+        raise HTTPException(status_code=404, detail="Journal entry not found")
     except HTTPException:
         raise
     except Exception as e:
@@ -124,7 +472,7 @@ async def delete_journal_entry(
 ) -> dict[str, Any]:
     """Delete a journal entry for the authenticated user."""
     try:
-        response = (
+        response = await (
             supabase.table("journal_entries")
             .delete()
             .eq("id", str(delete_request.journal_entry_id))
@@ -133,6 +481,7 @@ async def delete_journal_entry(
         )
         if not response.data:
             raise HTTPException(status_code=404, detail="Journal entry not found")
+        await entry_deleted(current_user.id, str(delete_request.journal_entry_id))
         return {"message": "Journal entry deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,37 @@
+"""Per-user journaling and goal statistics."""
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+try:
+    from backend.schemas import User, UserStats
+    from backend.dependencies import get_current_user
+    from backend.user_stats import fetch_user_stats, present_stats
+    from backend.responses import normalize_timestamps
+except ModuleNotFoundError:
+    from schemas import User, UserStats
+    from dependencies import get_current_user
+    from user_stats import fetch_user_stats, present_stats
+    from responses import normalize_timestamps
+
+
+router = APIRouter(prefix="/api", tags=["stats"])
+
+STATS_TIMESTAMPS = ("updated_at",)
+
+
+@router.get("/stats")
+async def get_stats(
+    days: int = Query(30, ge=0, le=3660),
+    current_user: User = Depends(get_current_user),
+) -> UserStats:
+    """Entry counts per day, streaks, word-count histogram and goal counts by status.
+
+    Served from the user's materialized stats row (one primary-key read, however
+    many entries they have). days limits daily_counts to the most recent days;
+    days are UTC calendar days.
+    """
+    try:
+        row = await fetch_user_stats(current_user.id)
+        return present_stats(normalize_timestamps([row], STATS_TIMESTAMPS)[0] if row else None, days)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
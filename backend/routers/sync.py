@@ -0,0 +1,171 @@
+"""Delta sync of journal entries and goals.
+
+Clients keep a local copy of their rows plus an opaque watermark. Each sync
+returns only the rows created or changed since that watermark, tombstones for
+rows deleted since then, and a new watermark. Each table is read in
+(updated_at, id) keyset order, so rows that share a timestamp (e.g. from a bulk
+insert) are never skipped or repeated across pages.
+
+A row is stamped before its transaction commits, so it can become visible after
+a sync has already read rows with later timestamps. Once a table has no more
+pages, its watermark is therefore moved SYNC_OVERLAP_SECONDS behind the newest
+row read, and the next sync reads that overlap again; clients upsert by id, so
+the repeated rows are harmless.
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Any
+from datetime import datetime, timedelta
+import asyncio
+import base64
+import json
+import os
+
+try:
+    from backend.schemas import User, SyncResponse
+    from backend.dependencies import get_current_user, supabase
+    from backend.responses import normalize_timestamps
+except ModuleNotFoundError:
+    from schemas import User, SyncResponse
+    from dependencies import get_current_user, supabase
+    from responses import normalize_timestamps
+
+
+router = APIRouter(prefix="/api", tags=["sync"])
+
+DEFAULT_SYNC_LIMIT = 500
+MAX_SYNC_LIMIT = 2000
+
+# Table name -> column that orders its changes
+SYNC_TABLES = {
+    "journal_entries": "updated_at",
+    "goals": "updated_at",
+    "sync_tombstones": "deleted_at",
+}
+
+# Sorts before every id of the table, so a rewound position includes all rows at its timestamp
+SYNC_MIN_IDS = {
+    "journal_entries": "00000000-0000-0000-0000-000000000000",
+    "goals": "00000000-0000-0000-0000-000000000000",
+    "sync_tombstones": "0",
+}
+# Longer than any transaction takes from stamping a row to committing it
+SYNC_OVERLAP_SECONDS = float(os.getenv("SYNC_OVERLAP_SECONDS", "30"))
+
+Position = list[str] | None
+
+
+def encode_watermark(positions: dict[str, Position]) -> str:
+    """Opaque watermark holding the last (timestamp, id) seen per table."""
+    raw = json.dumps(positions, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_watermark(watermark: str) -> dict[str, Position]:
+    """Inverse of encode_watermark; raises 400 for anything it did not produce."""
+    try:
+        raw = base64.urlsafe_b64decode(watermark + "=" * (-len(watermark) % 4))
+        positions = json.loads(raw)
+        if set(positions) != set(SYNC_TABLES):
+            raise ValueError("unexpected tables")
+        for position in positions.values():
+            if position is not None and (len(position) != 2 or not all(isinstance(p, str) for p in position)):
+                raise ValueError("malformed position")
+        return positions
+    except (ValueError, TypeError, AttributeError):
+        raise HTTPException(status_code=400, detail="Invalid watermark")
+
+
+async def fetch_changes(
+    table: str, user_id: str, position: Position, limit: int
+) -> list[dict[str, Any]]:
+    """Rows of table after position in (change column, id) order, up to limit + 1."""
+    column = SYNC_TABLES[table]
+    query = supabase.table(table).select("*").eq("user_id", user_id)
+    if position is not None:
+        changed_at, row_id = position
+        query = query.or_(
+            f'{column}.gt."{changed_at}",and({column}.eq."{changed_at}",id.gt.{row_id})'
+        )
+    response = await query.order(column).order("id").limit(limit + 1).execute()
+    return response.data or []
+
+
+def rewind(table: str, position: Position) -> Position:
+    """Move position SYNC_OVERLAP_SECONDS back, to catch rows that commit late."""
+    if position is None:
+        return None
+    changed_at = datetime.fromisoformat(position[0]) - timedelta(seconds=SYNC_OVERLAP_SECONDS)
+    return [changed_at.isoformat(), SYNC_MIN_IDS[table]]
+
+
+async def latest_tombstone(user_id: str) -> Position:
+    """Position of the user's newest tombstone, so a full sync skips older deletions."""
+    response = await (
+        supabase.table("sync_tombstones")
+        .select("id, deleted_at")
+        .eq("user_id", user_id)
+        .order("deleted_at", desc=True)
+        .order("id", desc=True)
+        .limit(1)
+        .execute()
+    )
+    if not response.data:
+        return None
+    row = response.data[0]
+    return [str(row["deleted_at"]), str(row["id"])]
+
+
+@router.get("/sync")
+async def sync(
+    watermark: str | None = None,
+    limit: int = Query(DEFAULT_SYNC_LIMIT, ge=1, le=MAX_SYNC_LIMIT),
+    current_user: User = Depends(get_current_user),
+) -> SyncResponse:
+    """Return entries and goals changed since watermark, plus deletions.
+
+    Without a watermark this is a full sync: every row is returned (paged by
+    limit) and no tombstones are needed. Apply the response by upserting entries
+    and goals by id and removing every deleted record_id.
+    """
+    full = watermark is None
+    try:
+        if full:
+            positions: dict[str, Position] = {table: None for table in SYNC_TABLES}
+            positions["sync_tombstones"] = rewind("sync_tombstones", await latest_tombstone(current_user.id))
+        else:
+            positions = decode_watermark(watermark)
+
+        tables = list(SYNC_TABLES)
+        results = await asyncio.gather(*(
+            fetch_changes(table, current_user.id, positions[table], limit)
+            for table in tables
+        ))
+
+        has_more = False
+        changes: dict[str, list[dict[str, Any]]] = {}
+        for table, rows in zip(tables, results):
+            if rows:
+                # Record the position from the raw row before timestamps are reformatted
+                last = rows[min(len(rows), limit) - 1]
+                positions[table] = [str(last[SYNC_TABLES[table]]), str(last["id"])]
+            if len(rows) > limit:
+                # Next page: continue exactly where this one ended
+                has_more = True
+                rows = rows[:limit]
+            elif rows:
+                positions[table] = rewind(table, positions[table])
+            changes[table] = rows
+
+        return {
+            "entries": normalize_timestamps(changes["journal_entries"]),
+            "goals": normalize_timestamps(changes["goals"]),
+            "deleted": changes["sync_tombstones"],
+            "watermark": encode_watermark(positions),
+            "has_more": has_more,
+            "full": full,
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,5 +1,6 @@
-from pydantic import BaseModel
-from datetime import datetime
+from pydantic import BaseModel, Field
+from datetime import date, datetime
+from typing import Any
 import uuid
 
 
@@ -21,6 +22,54 @@ class JournalEntry(BaseModel):
     updated_at: datetime
 
 
+class JournalEntryFields(BaseModel):
+    """A journal entry row restricted to the requested columns (others are omitted)."""
+
+    id: uuid.UUID | None = None
+    user_id: uuid.UUID | None = None
+    content: str | None = None
+    created_at: datetime | None = None
+    updated_at: datetime | None = None
+
+
+class JournalSearchHit(JournalEntryFields):
+    """A journal entry returned by semantic search, with its cosine similarity to the query."""
+
+    score: float
+
+
+class KeywordSearchHit(BaseModel):
+    """A journal entry matched by keyword search.
+
+    highlights are [start, end) character offsets of the matched words in snippet.
+    """
+
+    id: uuid.UUID
+    created_at: datetime
+    score: float
+    snippet: str
+    highlights: list[tuple[int, int]]
+
+
+class KeywordSearchPage(BaseModel):
+    """One page of keyword search hits, best first; total counts every match."""
+
+    hits: list[KeywordSearchHit]
+    total: int
+    next_cursor: str | None = None
+
+
+class JournalEntryPage(BaseModel):
+    """One page of journal entries, newest first.
+
+    Pass next_cursor back as ``cursor`` to fetch the following page; it is None
+    on the last page.
+    """
+
+    entries: list[JournalEntryFields]
+    next_cursor: str | None = None
+
+
 class JournalEntryCreate(BaseModel):
     """Payload for creating a journal entry (DB fills id/created_at/updated_at)."""
 
@@ -50,6 +99,32 @@ class JournalEntryDeleteRequest(BaseModel):
     journal_entry_id: uuid.UUID
 
 
+class JournalDraftUpdate(BaseModel):
+    """An autosaved draft: the editor's full content and the entry version it was edited from.
+
+    client_id identifies the editor (one per browser tab), so drafts from two
+    tabs of the same entry are told apart.
+    """
+
+    content: str
+    base_updated_at: datetime
+    client_id: str | None = Field(default=None, max_length=64)
+
+
+class DraftStatus(BaseModel):
+    """State of an entry's buffered draft after an autosave.
+
+    updated_at is the entry version the draft will be written over; flush_in_seconds
+    is when the pending draft will be written (None once nothing is pending).
+    """
+
+    journal_entry_id: uuid.UUID
+    revision: int
+    pending: bool
+    updated_at: datetime
+    flush_in_seconds: float | None = None
+
+
 class Goal(BaseModel):
     """Represents a row in the goals table."""
 
@@ -59,6 +134,19 @@ class Goal(BaseModel):
     status: str
     body_text: str
     created_at: datetime
+    updated_at: datetime | None = None
+
+
+class GoalFields(BaseModel):
+    """A goal row restricted to the requested columns (others are omitted)."""
+
+    id: uuid.UUID | None = None
+    user_id: uuid.UUID | None = None
+    title: str | None = None
+    status: str | None = None
+    body_text: str | None = None
+    created_at: datetime | None = None
+    updated_at: datetime | None = None
 
 
 class GoalCreate(BaseModel):
@@ -89,4 +177,179 @@ class GoalUpdateRequest(BaseModel):
 class GoalDeleteRequest(BaseModel):
     """Request body for deleting a specific goal."""
 
-    goal_id: str  # Accept string, will convert to UUID if needed
\ No newline at end of file
+    goal_id: str  # Accept string, will convert to UUID if needed
+
+
+class AnalysisCreate(BaseModel):
+    """Request body for queueing an analysis over a date range (inclusive)."""
+
+    start_date: date
+    end_date: date
+
+
+class Analysis(BaseModel):
+    """Represents a row in the analyses table (a queued, running or finished job)."""
+
+    id: uuid.UUID
+    user_id: uuid.UUID
+    status: str  # queued | running | completed | failed
+    start_date: date
+    end_date: date
+    input_hash: str | None = None
+    date_range: str | None = None
+    entry_count: int | None = None
+    goals_analyzed: int | None = None
+    analysis: str | None = None
+    # Model tier that produced the analysis (see model_router.RouteDecision)
+    model_route: dict[str, Any] | None = None
+    error: str | None = None
+    created_at: datetime
+    completed_at: datetime | None = None
+
+
+class AnalysisFields(BaseModel):
+    """An analyses row restricted to the requested columns (others are omitted)."""
+
+    id: uuid.UUID | None = None
+    status: str | None = None
+    start_date: date | None = None
+    end_date: date | None = None
+    date_range: str | None = None
+    entry_count: int | None = None
+    goals_analyzed: int | None = None
+    analysis: str | None = None
+    created_at: datetime | None = None
+    completed_at: datetime | None = None
+
+
+class Dashboard(BaseModel):
+    """Everything the dashboard renders, gathered in one request."""
+
+    entries: list[JournalEntryFields]
+    entry_count: int
+    goals: list[GoalFields]
+    active_goal_count: int
+    latest_analysis: AnalysisFields | None = None
+
+
+class WordCountBucket(BaseModel):
+    """Entries whose word count falls in [min_words, max_words] (no upper bound if None)."""
+
+    min_words: int
+    max_words: int | None = None
+    count: int
+
+
+class UserStats(BaseModel):
+    """Materialized journaling and goal statistics for one user (days are UTC)."""
+
+    entry_count: int
+    total_words: int
+    average_words: float
+    current_streak_days: int
+    longest_streak_days: int
+    first_entry_day: date | None = None
+    last_entry_day: date | None = None
+    daily_counts: dict[date, int]
+    word_histogram: list[WordCountBucket]
+    goal_status_counts: dict[str, int]
+    updated_at: datetime | None = None
+
+
+class Tombstone(BaseModel):
+    """A deleted row, reported by delta sync so clients can drop it."""
+
+    table_name: str  # journal_entries | goals
+    record_id: uuid.UUID
+    deleted_at: datetime
+
+
+class SyncResponse(BaseModel):
+    """Rows created, changed or deleted since the client's watermark.
+
+    Send watermark back on the next sync. When has_more is true the response was
+    capped at the page limit; sync again right away to fetch the rest.
+    """
+
+    entries: list[JournalEntry]
+    goals: list[Goal]
+    deleted: list[Tombstone]
+    watermark: str
+    has_more: bool = False
+    full: bool = False
+
+
+class JournalEntryImport(JournalEntryCreate):
+    """One imported journal entry; created_at is kept when given, id and updated_at are not.
+
+    updated_at is always the import time, so delta sync picks the row up on other devices.
+    """
+
+    created_at: datetime | None = None
+
+
+class GoalImport(GoalCreate):
+    """One imported goal (created_at is kept as for JournalEntryImport)."""
+
+    created_at: datetime | None = None
+
+
+class ImportRowError(BaseModel):
+    """A rejected import row: its 1-based line number in the upload and why."""
+
+    line: int
+    error: str
+
+
+class BulkImportResult(BaseModel):
+    """Outcome of a bulk import. errors lists at most the first 100 rejected rows."""
+
+    table: str
+    received: int
+    imported: int
+    failed: int
+    errors: list[ImportRowError]
+
+
+class AnalyzeSentimentRequest(BaseModel):
+    """Texts to score with the local sentiment scorer."""
+
+    texts: list[str] = Field(..., min_length=1, max_length=1000)
+
+
+class SentimentResult(BaseModel):
+    """Valence in (-1, 1) and emotion words per 100 words for one text."""
+
+    valence: float
+    emotions: dict[str, float]
+    word_count: int
+    matched_words: int
+
+
+class SentimentResponse(BaseModel):
+    """Scores in the same order as the request's texts."""
+
+    lexicon_version: str
+    results: list[SentimentResult]
+
+
+class MoodTrendDay(BaseModel):
+    """One calendar day of the mood trend; valence is None on days without entries."""
+
+    date: date
+    entry_count: int
+    valence: float | None = None
+    rolling_valence: float | None = None
+    emotions: dict[str, float]
+
+
+class MoodTrend(BaseModel):
+    """Daily mood scores and rolling averages over a date range (UTC days)."""
+
+    start_date: date
+    end_date: date
+    window: int
+    entry_count: int
+    lexicon_version: str
+    days: list[MoodTrendDay]
+    timings: dict[str, float]
@@ -0,0 +1,215 @@
+"""Local, CPU-only sentiment and emotion scoring for journal entries.
+
+A small lexicon (lexicons/sentiment.tsv) gives each word a valence from -3 to 3
+and any of a few emotions. A batch of texts is tokenized once into flat arrays of
+(text, word, weight) and scored with NumPy: valence is a weighted bincount per
+text and emotions a weighted bincount per emotion column. No network, GPU or
+model download, so a year of entries scores in milliseconds.
+
+Negators ("not", "never", ...) within the three words before a word flip and
+dampen its valence and drop its emotion; an intensifier ("very", "so", ...)
+boosts the word after it. Both are computed with array shifts and cumulative
+sums rather than per-token branching. It is a lexical heuristic, not a language model: good for trends across
+many entries, not for reading one entry closely.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+import hashlib
+import re
+
+import numpy as np
+
+LEXICON_PATH = Path(__file__).parent / "lexicons" / "sentiment.tsv"
+EMOTIONS = ("joy", "sadness", "anger", "anxiety", "calm")
+
+NEGATORS = frozenset(
+    "not no never nothing nobody nowhere neither nor without hardly barely "
+    "dont don't didnt didn't isnt isn't wasnt wasn't cant can't couldnt couldn't "
+    "wont won't wouldnt wouldn't aint ain't".split()
+)
+INTENSIFIERS = frozenset("very really so extremely incredibly super totally truly deeply too".split())
+NEGATION_SCOPE = 3
+NEGATION_WEIGHT = -0.74
+INTENSIFIER_WEIGHT = 1.3
+# Squashes summed valence into (-1, 1): x / sqrt(x^2 + alpha)
+NORMALIZE_ALPHA = 15.0
+SUFFIXES = ("ness", "ing", "ed", "ly", "es", "s")
+
+_WORD = re.compile(r"[a-z']+")
+
+# Special token ids (lexicon ids are >= 0)
+_UNKNOWN, _PAD, _NEGATOR, _INTENSIFIER = -1, -2, -3, -4
+_PADDING = [""] * NEGATION_SCOPE
+
+
+@dataclass
+class SentimentScores:
+    """Scores for a batch: row i belongs to text i."""
+
+    valence: np.ndarray  # (n,) in (-1, 1)
+    emotions: np.ndarray  # (n, len(EMOTIONS)) matched emotion words per 100 words
+    word_counts: np.ndarray  # (n,)
+    matched: np.ndarray  # (n,) lexicon words found
+
+    def row(self, i: int) -> dict:
+        return {
+            "valence": round(float(self.valence[i]), 4),
+            "emotions": {name: round(float(self.emotions[i, j]), 3) for j, name in enumerate(EMOTIONS)},
+            "word_count": int(self.word_counts[i]),
+            "matched_words": int(self.matched[i]),
+        }
+
+
+class SentimentScorer:
+    """Lexicon scorer with vectors indexed by word id."""
+
+    def __init__(self, lexicon_path: Path = LEXICON_PATH, cache_size: int = 50_000):
+        words, valences, emotion_rows = [], [], []
+        for line in lexicon_path.read_text(encoding="utf-8").splitlines():
+            if not line.strip() or line.startswith("#"):
+                continue
+            word, valence, *rest = line.split("\t")
+            tags = {tag.strip() for tag in rest[0].split(",")} if rest else set()
+            unknown = tags - set(EMOTIONS)
+            if unknown:
+                raise ValueError(f"Unknown emotions for {word!r} in {lexicon_path.name}: {sorted(unknown)}")
+            words.append(word)
+            valences.append(float(valence))
+            emotion_rows.append([1.0 if name in tags else 0.0 for name in EMOTIONS])
+
+        self.word_ids = {word: i for i, word in enumerate(words)}
+        self.valence = np.asarray(valences, dtype=np.float64)
+        self.emotion_matrix = np.asarray(emotion_rows, dtype=np.float64).reshape(len(words), len(EMOTIONS))
+        self.version = hashlib.sha256(lexicon_path.read_bytes()).hexdigest()[:12]
+        # token -> lexicon id, or one of the negative markers below for unknown/special words
+        self._lookup: dict[str, int] = {"": _PAD}
+        self._lookup.update(dict.fromkeys(NEGATORS, _NEGATOR))
+        self._lookup.update(dict.fromkeys(INTENSIFIERS, _INTENSIFIER))
+        # Per-text results keyed by content digest, so re-scoring unchanged entries is free
+        self._cache: OrderedDict[bytes, tuple[float, tuple[float, ...], int, int]] = OrderedDict()
+        self.cache_size = cache_size
+
+    def _word_id(self, token: str) -> int:
+        """Lexicon id of token or of its stem, _UNKNOWN if neither is known (memoized)."""
+        word_id = self.word_ids.get(token, _UNKNOWN)
+        if word_id < 0:
+            for suffix in SUFFIXES:
+                if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+                    stem = token[: -len(suffix)]
+                    word_id = self.word_ids.get(stem, self.word_ids.get(stem + "e", _UNKNOWN))
+                    if word_id >= 0:
+                        break
+        if len(self._lookup) < 200_000:
+            self._lookup[token] = word_id
+        return word_id
+
+    def score(self, texts: list[str]) -> SentimentScores:
+        """Score every text in one vectorized pass (cached texts are not re-tokenized)."""
+        n = len(texts)
+        valence = np.zeros(n)
+        emotions = np.zeros((n, len(EMOTIONS)))
+        word_counts = np.zeros(n, dtype=np.int64)
+        matched = np.zeros(n, dtype=np.int64)
+
+        keys = [hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest() for text in texts]
+        pending: list[int] = []
+        tokens: list[str] = []
+        for i, (text, key) in enumerate(zip(texts, keys)):
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                valence[i], emotions[i], word_counts[i], matched[i] = cached
+                continue
+            pending.append(i)
+            text_tokens = _WORD.findall(text.lower())
+            word_counts[i] = len(text_tokens)
+            tokens.extend(text_tokens)
+            # Padding keeps negation and intensifier windows inside one text
+            tokens.extend(_PADDING)
+
+        if pending:
+            for token in set(tokens).difference(self._lookup):
+                self._word_id(token)
+            lookup = self._lookup.get
+            ids_array = np.asarray([lookup(token, _UNKNOWN) for token in tokens], dtype=np.int64)
+            lengths = word_counts[pending] + len(_PADDING)
+            rows = np.repeat(np.asarray(pending, dtype=np.int64), lengths)
+
+            # A word is negated if a negator is among the NEGATION_SCOPE words before it
+            negators = np.concatenate(([0], np.cumsum(ids_array == _NEGATOR)))
+            positions = np.arange(len(ids_array))
+            negated = negators[positions] - negators[np.maximum(positions - NEGATION_SCOPE, 0)] > 0
+            boosted = np.concatenate(([False], ids_array[:-1] == _INTENSIFIER))
+
+            known = ids_array >= 0
+            row_array = rows[known]
+            id_array = ids_array[known]
+            weight_array = np.where(boosted[known], INTENSIFIER_WEIGHT, 1.0) * np.where(
+                negated[known], NEGATION_WEIGHT, 1.0
+            )
+
+            raw = np.bincount(row_array, weights=weight_array * self.valence[id_array], minlength=n)
+            # Negated words still move valence but no longer signal their emotion
+            emotion_weights = np.clip(weight_array, 0.0, None)[:, None] * self.emotion_matrix[id_array]
+            per_100 = 100.0 / np.maximum(word_counts, 1)
+            index = np.asarray(pending)
+            valence[index] = (raw / np.sqrt(raw * raw + NORMALIZE_ALPHA))[index]
+            for j in range(len(EMOTIONS)):
+                column = np.bincount(row_array, weights=emotion_weights[:, j], minlength=n)
+                emotions[index, j] = (column * per_100)[index]
+            matched[index] = np.bincount(row_array, minlength=n)[index]
+
+            for i in pending:
+                self._cache[keys[i]] = (valence[i], tuple(emotions[i]), word_counts[i], matched[i])
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+        return SentimentScores(valence, emotions, word_counts, matched)
+
+
+scorer = SentimentScorer()
+
+
+def daily_trend(
+    days: list[str], day_index: list[int] | np.ndarray, scores: SentimentScores, window: int
+) -> list[dict]:
+    """Per-day means and trailing window-day rolling means, entry-weighted.
+
+    days are consecutive calendar days; day_index[i] is the position in days of
+    the entry behind scores row i. Days without entries have no daily score but
+    still advance the rolling window.
+    """
+    n_days = len(days)
+    day_index = np.clip(np.asarray(day_index, dtype=np.int64), 0, n_days - 1)
+    counts = np.bincount(day_index, minlength=n_days).astype(np.float64)
+    valence_sums = np.bincount(day_index, weights=scores.valence, minlength=n_days)
+    emotion_sums = np.stack(
+        [np.bincount(day_index, weights=scores.emotions[:, j], minlength=n_days) for j in range(len(EMOTIONS))],
+        axis=1,
+    )
+
+    kernel = np.ones(window)
+    rolling_counts = np.convolve(counts, kernel)[:n_days]
+    rolling_valence = np.convolve(valence_sums, kernel)[:n_days]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        daily_valence = valence_sums / counts
+        daily_emotions = emotion_sums / counts[:, None]
+        rolling = rolling_valence / rolling_counts
+
+    trend = []
+    for d, day in enumerate(days):
+        has_entries = counts[d] > 0
+        trend.append({
+            "date": day,
+            "entry_count": int(counts[d]),
+            "valence": round(float(daily_valence[d]), 4) if has_entries else None,
+            "rolling_valence": round(float(rolling[d]), 4) if rolling_counts[d] > 0 else None,
+            "emotions": (
+                {name: round(float(daily_emotions[d, j]), 3) for j, name in enumerate(EMOTIONS)}
+                if has_entries else {}
+            ),
+        })
+    return trend
@@ -0,0 +1,123 @@
+"""Request coalescing (single-flight) for in-flight LLM completions.
+
+Concurrent callers that ask for the same key share one upstream completion
+instead of each starting their own. Whole-text calls share a task; streaming
+calls share one producer whose chunks are fanned out to every subscriber,
+including ones that join after the first tokens have arrived.
+"""
+
+from typing import Any, AsyncIterator, Awaitable, Callable
+import asyncio
+
+
+class _StreamFlight:
+    """One upstream stream buffered and replayed to any number of subscribers."""
+
+    def __init__(self, source: AsyncIterator[str]):
+        self.chunks: list[str] = []
+        self.done = False
+        self.error: BaseException | None = None
+        self._changed = asyncio.Event()
+        self.task = asyncio.create_task(self._run(source))
+
+    async def _run(self, source: AsyncIterator[str]) -> None:
+        try:
+            async for chunk in source:
+                self.chunks.append(chunk)
+                self._notify()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+            self._notify()
+
+    def _notify(self) -> None:
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def subscribe(self) -> AsyncIterator[str]:
+        """Yield every chunk from the start of the stream, then follow it live."""
+        position = 0
+        while True:
+            changed = self._changed
+            while position < len(self.chunks):
+                yield self.chunks[position]
+                position += 1
+            if self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+            await changed.wait()
+
+
+class SingleFlight:
+    """Coalesces concurrent text completions that share a key."""
+
+    def __init__(self) -> None:
+        self._calls: dict[str, asyncio.Task[str]] = {}
+        self._streams: dict[str, _StreamFlight] = {}
+        self.leaders = 0
+        self.joined = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[str]]) -> str:
+        """Run fn once per key at a time; concurrent callers await the same result.
+
+        The shared call runs in its own task, so a caller that disconnects does not
+        cancel the completion for the others.
+        """
+        flight = self._streams.get(key)
+        if flight is not None:
+            self.joined += 1
+            return "".join([chunk async for chunk in flight.subscribe()])
+
+        task = self._calls.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.create_task(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._finish_call(key, t))
+        else:
+            self.joined += 1
+        return await asyncio.shield(task)
+
+    async def stream(
+        self, key: str, factory: Callable[[], AsyncIterator[str]]
+    ) -> AsyncIterator[str]:
+        """Subscribe to the shared stream for key, starting it with factory if needed."""
+        task = self._calls.get(key)
+        if task is not None:
+            # A whole-text call is already running; deliver its result as one chunk.
+            self.joined += 1
+            yield await asyncio.shield(task)
+            return
+
+        flight = self._streams.get(key)
+        if flight is None:
+            self.leaders += 1
+            flight = _StreamFlight(factory())
+            self._streams[key] = flight
+            flight.task.add_done_callback(lambda _: self._finish_stream(key, flight))
+        else:
+            self.joined += 1
+
+        async for chunk in flight.subscribe():
+            yield chunk
+
+    def _finish_call(self, key: str, task: asyncio.Task[str]) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Mark the exception retrieved even if every caller went away
+            task.exception()
+
+    def _finish_stream(self, key: str, flight: _StreamFlight) -> None:
+        if self._streams.get(key) is flight:
+            del self._streams[key]
+
+    def stats(self) -> dict[str, Any]:
+        """Counters for upstream calls started versus requests that joined one."""
+        return {
+            "in_flight": len(self._calls) + len(self._streams),
+            "leaders": self.leaders,
+            "joined": self.joined,
+        }
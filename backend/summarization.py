@@ -0,0 +1,45 @@
+"""Hierarchical map-reduce condensing of long journal windows.
+
+Entries are packed into chunks by token budget and each chunk is summarized in
+parallel (with bounded concurrency). If the summaries still exceed the budget
+they are packed and summarized again, level by level, until they fit. With a
+fan-in of k chunks per level the number of sequential LLM rounds grows with
+log_k of the window, and the final prompt stays within a fixed budget.
+"""
+
+from typing import Awaitable, Callable
+import asyncio
+
+try:
+    from backend.token_budget import chunk_by_budget, count_tokens
+except ModuleNotFoundError:
+    from token_budget import chunk_by_budget, count_tokens
+
+
+async def map_reduce(
+    texts: list[str],
+    summarize: Callable[[list[str], int], Awaitable[str]],
+    *,
+    budget: int,
+    chunk_budget: int,
+    concurrency: int = 4,
+    model: str = "gpt-4-turbo",
+    max_levels: int = 6,
+) -> list[str]:
+    """Condense texts until their combined size fits budget.
+
+    summarize(chunk, level) turns a list of texts into one shorter text; level 0
+    receives raw entries, higher levels receive summaries.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(chunk: list[str], level: int) -> str:
+        async with semaphore:
+            return await summarize(chunk, level)
+
+    level = 0
+    while sum(count_tokens(text, model) for text in texts) > budget and level < max_levels:
+        chunks = chunk_by_budget(texts, chunk_budget, model)
+        texts = list(await asyncio.gather(*(run(chunk, level) for chunk in chunks)))
+        level += 1
+    return texts
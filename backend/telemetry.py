@@ -0,0 +1,334 @@
+"""Per-request timing spans, Server-Timing headers and Prometheus-style metrics.
+
+``TimingMiddleware`` opens a timing record for each HTTP request. Code on the
+request path reports stages into it with ``span("name")`` (or
+``record_stage`` for a duration it already measured), and the response carries
+them as a ``Server-Timing`` header (e.g. ``jwt;dur=0.4, supabase;dur=31.2;desc="2
+calls", total;dur=35.0``) for the browser's network panel. Stages that finish
+after the headers are sent, such as a streamed completion, are only in the
+metrics. Outside a request (background workers), stages are recorded under
+route "background".
+
+Metrics are kept in process as plain counters and fixed-bucket histograms, so
+recording one costs a dict lookup and a bisect. ``GET /metrics`` renders them in
+the Prometheus text format, along with values read from caches and queues when
+scraped (see ``MetricsRegistry.callback``). With several uvicorn workers each one
+reports its own numbers.
+
+Upstream HTTP calls are timed by wrapping the httpx transport
+(``TimedTransport``). The time recorded runs until the response headers arrive.
+"""
+
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Any, Callable, Iterable, Iterator
+import os
+import time
+
+import httpx
+
+# Seconds; spans from sub-millisecond cache hits to minute-long completions
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Set SERVER_TIMING=0 to stop sending stage timings to clients (metrics are unaffected)
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING", "1") != "0"
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    """A monotonically increasing count per label combination."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1.0) -> None:
+        self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def render(self) -> Iterator[str]:
+        for values, total in sorted(self._values.items()):
+            yield f"{self.name}{_labels(self.label_names, values)} {_number(total)}"
+
+
+class Histogram:
+    """Counts of observations per bucket, plus their sum, per label combination."""
+
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, help: str, labels: tuple[str, ...] = (), buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    ):
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        self.buckets = buckets
+        # label values -> [count in bucket 0..n-1, count above the last bucket, sum]
+        self._series: dict[tuple[str, ...], list[float]] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> Iterator[str]:
+        for values, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = f'le="{bound}"'
+                yield f"{self.name}_bucket{_labels(self.label_names, values, le)} {cumulative}"
+            cumulative += series[len(self.buckets)]
+            le = 'le="+Inf"'
+            yield f"{self.name}_bucket{_labels(self.label_names, values, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.label_names, values)} {_number(round(series[-1], 6))}"
+            yield f"{self.name}_count{_labels(self.label_names, values)} {cumulative}"
+
+
+class _Callback:
+    """A metric whose samples are read from elsewhere when scraped."""
+
+    def __init__(
+        self, name: str, kind: str, help: str, labels: tuple[str, ...],
+        collect: Callable[[], Iterable[tuple[tuple[str, ...], float]]],
+    ):
+        self.name = name
+        self.kind = kind
+        self.help = help
+        self.label_names = labels
+        self.collect = collect
+
+    def render(self) -> Iterator[str]:
+        for values, value in self.collect():
+            yield f"{self.name}{_labels(self.label_names, values)} {_number(value)}"
+
+
+class MetricsRegistry:
+    """Every metric the process exports."""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, Counter | Histogram | _Callback] = {}
+
+    def _add(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels: tuple[str, ...] = ()) -> Counter:
+        return self._add(Counter(name, help, labels))
+
+    def histogram(
+        self, name: str, help: str, labels: tuple[str, ...] = (), buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._add(Histogram(name, help, labels, buckets))
+
+    def callback(
+        self, name: str, kind: str, help: str, labels: tuple[str, ...],
+        collect: Callable[[], Iterable[tuple[tuple[str, ...], float]]],
+    ) -> None:
+        """Export values that already live elsewhere (cache counters, queue depths).
+
+        collect returns (label values, value) pairs and only runs when /metrics is scraped.
+        """
+        self._add(_Callback(name, kind, help, labels, collect))
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines: list[str] = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+request_seconds = metrics.histogram(
+    "http_request_duration_seconds", "HTTP request latency, including streamed bodies",
+    ("method", "route", "status"),
+)
+stage_seconds = metrics.histogram(
+    "request_stage_duration_seconds", "Time a request spent in each stage (summed per request)",
+    ("route", "stage"),
+)
+upstream_errors = metrics.counter(
+    "upstream_errors_total", "Failed calls to upstream services by HTTP status or exception",
+    ("upstream", "error"),
+)
+llm_tokens = metrics.counter(
+    "llm_tokens_total", "Tokens reported by the LLM API", ("model", "kind"),
+)
+
+
+class RequestTiming:
+    """Stage durations accumulated while one request is handled."""
+
+    __slots__ = ("start", "stages")
+
+    def __init__(self) -> None:
+        self.start = time.perf_counter()
+        # stage -> [seconds, calls]
+        self.stages: dict[str, list[float]] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        stage = self.stages.get(name)
+        if stage is None:
+            self.stages[name] = [seconds, 1]
+        else:
+            stage[0] += seconds
+            stage[1] += 1
+
+    def header(self) -> str:
+        """Server-Timing value for the stages so far and the total."""
+        parts = []
+        for name, (seconds, calls) in self.stages.items():
+            part = f"{name};dur={seconds * 1000:.1f}"
+            if calls > 1:
+                part += f';desc="{int(calls)} calls"'
+            parts.append(part)
+        parts.append(f"total;dur={(time.perf_counter() - self.start) * 1000:.1f}")
+        return ", ".join(parts)
+
+
+_current: ContextVar[RequestTiming | None] = ContextVar("request_timing", default=None)
+
+
+def record_stage(name: str, seconds: float) -> None:
+    """Add a measured duration to the current request (or to the background series)."""
+    timing = _current.get()
+    if timing is not None:
+        timing.add(name, seconds)
+    else:
+        stage_seconds.observe(seconds, "background", name)
+
+
+def server_timing() -> str | None:
+    """Server-Timing value for the current request so far (None if disabled or outside a request).
+
+    Streamed responses send their header before the stages that produce the body
+    run, so they report this at the end of the stream instead.
+    """
+    timing = _current.get()
+    if timing is None or not SERVER_TIMING_ENABLED:
+        return None
+    return timing.header()
+
+
+class span:
+    """Time a block as stage ``name`` of the current request.
+
+        with span("format") as s:
+            ...
+        timings["format_ms"] = s.ms
+
+    A class rather than a @contextmanager generator: it is on every hot path.
+    """
+
+    __slots__ = ("name", "start", "seconds")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.seconds = 0.0
+
+    def __enter__(self) -> "span":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.seconds = time.perf_counter() - self.start
+        record_stage(self.name, self.seconds)
+
+    @property
+    def ms(self) -> float:
+        """The measured time in milliseconds, once the block has exited."""
+        return round(self.seconds * 1000, 1)
+
+
+def route_label(scope: dict[str, Any]) -> str:
+    """The matched route template, so /items/{id} is one series however many ids there are."""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class TimingMiddleware:
+    """ASGI middleware: per-request spans, the Server-Timing header and request metrics.
+
+    Written against raw ASGI rather than BaseHTTPMiddleware so streamed
+    responses pass through untouched.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timing = RequestTiming()
+        token = _current.set(timing)
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if SERVER_TIMING_ENABLED:
+                    headers = list(message.get("headers", ()))
+                    headers.append((b"server-timing", timing.header().encode("latin-1")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            route = route_label(scope)
+            request_seconds.observe(time.perf_counter() - timing.start, scope["method"], route, str(status))
+            for name, (seconds, _) in timing.stages.items():
+                stage_seconds.observe(seconds, route, name)
+
+
+class TimedTransport(httpx.AsyncBaseTransport):
+    """httpx transport that records each request as stage ``upstream`` and counts failures."""
+
+    def __init__(self, upstream: str, transport: httpx.AsyncBaseTransport):
+        self.upstream = upstream
+        self.transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        start = time.perf_counter()
+        try:
+            response = await self.transport.handle_async_request(request)
+        except Exception as e:
+            upstream_errors.inc(self.upstream, type(e).__name__)
+            raise
+        finally:
+            record_stage(self.upstream, time.perf_counter() - start)
+        if response.status_code >= 400:
+            upstream_errors.inc(self.upstream, str(response.status_code))
+        return response
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
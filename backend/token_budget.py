@@ -0,0 +1,84 @@
+"""Token counting and budget-based chunking for LLM prompts.
+
+Counts come from tiktoken, a declared dependency. The characters-per-token
+estimate is only a guarded fallback for environments where tiktoken or its
+encoding files cannot be loaded (e.g. an offline host without the BPE cache).
+"""
+
+import logging
+from functools import lru_cache
+from typing import Any
+
+try:
+    import tiktoken
+except ModuleNotFoundError:
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# Average English text is ~4 characters per token; 3.5 keeps the estimate on the safe side
+CHARS_PER_TOKEN = 3.5
+
+
+@lru_cache(maxsize=8)
+def _encoding(model: str) -> Any:
+    if tiktoken is None:
+        logger.warning("tiktoken is not installed; estimating token counts from characters")
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        # Encodings are downloaded on first use; without network access or a
+        # TIKTOKEN_CACHE_DIR the estimate keeps budgets working
+        logger.warning("Could not load tiktoken encoding for %s, estimating token counts: %s", model, e)
+        return None
+
+
+def count_tokens(text: str, model: str = "gpt-4-turbo") -> int:
+    """Number of tokens text occupies for model (estimated without tiktoken)."""
+    encoding = _encoding(model)
+    if encoding is None:
+        return int(len(text) / CHARS_PER_TOKEN) + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str = "gpt-4-turbo") -> str:
+    """Cut text so it fits in max_tokens."""
+    encoding = _encoding(model)
+    if encoding is None:
+        max_chars = int(max_tokens * CHARS_PER_TOKEN)
+        return text if len(text) <= max_chars else text[:max_chars]
+    tokens = encoding.encode(text, disallowed_special=())
+    return text if len(tokens) <= max_tokens else encoding.decode(tokens[:max_tokens])
+
+
+def chunk_by_budget(
+    texts: list[str],
+    budget: int,
+    model: str = "gpt-4-turbo",
+    separator_tokens: int = 2,
+) -> list[list[str]]:
+    """Group consecutive texts into chunks whose token total stays within budget.
+
+    Order is preserved. A single text larger than the budget is truncated to fit
+    its own chunk rather than overflowing the context window.
+    """
+    chunks: list[list[str]] = []
+    current: list[str] = []
+    used = 0
+    for text in texts:
+        tokens = count_tokens(text, model)
+        if tokens > budget:
+            text = truncate_to_tokens(text, budget - separator_tokens, model)
+            tokens = budget - separator_tokens
+        if current and used + tokens + separator_tokens > budget:
+            chunks.append(current)
+            current, used = [], 0
+        current.append(text)
+        used += tokens + separator_tokens
+    if current:
+        chunks.append(current)
+    return chunks
@@ -0,0 +1,64 @@
+"""Cache of already-verified access tokens.
+
+Verifying a JWT signature on every request costs far more than the request's own
+bookkeeping. Tokens that verified once are remembered, keyed by a digest of the
+token so the raw credential is not used as a dict key, until their ``exp`` claim
+passes. Only successful verifications are cached; a token that fails is checked
+again in full every time.
+"""
+
+from collections import OrderedDict
+from typing import Any
+import hashlib
+import time
+
+
+class VerifiedTokenCache:
+    """Bounded LRU of verified tokens that evicts each entry at its expiry."""
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._data: OrderedDict[bytes, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode("utf-8")).digest()
+
+    def get(self, token: str) -> Any | None:
+        """Return the value stored for token, or None if unknown or expired."""
+        key = self._key(token)
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        expires_at, value = item
+        if expires_at <= time.time():
+            del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, token: str, value: Any, expires_at: float) -> None:
+        """Remember value for token until expires_at (a Unix timestamp)."""
+        if expires_at <= time.time():
+            return
+        key = self._key(token)
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        """Forget every token (e.g. after rotating the signing secret)."""
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict[str, Any]:
+        """Hit/miss counters and current size."""
+        return {"entries": len(self._data), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,117 @@
+"""Materialized per-user journaling and goal statistics.
+
+The numbers live in one ``user_stats`` row per user, kept current by database
+triggers on journal_entries and goals (migrations/005_user_stats.sql): every
+insert, update and delete applies its delta in the same transaction as the
+write, whichever endpoint or tool made it. Reading stats is a primary-key
+lookup, independent of how many entries a user has.
+
+Backfill or repair rows from the underlying tables with:
+
+    python -m backend.user_stats rebuild              # every user
+    python -m backend.user_stats rebuild <user_id>... # specific users
+
+The rebuild functions are only executable by the service role, so the command
+needs SUPABASE_SERVICE_ROLE_KEY in addition to SUPABASE_URL.
+"""
+
+from datetime import date, datetime, timedelta, timezone
+from typing import Any
+from supabase import AsyncClient
+import asyncio
+import os
+import sys
+import uuid
+
+try:
+    from backend.dependencies import supabase
+except ModuleNotFoundError:
+    from dependencies import supabase
+
+# Lower bounds of the word-count buckets (must match stats_word_bucket in SQL)
+WORD_BUCKETS = (0, 50, 100, 250, 500, 1000)
+
+
+async def fetch_user_stats(user_id: str) -> dict[str, Any] | None:
+    """The user's stats row, or None if they have never written anything."""
+    response = await (
+        supabase.table("user_stats")
+        .select("*")
+        .eq("user_id", user_id)
+        .limit(1)
+        .execute()
+    )
+    return response.data[0] if response.data else None
+
+
+def present_stats(row: dict[str, Any] | None, days: int, today: date | None = None) -> dict[str, Any]:
+    """Shape a stats row for the API: the streak as of today, the last days of
+    daily counts and the histogram as ordered buckets."""
+    row = row or {}
+    today = today or datetime.now(timezone.utc).date()
+    last_entry_day = date.fromisoformat(row["last_entry_day"]) if row.get("last_entry_day") else None
+
+    # The run ending on the last active day is still current until a full day is missed
+    current_streak = 0
+    if last_entry_day is not None and last_entry_day >= today - timedelta(days=1):
+        current_streak = row.get("last_run_days", 0)
+
+    since = (today - timedelta(days=days - 1)).isoformat() if days > 0 else None
+    daily_counts = {
+        day: count
+        for day, count in sorted((row.get("daily_counts") or {}).items())
+        if since is not None and day >= since
+    }
+
+    histogram = row.get("word_histogram") or {}
+    word_histogram = [
+        {
+            "min_words": low,
+            "max_words": high - 1 if high is not None else None,
+            "count": histogram.get(str(low), 0),
+        }
+        for low, high in zip(WORD_BUCKETS, WORD_BUCKETS[1:] + (None,))
+    ]
+
+    entry_count = row.get("entry_count", 0)
+    total_words = row.get("total_words", 0)
+    return {
+        "entry_count": entry_count,
+        "total_words": total_words,
+        "average_words": round(total_words / entry_count, 1) if entry_count else 0.0,
+        "current_streak_days": current_streak,
+        "longest_streak_days": row.get("longest_streak_days", 0),
+        "first_entry_day": row.get("first_entry_day"),
+        "last_entry_day": row.get("last_entry_day"),
+        "daily_counts": daily_counts,
+        "word_histogram": word_histogram,
+        "goal_status_counts": row.get("goal_status_counts") or {},
+        "updated_at": row.get("updated_at"),
+    }
+
+
+async def rebuild(user_ids: list[str], service_role_key: str) -> int:
+    """Recompute stats from the source tables for user_ids, or for every user if empty."""
+    admin = AsyncClient(os.getenv("SUPABASE_URL"), service_role_key)
+    if not user_ids:
+        response = await admin.rpc("rebuild_all_user_stats").execute()
+        return int(response.data or 0)
+    for user_id in user_ids:
+        await admin.rpc("rebuild_user_stats", {"p_user_id": str(uuid.UUID(user_id))}).execute()
+    return len(user_ids)
+
+
+def main() -> None:
+    if len(sys.argv) < 2 or sys.argv[1] != "rebuild":
+        print("usage: python -m backend.user_stats rebuild [user_id ...]")
+        sys.exit(2)
+    service_role_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+    if not service_role_key:
+        print("SUPABASE_SERVICE_ROLE_KEY must be set to rebuild stats")
+        sys.exit(2)
+    rebuilt = asyncio.run(rebuild(sys.argv[2:], service_role_key))
+    print(f"Rebuilt stats for {rebuilt} user(s)")
+
+
+if __name__ == "__main__":
+    main()
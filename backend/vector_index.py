@@ -0,0 +1,476 @@
+"""Per-user vector index over journal entries for semantic search.
+
+Each user's embeddings live in one contiguous float32 matrix stored as a
+memory-mapped file (``<VECTOR_INDEX_DIR>/<user_id>/vectors.f32``), with the
+entry id of every row in ``meta.json`` and an append-only id log beside it.
+Rows are unit vectors, so a query is a single matrix-vector product followed
+by a partial sort of the top k. Thousands
+of entries search in well under a millisecond, and the OS page cache keeps hot
+users in memory without loading every index at startup.
+
+Entries are embedded incrementally when they are created or updated (through a
+small background queue) and removed when deleted. A user whose index does not
+exist yet, or was built by a different embedder, is backfilled from Supabase on
+first search; so is a user one of whose embedding jobs failed, was dropped at
+shutdown or did not fit in the queue. File locking, file I/O and the matrix
+work run in a worker thread, one operation at a time per user.
+"""
+
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Any, Awaitable, Callable, Iterator, TypeVar
+import asyncio
+import json
+import logging
+import os
+import threading
+import uuid
+
+import numpy as np
+
+try:
+    import fcntl
+except ModuleNotFoundError:
+    # Windows: no cross-process locking, one writer process per user as before
+    fcntl = None
+
+try:
+    from backend.dependencies import supabase
+    from backend.embeddings import Embedder, create_embedder
+    from backend.analysis_jobs import AnalysisJob, AnalysisJobQueue, JobQueueFull
+except ModuleNotFoundError:
+    from dependencies import supabase
+    from embeddings import Embedder, create_embedder
+    from analysis_jobs import AnalysisJob, AnalysisJobQueue, JobQueueFull
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+VECTOR_INDEX_DIR = Path(os.getenv("VECTOR_INDEX_DIR", "vector_index"))
+EMBED_BATCH_SIZE = 128
+BACKFILL_PAGE_SIZE = 500
+MIN_CAPACITY = 64
+# The id log is folded into meta.json once it has more lines than this and than there are ids
+MIN_LOG_LINES_TO_COMPACT = 1024
+
+
+class UserVectorIndex:
+    """One user's embeddings: a growable memory-mapped (capacity, dim) float32 matrix.
+
+    Row ids are kept as a snapshot in meta.json plus an append-only log of
+    ``+<id>``/``-<id>`` lines, so a write appends a line instead of rewriting
+    every id; the log is folded back into meta.json (atomically, via a new log
+    generation) once it outgrows the snapshot. Writes hold a per-user file lock
+    so processes sharing VECTOR_INDEX_DIR never interleave them.
+    """
+
+    def __init__(self, directory: Path, dim: int, embedder_name: str):
+        self.directory = directory
+        self.dim = dim
+        self.embedder_name = embedder_name
+        self.vectors_path = directory / "vectors.f32"
+        self.meta_path = directory / "meta.json"
+        self.lock_path = directory / "index.lock"
+        self.ids: list[str] = []
+        self.rows: dict[str, int] = {}
+        self.complete = False
+        self.generation = 0
+        self._matrix: np.ndarray | None = None
+        self._vectors_ino = 0
+        self._meta_mtime_ns = 0
+        self._log_offset = 0
+        self._log_lines = 0
+        self._needs_compact = False
+        self._lock_file: IO[str] | None = None
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def log_path(self) -> Path:
+        return self.directory / f"ids.{self.generation}.log"
+
+    @contextmanager
+    def locked(self) -> Iterator[None]:
+        """Hold the user's index lock (reentrant within this object)."""
+        if self._lock_file is not None:
+            yield
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.lock_path, "a") as lock_file:
+            if fcntl is not None:
+                # Released when the file is closed
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            self._lock_file = lock_file
+            try:
+                yield
+            finally:
+                self._lock_file = None
+
+    def _load(self) -> None:
+        with self.locked():
+            meta: dict[str, Any] = {}
+            if self.meta_path.exists():
+                meta = json.loads(self.meta_path.read_text())
+                self._meta_mtime_ns = self.meta_path.stat().st_mtime_ns
+            self.generation = meta.get("generation", 0)
+            self._log_offset = self._log_lines = 0
+            if meta.get("embedder") != self.embedder_name or meta.get("dim") != self.dim:
+                # Missing, or built with another embedder: start over and let backfill refill it
+                self.ids, self.rows, self.complete = [], {}, False
+                self._needs_compact = True
+                self._open(MIN_CAPACITY, create=True)
+                return
+            self.ids = meta["ids"]
+            self.rows = {entry_id: row for row, entry_id in enumerate(self.ids)}
+            self.complete = meta.get("complete", False)
+            self._needs_compact = False
+            self._replay_log()
+            self._open(max(self.vectors_path.stat().st_size // (4 * self.dim), MIN_CAPACITY))
+
+    def _open(self, capacity: int, create: bool = False) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        if create or not self.vectors_path.exists():
+            np.memmap(self.vectors_path, dtype=np.float32, mode="w+", shape=(capacity, self.dim)).flush()
+        self._matrix = np.memmap(self.vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+        self._vectors_ino = self.vectors_path.stat().st_ino
+
+    @property
+    def capacity(self) -> int:
+        return self._matrix.shape[0]
+
+    def refresh(self) -> None:
+        """Pick up writes another process made since this index was last read."""
+        try:
+            mtime_ns = self.meta_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime_ns != self._meta_mtime_ns:
+            self._load()
+            return
+        self._replay_log()
+        # Log first: a row it names may only exist in a matrix another process has since grown
+        stat = self.vectors_path.stat()
+        if stat.st_ino != self._vectors_ino or len(self.ids) > self.capacity:
+            self._open(max(stat.st_size // (4 * self.dim), MIN_CAPACITY))
+
+    def _replay_log(self) -> None:
+        try:
+            with open(self.log_path, "rb") as log:
+                log.seek(self._log_offset)
+                data = log.read()
+        except FileNotFoundError:
+            return
+        # A line still being appended is picked up on the next read
+        end = data.rfind(b"\n") + 1
+        lines = data[:end].decode().splitlines()
+        for line in lines:
+            if line.startswith("+"):
+                self._add_id(line[1:])
+            elif line.startswith("-"):
+                self._drop_id(line[1:])
+        self._log_offset += end
+        self._log_lines += len(lines)
+
+    def _add_id(self, entry_id: str) -> None:
+        if entry_id not in self.rows:
+            self.rows[entry_id] = len(self.ids)
+            self.ids.append(entry_id)
+
+    def _drop_id(self, entry_id: str) -> None:
+        """Forget entry_id; the last id takes over its row (the writer moved the vector)."""
+        row = self.rows.pop(entry_id, None)
+        if row is None:
+            return
+        moved = self.ids.pop()
+        if moved != entry_id:
+            self.ids[row] = moved
+            self.rows[moved] = row
+
+    def _grow(self, needed: int) -> None:
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        tmp_path = self.vectors_path.with_suffix(".tmp")
+        grown = np.memmap(tmp_path, dtype=np.float32, mode="w+", shape=(capacity, self.dim))
+        grown[: len(self.ids)] = self._matrix[: len(self.ids)]
+        grown.flush()
+        del grown
+        self._matrix = None
+        os.replace(tmp_path, self.vectors_path)
+        self._open(capacity)
+
+    def _save_meta(self) -> None:
+        """Snapshot every id into meta.json and switch to a new, empty log."""
+        self._matrix.flush()
+        old_log = self.log_path
+        tmp_path = self.meta_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps({
+            "embedder": self.embedder_name,
+            "dim": self.dim,
+            "complete": self.complete,
+            "generation": self.generation + 1,
+            "ids": self.ids,
+        }))
+        os.replace(tmp_path, self.meta_path)
+        self.generation += 1
+        self._meta_mtime_ns = self.meta_path.stat().st_mtime_ns
+        self._log_offset = self._log_lines = 0
+        self._needs_compact = False
+        old_log.unlink(missing_ok=True)
+
+    def _commit(self, lines: list[str]) -> None:
+        """Make changes already applied to the matrix and ids durable and visible."""
+        if self._needs_compact or self._log_lines + len(lines) > max(len(self.ids), MIN_LOG_LINES_TO_COMPACT):
+            self._save_meta()
+            return
+        self._matrix.flush()
+        data = "".join(f"{line}\n" for line in lines).encode()
+        with open(self.log_path, "ab") as log:
+            log.write(data)
+        self._log_offset += len(data)
+        self._log_lines += len(lines)
+
+    def upsert(self, entry_ids: list[str], vectors: np.ndarray) -> None:
+        """Insert or overwrite the vectors for entry_ids."""
+        with self.locked():
+            self.refresh()
+            new_ids = [entry_id for entry_id in dict.fromkeys(entry_ids) if entry_id not in self.rows]
+            if len(self.ids) + len(new_ids) > self.capacity:
+                self._grow(len(self.ids) + len(new_ids))
+            for entry_id in new_ids:
+                self._add_id(entry_id)
+            rows = [self.rows[entry_id] for entry_id in entry_ids]
+            self._matrix[rows] = vectors
+            # Overwritten vectors need no log line; the flush in _commit persists them
+            self._commit([f"+{entry_id}" for entry_id in new_ids])
+
+    def remove(self, entry_id: str) -> None:
+        """Drop an entry by moving the last row into its slot."""
+        with self.locked():
+            self.refresh()
+            row = self.rows.get(entry_id)
+            if row is None:
+                return
+            last = len(self.ids) - 1
+            if row != last:
+                self._matrix[row] = self._matrix[last]
+            self._drop_id(entry_id)
+            self._commit([f"-{entry_id}"])
+
+    def mark_complete(self) -> None:
+        with self.locked():
+            self.refresh()
+            self.complete = True
+            self._save_meta()
+
+    def mark_incomplete(self) -> None:
+        """An entry's embedding was lost: have the next search backfill again."""
+        with self.locked():
+            self.refresh()
+            if self.complete:
+                self.complete = False
+                self._save_meta()
+
+    def search(
+        self, query: np.ndarray, k: int, exclude: set[str] | None = None
+    ) -> list[tuple[str, float]]:
+        """Top k (entry_id, cosine similarity) pairs, best first."""
+        count = len(self.ids)
+        if count == 0 or k <= 0:
+            return []
+        scores = self._matrix[:count] @ query
+        wanted = min(count, k + len(exclude or ()))
+        top = np.argpartition(-scores, wanted - 1)[:wanted]
+        top = top[np.argsort(-scores[top])]
+        # Nothing in common with the query (or a zero row) is not a match
+        results = [(self.ids[row], float(scores[row])) for row in top if scores[row] > 0]
+        if exclude:
+            results = [item for item in results if item[0] not in exclude]
+        return results[:k]
+
+
+class VectorIndexStore:
+    """Opens per-user indexes on demand and keeps recently used ones open."""
+
+    def __init__(self, root: Path, embedder: Embedder, max_open: int = 256):
+        self.root = root
+        self.embedder = embedder
+        self.max_open = max_open
+        self._open: OrderedDict[str, UserVectorIndex] = OrderedDict()
+        # Guards _open, which worker threads for different users share
+        self._open_lock = threading.Lock()
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    def _index(self, user_id: str) -> UserVectorIndex:
+        """The user's open index, refreshed. Blocking: call through _in_thread."""
+        with self._open_lock:
+            index = self._open.get(user_id)
+            if index is not None:
+                self._open.move_to_end(user_id)
+        if index is None:
+            # user_id comes from a verified token, but never let it name a path
+            directory = self.root / str(uuid.UUID(user_id))
+            index = UserVectorIndex(directory, self.embedder.dim, self.embedder.name)
+            with self._open_lock:
+                self._open[user_id] = index
+                while len(self._open) > self.max_open:
+                    self._open.popitem(last=False)
+        else:
+            index.refresh()
+        return index
+
+    async def _in_thread(self, user_id: str, operation: Callable[[UserVectorIndex], T]) -> T:
+        """Run operation on the user's index in a worker thread; hold the user's lock around it."""
+        return await asyncio.to_thread(lambda: operation(self._index(user_id)))
+
+    def _lock(self, user_id: str) -> asyncio.Lock:
+        return self._locks.setdefault(user_id, asyncio.Lock())
+
+    async def index_entries(self, user_id: str, entries: list[dict[str, Any]]) -> None:
+        """Embed entries (dicts with id and content) and store their vectors."""
+        for start in range(0, len(entries), EMBED_BATCH_SIZE):
+            batch = entries[start : start + EMBED_BATCH_SIZE]
+            vectors = await self.embedder.embed([entry["content"] for entry in batch])
+            async with self._lock(user_id):
+                await self._in_thread(
+                    user_id, lambda index: index.upsert([str(entry["id"]) for entry in batch], vectors)
+                )
+
+    async def remove_entry(self, user_id: str, entry_id: str) -> None:
+        async with self._lock(user_id):
+            await self._in_thread(user_id, lambda index: index.remove(entry_id))
+
+    async def mark_incomplete(self, user_id: str) -> None:
+        async with self._lock(user_id):
+            await self._in_thread(user_id, UserVectorIndex.mark_incomplete)
+
+    async def ensure_backfilled(self, user_id: str) -> None:
+        """Embed every existing entry once for users indexed before (or without) write hooks."""
+        async with self._lock(user_id):
+            if await self._in_thread(user_id, lambda index: index.complete):
+                return
+            cursor: tuple[str, str] | None = None
+            while True:
+                query = (
+                    supabase.table("journal_entries")
+                    .select("id, created_at, content")
+                    .eq("user_id", user_id)
+                )
+                if cursor is not None:
+                    query = query.or_(
+                        f'created_at.gt."{cursor[0]}",and(created_at.eq."{cursor[0]}",id.gt.{cursor[1]})'
+                    )
+                response = await query.order("created_at").order("id").limit(BACKFILL_PAGE_SIZE).execute()
+                rows = response.data or []
+                for start in range(0, len(rows), EMBED_BATCH_SIZE):
+                    batch = rows[start : start + EMBED_BATCH_SIZE]
+                    vectors = await self.embedder.embed([row["content"] for row in batch])
+                    await self._in_thread(
+                        user_id, lambda index: index.upsert([str(row["id"]) for row in batch], vectors)
+                    )
+                if len(rows) < BACKFILL_PAGE_SIZE:
+                    break
+                cursor = (str(rows[-1]["created_at"]), str(rows[-1]["id"]))
+            await self._in_thread(user_id, UserVectorIndex.mark_complete)
+
+    async def search(
+        self, user_id: str, text: str, k: int = 10, exclude: set[str] | None = None
+    ) -> list[tuple[str, float]]:
+        """Entries most similar to text as (entry_id, score), best first."""
+        await self.ensure_backfilled(user_id)
+        query = (await self.embedder.embed([text]))[0]
+        async with self._lock(user_id):
+            return await self._in_thread(user_id, lambda index: index.search(query, k, exclude))
+
+
+vector_store = VectorIndexStore(VECTOR_INDEX_DIR, create_embedder())
+
+# Latest content waiting to be embedded, per entry id (same coalescing as entry summaries)
+_pending_content: dict[str, str] = {}
+# Keeps fire-and-forget tasks referenced until they finish
+_background: set[asyncio.Task[None]] = set()
+
+
+async def run_embedding_job(job: AnalysisJob) -> None:
+    """Embed one entry's newest content, or a batch of entries carried in the payload."""
+    entries = job.payload.get("entries")
+    if entries is None:
+        content = _pending_content.pop(job.id, None)
+        if content is None:
+            return
+        entries = [{"id": job.id, "content": content}]
+    try:
+        await vector_store.index_entries(job.user_id, entries)
+    except asyncio.CancelledError:
+        await asyncio.shield(embedding_lost(job))
+        raise
+    except Exception:
+        await embedding_lost(job)
+        raise
+
+
+async def embedding_lost(job: AnalysisJob) -> None:
+    """An entry was not embedded: have the user's next search backfill the index. Never raises."""
+    _pending_content.pop(job.id, None)
+    try:
+        await vector_store.mark_incomplete(job.user_id)
+    except Exception as e:
+        logger.error(f"Failed to mark vector index of user {job.user_id} incomplete: {str(e)}")
+
+
+embedding_queue = AnalysisJobQueue(
+    run_embedding_job,
+    workers=int(os.getenv("EMBEDDING_WORKERS", "2")),
+    per_user_limit=1,
+    max_pending=int(os.getenv("EMBEDDING_MAX_PENDING", "1000")),
+    max_pending_per_user=100,
+    on_dropped=embedding_lost,
+)
+
+
+def _spawn(coroutine: Awaitable[None]) -> None:
+    task = asyncio.ensure_future(coroutine)
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+
+
+def schedule_entry_embedding(user_id: str, entry: dict[str, Any]) -> None:
+    """Queue a freshly written entry for embedding. Never raises into the request."""
+    entry_id = str(entry["id"])
+    already_queued = entry_id in _pending_content
+    _pending_content[entry_id] = entry["content"]
+    if already_queued:
+        return
+    try:
+        embedding_queue.submit(AnalysisJob(id=entry_id, user_id=user_id))
+    except JobQueueFull as e:
+        _pending_content.pop(entry_id, None)
+        logger.warning(f"Skipping embedding for entry {entry_id}: {str(e)}")
+        _spawn(embedding_lost(AnalysisJob(id=entry_id, user_id=user_id)))
+
+
+def schedule_entry_embeddings(user_id: str, entries: list[dict[str, Any]]) -> None:
+    """Queue many written entries (e.g. one import batch) as a single embedding job. Never raises."""
+    job = AnalysisJob(
+        id=f"batch-{uuid.uuid4()}",
+        user_id=user_id,
+        payload={"entries": [{"id": str(entry["id"]), "content": entry["content"]} for entry in entries]},
+    )
+    try:
+        embedding_queue.submit(job)
+    except JobQueueFull as e:
+        logger.warning(f"Skipping embedding for {len(entries)} entries: {str(e)}")
+        _spawn(embedding_lost(job))
+
+
+async def remove_entry_embedding(user_id: str, entry_id: str) -> None:
+    """Drop a deleted entry from the user's index."""
+    _pending_content.pop(entry_id, None)
+    try:
+        await vector_store.remove_entry(user_id, entry_id)
+    except Exception as e:
+        logger.error(f"Failed to remove embedding for entry {entry_id}: {str(e)}")
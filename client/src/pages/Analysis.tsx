@@ -30,8 +30,15 @@ export default function Analysis() {
     setIsLoading(true);
     setError(null);
     try {
-      const result = await inferenceApi.getMentalHealthCheckin(parseInt(selectedRange) as 1 | 7 | 14);
-      setAnalysis(result.analysis);
+      let streamed = '';
+      const result = await inferenceApi.streamMentalHealthCheckin(
+        parseInt(selectedRange) as 1 | 7 | 14,
+        (content) => {
+          streamed += content;
+          setAnalysis(streamed);
+          setHasRunAnalysis(true);
+        }
+      );
       setEntryDate(result.date_range);
       setHasRunAnalysis(true);
     } catch (error: any) {
@@ -8,6 +8,7 @@ import {
   Target, 
   Brain,
   Calendar,
+  Flame,
   Sparkles
 } from 'lucide-react';
 import { Button } from '@/components/ui/button';
@@ -15,26 +16,27 @@ import { Card, CardContent, CardHeader, CardTitle } from '@/components/ui/card';
 
 import { AppLayout } from '@/components/layout/AppLayout';
 import { useAuth } from '@/contexts/AuthContext';
-import { journalApi, goalsApi } from '@/services/api';
-import { JournalEntry, Goal } from '@/types';
+import { dashboardApi, statsApi } from '@/services/api';
+import { DashboardData, UserStats } from '@/types';
 
 export default function Dashboard() {
   const { session } = useAuth();
-  const [entries, setEntries] = useState<JournalEntry[]>([]);
-  const [goals, setGoals] = useState<Goal[]>([]);
+  const [dashboard, setDashboard] = useState<DashboardData | null>(null);
+  const [stats, setStats] = useState<UserStats | null>(null);
   const [isLoading, setIsLoading] = useState(true);
 
+  const entries = dashboard?.entries ?? [];
+  const goals = dashboard?.goals ?? [];
+  const latestAnalysis = dashboard?.latest_analysis ?? null;
+
   const user = session?.user;
 
   useEffect(() => {
     async function fetchData() {
       try {
-        const [entriesData, goalsData] = await Promise.all([
-          journalApi.getEntries({ limit: 3 }),
-          goalsApi.getGoals(),
-        ]);
-        setEntries(entriesData);
-        setGoals(goalsData.filter(g => g.status === 'active'));
+        const [dashboardData, statsData] = await Promise.all([dashboardApi.get(), statsApi.get(0)]);
+        setDashboard(dashboardData);
+        setStats(statsData);
       } catch (error) {
         console.error('Failed to fetch dashboard data:', error);
       } finally {
@@ -73,7 +75,7 @@ export default function Dashboard() {
         </div>
 
         {/* Quick Stats */}
-        <div className="grid grid-cols-1 sm:grid-cols-2 gap-4">
+        <div className="grid grid-cols-1 sm:grid-cols-3 gap-4">
           <Card className="gradient-card border-border/50 shadow-soft hover:shadow-elegant transition-shadow">
             <CardContent className="p-5">
               <div className="flex items-center gap-4">
@@ -81,7 +83,7 @@ export default function Dashboard() {
                   <BookOpen className="h-5 w-5 text-primary" />
                 </div>
                 <div>
-                  <p className="text-2xl font-semibold text-foreground">{entries.length}</p>
+                  <p className="text-2xl font-semibold text-foreground">{dashboard?.entry_count ?? 0}</p>
                   <p className="text-sm text-muted-foreground">Journal Entries</p>
                 </div>
               </div>
@@ -95,12 +97,28 @@ export default function Dashboard() {
                   <Target className="h-5 w-5 text-accent-foreground" />
                 </div>
                 <div>
-                  <p className="text-2xl font-semibold text-foreground">{goals.length}</p>
+                  <p className="text-2xl font-semibold text-foreground">{dashboard?.active_goal_count ?? 0}</p>
                   <p className="text-sm text-muted-foreground">Active Goals</p>
                 </div>
               </div>
             </CardContent>
           </Card>
+
+          <Card className="gradient-card border-border/50 shadow-soft hover:shadow-elegant transition-shadow">
+            <CardContent className="p-5">
+              <div className="flex items-center gap-4">
+                <div className="p-3 rounded-xl bg-primary/10">
+                  <Flame className="h-5 w-5 text-primary" />
+                </div>
+                <div>
+                  <p className="text-2xl font-semibold text-foreground">{stats?.current_streak_days ?? 0}</p>
+                  <p className="text-sm text-muted-foreground">
+                    Day Streak{stats?.longest_streak_days ? ` · best ${stats.longest_streak_days}` : ''}
+                  </p>
+                </div>
+              </div>
+            </CardContent>
+          </Card>
         </div>
 
         <div className="grid grid-cols-1 lg:grid-cols-3 gap-6">
@@ -193,16 +211,16 @@ export default function Dashboard() {
                 </Card>
               ) : (
                 <div className="space-y-3">
-                  {goals.slice(0, 3).map((goal) => (
+                  {goals.map((goal) => (
                     <Link to={`/goals/${goal.id}`} key={goal.id}>
                       <Card className="hover:shadow-soft transition-shadow cursor-pointer">
                         <CardContent className="p-4">
                           <h3 className="text-sm font-medium text-foreground line-clamp-2">
                             {goal.title}
                           </h3>
-                          {goal.description && (
+                          {goal.body_text && (
                             <p className="text-xs text-muted-foreground mt-1 line-clamp-1">
-                              {goal.description}
+                              {goal.body_text}
                             </p>
                           )}
                         </CardContent>
@@ -227,7 +245,9 @@ export default function Dashboard() {
                     Discover Your Patterns
                   </h3>
                   <p className="text-sm text-muted-foreground mb-4">
-                    Get personalized insights from your journal entries.
+                    {latestAnalysis?.completed_at
+                      ? `Last analysis: ${latestAnalysis.date_range} (${format(new Date(latestAnalysis.completed_at), 'MMM d')})`
+                      : 'Get personalized insights from your journal entries.'}
                   </p>
                   <Button 
                     asChild
@@ -18,16 +18,21 @@ export default function Journal() {
   const [entries, setEntries] = useState<JournalEntry[]>([]);
   const [isLoading, setIsLoading] = useState(true);
   const [searchQuery, setSearchQuery] = useState('');
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
 
+  // Search runs on the server; wait for typing to pause before refetching
   useEffect(() => {
-    fetchEntries();
-  }, []);
+    const timeout = setTimeout(() => fetchEntries(searchQuery), searchQuery ? 300 : 0);
+    return () => clearTimeout(timeout);
+  }, [searchQuery]);
 
-  const fetchEntries = async () => {
+  const fetchEntries = async (q: string) => {
     try {
       setIsLoading(true);
-      const data = await journalApi.getEntries();
-      setEntries(data);
+      const page = await journalApi.getEntriesPage({ q: q || undefined });
+      setEntries(page.entries);
+      setNextCursor(page.nextCursor);
     } catch (error) {
       console.error('Failed to fetch entries:', error);
     } finally {
@@ -35,13 +40,21 @@ export default function Journal() {
     }
   };
 
-  const filteredEntries = entries.filter((entry) => {
-    if (!searchQuery) return true;
-    const query = searchQuery.toLowerCase();
-    return entry.content.toLowerCase().includes(query);
-  });
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    try {
+      setIsLoadingMore(true);
+      const page = await journalApi.getEntriesPage({ q: searchQuery || undefined, cursor: nextCursor });
+      setEntries((current) => [...current, ...page.entries]);
+      setNextCursor(page.nextCursor);
+    } catch (error) {
+      console.error('Failed to fetch more entries:', error);
+    } finally {
+      setIsLoadingMore(false);
+    }
+  };
 
-  const groupedEntries = filteredEntries.reduce((groups, entry) => {
+  const groupedEntries = entries.reduce((groups, entry) => {
     const date = format(new Date(entry.created_at), 'MMMM yyyy');
     if (!groups[date]) groups[date] = [];
     groups[date].push(entry);
@@ -89,7 +102,7 @@ export default function Journal() {
               </Card>
             ))}
           </div>
-        ) : filteredEntries.length === 0 ? (
+        ) : entries.length === 0 ? (
           <Card className="border-dashed">
             <CardContent className="p-12 text-center">
               <BookOpen className="h-12 w-12 mx-auto text-muted-foreground/40 mb-4" />
@@ -143,6 +156,13 @@ export default function Journal() {
                 </div>
               </div>
             ))}
+            {nextCursor && (
+              <div className="flex justify-center">
+                <Button variant="outline" onClick={loadMore} disabled={isLoadingMore}>
+                  {isLoadingMore ? 'Loading...' : 'Load more'}
+                </Button>
+              </div>
+            )}
           </div>
         )}
       </div>
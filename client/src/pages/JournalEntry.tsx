@@ -1,4 +1,4 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
 import { format } from 'date-fns';
 import { ArrowLeft, Edit2, Trash2, Save, Calendar } from 'lucide-react';
@@ -17,7 +17,7 @@ import {
   AlertDialogTrigger,
 } from '@/components/ui/alert-dialog';
 import { AppLayout } from '@/components/layout/AppLayout';
-import { journalApi } from '@/services/api';
+import { ApiError, journalApi } from '@/services/api';
 import type { JournalEntry as JournalEntryType } from '@/types';
 import { useToast } from '@/hooks/use-toast';
 
@@ -34,6 +34,12 @@ export default function JournalEntry() {
   
   // Edit state
   const [editContent, setEditContent] = useState('');
+  // Entry version autosaved drafts are based on, and whether any draft was sent this edit
+  const [draftBase, setDraftBase] = useState('');
+  const draftSent = useRef(false);
+  // Identifies this tab's drafts, so the backend can tell them from another tab's
+  // (not crypto.randomUUID: that needs a secure context and the app is also served over http)
+  const draftClientId = useRef(`${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`);
 
   useEffect(() => {
     fetchEntry();
@@ -46,6 +52,7 @@ export default function JournalEntry() {
       if (data) {
         setEntry(data);
         setEditContent(data.content);
+        setDraftBase(data.updated_at);
       }
     } catch (error) {
       console.error('Failed to fetch entry:', error);
@@ -54,15 +61,45 @@ export default function JournalEntry() {
     }
   };
 
+  const handleConflict = (error: unknown) => {
+    if (!(error instanceof ApiError) || error.status !== 409 || !entry) return false;
+    const detail = error.detail as { server_content: string; server_updated_at: string };
+    // Keep the user's text; the next save is based on (and replaces) the other version
+    setEntry({ ...entry, content: detail.server_content, updated_at: detail.server_updated_at });
+    setDraftBase(detail.server_updated_at);
+    toast({
+      title: "Entry changed elsewhere",
+      description: "This entry was edited in another window. Saving will replace that version with yours.",
+      variant: "destructive",
+    });
+    return true;
+  };
+
+  // Autosave: send the draft a second after typing stops; the backend coalesces drafts into one write
+  useEffect(() => {
+    if (!id || !isEditing || !entry || !editContent.trim() || editContent === entry.content) return;
+    const timer = setTimeout(async () => {
+      try {
+        const status = await journalApi.saveDraft(id, editContent, draftBase, draftClientId.current);
+        draftSent.current = true;
+        setDraftBase(status.updated_at);
+      } catch (error) {
+        if (!handleConflict(error)) console.error('Autosave failed:', error);
+      }
+    }, 1000);
+    return () => clearTimeout(timer);
+  }, [editContent, isEditing]);
+
   const handleSave = async () => {
     if (!id || !editContent.trim()) return;
     
     setIsSaving(true);
     try {
-      const updated = await journalApi.updateEntry(id, {
-        content: editContent.trim(),
-      });
+      await journalApi.saveDraft(id, editContent.trim(), draftBase, draftClientId.current);
+      const updated = await journalApi.commitDraft(id);
+      draftSent.current = false;
       setEntry(updated);
+      setDraftBase(updated.updated_at);
       setIsEditing(false);
       toast({
         title: "Entry updated",
@@ -70,6 +107,7 @@ export default function JournalEntry() {
         variant: "success",
       });
     } catch (error) {
+      if (handleConflict(error)) return;
       toast({
         title: "Failed to save",
         description: "Something went wrong. Please try again.",
@@ -102,9 +140,21 @@ export default function JournalEntry() {
     }
   };
 
-  const cancelEdit = () => {
+  const cancelEdit = async () => {
     if (entry) {
       setEditContent(entry.content);
+      if (id && draftSent.current) {
+        // Drafts were already autosaved: put the original content back
+        draftSent.current = false;
+        try {
+          await journalApi.saveDraft(id, entry.content, draftBase, draftClientId.current);
+          const restored = await journalApi.commitDraft(id);
+          setEntry(restored);
+          setDraftBase(restored.updated_at);
+        } catch (error) {
+          handleConflict(error);
+        }
+      }
     }
     setIsEditing(false);
   };
@@ -5,8 +5,15 @@ import {
   JournalEntry,
   Goal,
   GoalBackend,
+  AnalysisBackend,
   AnalysisResult,
+  DashboardData,
+  SyncResponse,
   User,
+  UserStats,
+  MoodTrend,
+  ModelRoute,
+  DraftStatus,
   MoodType
 } from '@/types';
 import { supabase } from '@/lib/supabase';
@@ -19,6 +26,13 @@ const getToken = async () => {
   return session?.access_token;
 };
 
+// Error from a failed API call; detail is the backend's (possibly structured) detail
+export class ApiError extends Error {
+  constructor(message: string, public status: number, public detail?: unknown) {
+    super(message);
+  }
+}
+
 // Helper for authenticated requests
 async function authFetch<T>(
   endpoint: string,
@@ -38,7 +52,8 @@ async function authFetch<T>(
 
   if (!response.ok) {
     const error = await response.json().catch(() => ({ detail: 'Request failed' }));
-    throw new Error(error.detail || error.message || 'Request failed');
+    const message = typeof error.detail === 'string' ? error.detail : error.detail?.message;
+    throw new ApiError(message || error.message || 'Request failed', response.status, error.detail);
   }
 
   return response.json();
@@ -102,70 +117,6 @@ const mockEntries: JournalEntry[] = [
   },
 ];
 
-const mockAnalysis: AnalysisResult = {
-  id: '1',
-  user_id: '1',
-  start_date: '2024-12-22',
-  end_date: '2024-12-28',
-  emotional_trends: [
-    { date: '2024-12-22', mood_score: 0.3, dominant_emotion: 'content' },
-    { date: '2024-12-23', mood_score: 0.5, dominant_emotion: 'hopeful' },
-    { date: '2024-12-24', mood_score: -0.4, dominant_emotion: 'tired' },
-    { date: '2024-12-25', mood_score: 0.0, dominant_emotion: 'calm' },
-    { date: '2024-12-26', mood_score: 0.7, dominant_emotion: 'joyful' },
-    { date: '2024-12-27', mood_score: -0.3, dominant_emotion: 'anxious' },
-    { date: '2024-12-28', mood_score: 0.6, dominant_emotion: 'motivated' },
-  ],
-  insights: [
-    {
-      type: 'pattern',
-      title: 'Morning Routine Impact',
-      description: 'Days that start with meditation show a 40% improvement in overall mood scores. Your consistent practice is paying off.',
-      confidence: 0.85,
-    },
-    {
-      type: 'achievement',
-      title: 'Social Connection Milestone',
-      description: 'You\'ve maintained meaningful social connections for 3 consecutive weeks, contributing to emotional stability.',
-      confidence: 0.92,
-    },
-    {
-      type: 'recommendation',
-      title: 'Evening Wind-Down',
-      description: 'Consider adding a structured evening routine. Entries following poor sleep show decreased mood and productivity.',
-      confidence: 0.78,
-    },
-  ],
-  areas_of_concern: [
-    {
-      category: 'Sleep Quality',
-      severity: 'medium',
-      description: 'Sleep-related concerns appear in 30% of your entries this week.',
-      suggested_actions: [
-        'Set a consistent bedtime alarm',
-        'Create a device-free wind-down routine',
-        'Consider limiting caffeine after 2pm',
-      ],
-    },
-  ],
-  goal_progress: [
-    {
-      goal_id: '1',
-      goal_title: 'Daily Meditation Practice',
-      progress_change: 8,
-      analysis_notes: 'Strong consistency this week with 6 out of 7 days completed.',
-    },
-    {
-      goal_id: '2',
-      goal_title: 'Improve Sleep Quality',
-      progress_change: -5,
-      analysis_notes: 'Some setbacks noted. Consider reviewing evening habits.',
-    },
-  ],
-  summary: 'Overall, this has been a balanced week with notable highs around social connection and meditation practice. The main area for focus is establishing better sleep hygiene, which appears to significantly impact your following day\'s wellbeing.',
-  created_at: '2024-12-28T12:00:00Z',
-};
-
 // ============ MOCK API FUNCTIONS ============
 // These simulate API calls - replace with real fetch calls when connecting to backend
 
@@ -173,38 +124,44 @@ let entries = [...mockEntries];
 
 // Journal API - Connected to real backend
 export const journalApi = {
-  getEntries: async (params?: {
+  // One page of entries, newest first. Pass nextCursor back as `cursor` for the next page.
+  getEntriesPage: async (params?: {
     limit?: number;
-    offset?: number;
-    mood?: MoodType;
-    tag?: string;
-  }): Promise<JournalEntry[]> => {
-    // Get entries from backend (supports 'since' parameter, defaults to 30 days ago)
-    const since = new Date();
-    since.setDate(since.getDate() - 30);
-
-    const entries = await authFetch<JournalEntry[]>(
-      `/api/get_journal_entries?since=${since.toISOString()}`,
+    cursor?: string | null;
+    since?: string;
+    until?: string;
+    q?: string;
+    fields?: (keyof JournalEntry)[];
+  }): Promise<{ entries: JournalEntry[]; nextCursor: string | null }> => {
+    const query = new URLSearchParams({ limit: String(params?.limit || 50) });
+    if (params?.cursor) query.set('cursor', params.cursor);
+    if (params?.since) query.set('since', params.since);
+    if (params?.until) query.set('until', params.until);
+    if (params?.q) query.set('q', params.q);
+    if (params?.fields?.length) query.set('fields', params.fields.join(','));
+
+    const page = await authFetch<{ entries: JournalEntry[]; next_cursor: string | null }>(
+      `/api/get_journal_entries?${query.toString()}`,
       { method: 'GET' }
     );
+    return { entries: page.entries, nextCursor: page.next_cursor };
+  },
 
-    // Apply client-side filtering for mood and tag
-    let result = entries;
-    if (params?.mood) {
-      result = result.filter(e => e.mood === params.mood);
-    }
-    if (params?.tag) {
-      result = result.filter(e => e.tags?.includes(params.tag));
-    }
-
-    // Apply pagination
-    return result.slice(params?.offset || 0, (params?.offset || 0) + (params?.limit || 50));
+  getEntries: async (params?: {
+    limit?: number;
+    q?: string;
+  }): Promise<JournalEntry[]> => {
+    const { entries } = await journalApi.getEntriesPage(params);
+    return entries;
   },
 
   getEntry: async (id: string): Promise<JournalEntry | null> => {
-    // Get all entries and find the specific one
-    const entries = await journalApi.getEntries();
-    return entries.find(e => e.id === id) || null;
+    try {
+      return await authFetch<JournalEntry>(`/api/get_journal_entry/${id}`, { method: 'GET' });
+    } catch (error) {
+      if (error instanceof Error && error.message === 'Journal entry not found') return null;
+      throw error;
+    }
   },
 
   createEntry: async (data: { content: string; mood?: MoodType; tags?: string[] }): Promise<JournalEntry> => {
@@ -234,6 +191,25 @@ export const journalApi = {
     return entry;
   },
 
+  // Autosave while editing: the backend buffers drafts and writes once typing pauses.
+  // baseUpdatedAt is the entry's updated_at as loaded; clientId identifies this editor (one per
+  // tab). Throws ApiError with status 409 (detail.server_content / detail.server_updated_at) if
+  // the entry was changed elsewhere, including by another tab.
+  saveDraft: async (id: string, content: string, baseUpdatedAt: string, clientId: string): Promise<DraftStatus> => {
+    return authFetch<DraftStatus>(
+      `/api/journal/${id}/draft`,
+      {
+        method: 'PUT',
+        body: JSON.stringify({ content, base_updated_at: baseUpdatedAt, client_id: clientId }),
+      }
+    );
+  },
+
+  // Write the buffered draft now (explicit save)
+  commitDraft: async (id: string): Promise<JournalEntry> => {
+    return authFetch<JournalEntry>(`/api/journal/${id}/commit`, { method: 'POST' });
+  },
+
   deleteEntry: async (id: string): Promise<void> => {
     await authFetch<{ message: string }>(
       '/api/delete_journal_entry',
@@ -256,18 +232,60 @@ const mapGoalBackendToFrontend = (backendGoal: GoalBackend): Goal => {
     progress: 0, // Not in DB schema, default to 0
     status: backendGoal.status as 'active' | 'completed' | 'paused',
     created_at: backendGoal.created_at,
-    updated_at: backendGoal.created_at, // Use created_at as updated_at
+    updated_at: backendGoal.updated_at || backendGoal.created_at,
   };
 };
 
+// In-memory mirror of the user's entries and goals, kept current with delta sync.
+// Deliberately not persisted: journal content never lands in browser storage.
+const syncState = {
+  userId: null as string | null,
+  watermark: null as string | null,
+  entries: new Map<string, JournalEntry>(),
+  goals: new Map<string, GoalBackend>(),
+};
+
+// Sync API - Connected to real backend
+export const syncApi = {
+  // Fetch only what changed since the last pull and return the merged lists (newest first)
+  pull: async (): Promise<{ entries: JournalEntry[]; goals: GoalBackend[] }> => {
+    const { data: { session } } = await supabase.auth.getSession();
+    const userId = session?.user?.id ?? null;
+    if (userId !== syncState.userId) {
+      syncState.userId = userId;
+      syncState.watermark = null;
+      syncState.entries.clear();
+      syncState.goals.clear();
+    }
+
+    let hasMore = true;
+    while (hasMore) {
+      const query = syncState.watermark ? `?watermark=${encodeURIComponent(syncState.watermark)}` : '';
+      const delta = await authFetch<SyncResponse>(`/api/sync${query}`, { method: 'GET' });
+      delta.entries.forEach(entry => syncState.entries.set(entry.id, entry));
+      delta.goals.forEach(goal => syncState.goals.set(goal.id, goal));
+      delta.deleted.forEach(tombstone => {
+        const table = tombstone.table_name === 'goals' ? syncState.goals : syncState.entries;
+        table.delete(tombstone.record_id);
+      });
+      syncState.watermark = delta.watermark;
+      hasMore = delta.has_more;
+    }
+
+    const newestFirst = (a: { created_at: string }, b: { created_at: string }) =>
+      b.created_at.localeCompare(a.created_at);
+    return {
+      entries: [...syncState.entries.values()].sort(newestFirst),
+      goals: [...syncState.goals.values()].sort(newestFirst),
+    };
+  },
+};
+
 // Goals API - Connected to real backend
 export const goalsApi = {
   getGoals: async (): Promise<Goal[]> => {
-    const backendGoals = await authFetch<GoalBackend[]>(
-      '/api/get_goals',
-      { method: 'GET' }
-    );
-    return backendGoals.map(mapGoalBackendToFrontend);
+    const { goals } = await syncApi.pull();
+    return goals.map(mapGoalBackendToFrontend);
   },
 
   getGoal: async (id: string): Promise<Goal | null> => {
@@ -355,29 +373,87 @@ export const goalsApi = {
   },
 };
 
-// Analysis API
+// Helper to convert a backend analysis job to the frontend AnalysisResult
+const mapAnalysisBackendToFrontend = (backendAnalysis: AnalysisBackend): AnalysisResult => {
+  return {
+    id: backendAnalysis.id,
+    user_id: backendAnalysis.user_id,
+    start_date: backendAnalysis.start_date,
+    end_date: backendAnalysis.end_date,
+    emotional_trends: [], // Not produced by the backend yet
+    insights: [],
+    areas_of_concern: [],
+    goal_progress: [],
+    summary: backendAnalysis.analysis || '',
+    created_at: backendAnalysis.created_at,
+  };
+};
+
+const ANALYSIS_POLL_INTERVAL_MS = 1500;
+
+// Analysis API - Connected to real backend (background jobs)
 export const analysisApi = {
   triggerAnalysis: async (startDate: string, endDate: string): Promise<AnalysisResult> => {
-    // Simulate longer processing time for AI analysis
-    await new Promise(resolve => setTimeout(resolve, 2000));
-    return {
-      ...mockAnalysis,
-      id: String(Date.now()),
-      start_date: startDate,
-      end_date: endDate,
-      created_at: new Date().toISOString(),
-    };
+    // Queue the job, then poll until the worker has finished it
+    let job = await authFetch<AnalysisBackend>(
+      '/api/post_analysis',
+      {
+        method: 'POST',
+        body: JSON.stringify({ start_date: startDate, end_date: endDate }),
+      }
+    );
+
+    while (job.status === 'queued' || job.status === 'running') {
+      await new Promise(resolve => setTimeout(resolve, ANALYSIS_POLL_INTERVAL_MS));
+      job = await authFetch<AnalysisBackend>(
+        `/api/get_analysis/${job.id}`,
+        { method: 'GET' }
+      );
+    }
+
+    if (job.status === 'failed') {
+      throw new Error(job.error || 'Failed to generate analysis');
+    }
+    return mapAnalysisBackendToFrontend(job);
   },
 
   getAnalysisHistory: async (): Promise<AnalysisResult[]> => {
-    await new Promise(resolve => setTimeout(resolve, 300));
-    return [mockAnalysis];
+    const jobs = await authFetch<AnalysisBackend[]>(
+      '/api/get_analyses',
+      { method: 'GET' }
+    );
+    return jobs
+      .filter(job => job.status === 'completed')
+      .map(mapAnalysisBackendToFrontend);
   },
 
   getAnalysis: async (id: string): Promise<AnalysisResult | null> => {
-    await new Promise(resolve => setTimeout(resolve, 200));
-    if (id === mockAnalysis.id) return mockAnalysis;
-    return null;
+    try {
+      const job = await authFetch<AnalysisBackend>(
+        `/api/get_analysis/${id}`,
+        { method: 'GET' }
+      );
+      return mapAnalysisBackendToFrontend(job);
+    } catch (error: any) {
+      if (error.message?.includes('not found') || error.message?.includes('404')) {
+        return null;
+      }
+      throw error;
+    }
+  },
+};
+
+// Dashboard API - one request for every dashboard card
+export const dashboardApi = {
+  get: async (): Promise<DashboardData> => {
+    return authFetch<DashboardData>('/api/dashboard', { method: 'GET' });
+  },
+};
+
+// Stats API (materialized server-side; days limits daily_counts)
+export const statsApi = {
+  get: async (days = 30): Promise<UserStats> => {
+    return authFetch<UserStats>(`/api/stats?days=${days}`, { method: 'GET' });
   },
 };
 
@@ -402,6 +478,7 @@ export const inferenceApi = {
     date_range: string;
     entry_count: number;
     analysis: string;
+    model_route: ModelRoute | null;
   }> => {
     const endpoint = {
       1: '/api/inference/mental-health-checkin/1day',
@@ -411,6 +488,82 @@ export const inferenceApi = {
     
     return authFetch(endpoint, { method: 'GET' });
   },
+
+  // Streams the check-in over Server-Sent Events, calling onToken as text arrives.
+  // Resolves with the final metadata event once the analysis is complete.
+  streamMentalHealthCheckin: async (
+    days: 1 | 7 | 14,
+    onToken: (content: string) => void
+  ): Promise<{
+    success: boolean;
+    period_days: number;
+    date_range: string;
+    entry_count: number;
+    goals_analyzed: number;
+    model_route: ModelRoute | null;
+  }> => {
+    const endpoint = {
+      1: '/api/inference/mental-health-checkin/1day/stream',
+      7: '/api/inference/mental-health-checkin/7days/stream',
+      14: '/api/inference/mental-health-checkin/14days/stream',
+    }[days];
+
+    const token = await getToken();
+    const response = await fetch(`${BASE_URL}${endpoint}`, {
+      method: 'GET',
+      headers: {
+        Accept: 'text/event-stream',
+        ...(token ? { Authorization: `Bearer ${token}` } : {}),
+      },
+    });
+
+    if (!response.ok || !response.body) {
+      const error = await response.json().catch(() => ({ detail: 'Request failed' }));
+      throw new Error(error.detail || error.message || 'Request failed');
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      // Events are separated by a blank line
+      let boundary = buffer.indexOf('\n\n');
+      while (boundary !== -1) {
+        const rawEvent = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+        boundary = buffer.indexOf('\n\n');
+
+        let eventName = 'message';
+        let data = '';
+        for (const line of rawEvent.split('\n')) {
+          if (line.startsWith('event: ')) eventName = line.slice(7);
+          else if (line.startsWith('data: ')) data += line.slice(6);
+        }
+        if (!data) continue;
+
+        const payload = JSON.parse(data);
+        if (eventName === 'token') {
+          onToken(payload.content);
+        } else if (eventName === 'done') {
+          return payload;
+        } else if (eventName === 'error') {
+          throw new Error(payload.detail || 'Failed to generate analysis');
+        }
+      }
+    }
+
+    throw new Error('Analysis stream ended unexpectedly');
+  },
+
+  // Daily mood scores and rolling averages, scored locally on the server (no LLM call)
+  getMoodTrend: async (days = 90, window = 7): Promise<MoodTrend> => {
+    return authFetch<MoodTrend>(`/api/inference/mood-trend?days=${days}&window=${window}`, { method: 'GET' });
+  },
 };
 
 export { authFetch };
@@ -19,6 +19,15 @@ export interface JournalEntry {
   updated_at: string;
 }
 
+// State of an autosaved draft (PUT /api/journal/{id}/draft)
+export interface DraftStatus {
+  journal_entry_id: string;
+  revision: number;
+  pending: boolean;
+  updated_at: string; // entry version the draft will be written over
+  flush_in_seconds: number | null;
+}
+
 // Backend Goal type (matches database schema)
 export interface GoalBackend {
   id: string;
@@ -27,6 +36,7 @@ export interface GoalBackend {
   body_text: string;
   status: 'active' | 'completed' | 'paused';
   created_at: string;
+  updated_at?: string;
 }
 
 // Frontend Goal type (with additional fields for UI)
@@ -39,7 +49,7 @@ export interface Goal {
   progress: number; // 0-100, not in DB, defaults to 0
   status: 'active' | 'completed' | 'paused';
   created_at: string;
-  updated_at: string; // Uses created_at from DB
+  updated_at: string; // Falls back to created_at for rows synced before updated_at existed
 }
 
 export interface AnalysisResult {
@@ -55,6 +65,36 @@ export interface AnalysisResult {
   created_at: string;
 }
 
+// Backend analysis job row (matches the analyses table)
+export interface AnalysisBackend {
+  id: string;
+  user_id: string;
+  status: 'queued' | 'running' | 'completed' | 'failed';
+  start_date: string;
+  end_date: string;
+  input_hash: string | null;
+  date_range: string | null;
+  entry_count: number | null;
+  goals_analyzed: number | null;
+  analysis: string | null;
+  model_route: ModelRoute | null;
+  error: string | null;
+  created_at: string;
+  completed_at: string | null;
+}
+
+// Model tier that produced an analysis (tier differs from preferred_tier when reason is set)
+export interface ModelRoute {
+  endpoint: string;
+  tier: string;
+  model: string;
+  max_tokens: number;
+  prompt_tokens: number;
+  preferred_tier: string;
+  reason: 'prompt_size' | 'saturated' | 'deadline' | null;
+  completion_tokens: number | null;
+}
+
 export interface EmotionalTrend {
   date: string;
   mood_score: number; // -1 to 1
@@ -100,3 +140,53 @@ export interface ApiError {
   message: string;
   code?: string;
 }
+
+// Delta sync response (GET /api/sync)
+export interface SyncResponse {
+  entries: JournalEntry[];
+  goals: GoalBackend[];
+  deleted: { table_name: 'journal_entries' | 'goals'; record_id: string; deleted_at: string }[];
+  watermark: string;
+  has_more: boolean;
+  full: boolean;
+}
+
+// Dashboard aggregate (GET /api/dashboard); rows carry only the projected columns
+export interface UserStats {
+  entry_count: number;
+  total_words: number;
+  average_words: number;
+  current_streak_days: number;
+  longest_streak_days: number;
+  first_entry_day: string | null;
+  last_entry_day: string | null;
+  daily_counts: Record<string, number>;
+  word_histogram: { min_words: number; max_words: number | null; count: number }[];
+  goal_status_counts: Record<string, number>;
+  updated_at: string | null;
+}
+
+export interface MoodTrendDay {
+  date: string;
+  entry_count: number;
+  valence: number | null;
+  rolling_valence: number | null;
+  emotions: Record<string, number>;
+}
+
+export interface MoodTrend {
+  start_date: string;
+  end_date: string;
+  window: number;
+  entry_count: number;
+  lexicon_version: string;
+  days: MoodTrendDay[];
+}
+
+export interface DashboardData {
+  entries: Pick<JournalEntry, 'id' | 'created_at' | 'content'>[];
+  entry_count: number;
+  goals: Pick<GoalBackend, 'id' | 'title' | 'body_text'>[];
+  active_goal_count: number;
+  latest_analysis: Pick<AnalysisBackend, 'id' | 'date_range' | 'entry_count' | 'completed_at'> | null;
+}